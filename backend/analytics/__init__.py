@@ -0,0 +1,5 @@
+from .running_stat import *
+from .card_stats import *
+from .sprt import *
+from .ab_test import *
+from .sweep import *
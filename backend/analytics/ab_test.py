@@ -0,0 +1,134 @@
+"""ab_test.py - Comparing two rulesets using paired games and a sequential test.
+
+Game ``i`` is played under both rulesets with the same seed (and the same
+seeded frontend) so most of the randomness cancels out in the difference
+of the metric between the two. The differences go into a ``PairedSPRT``
+as the games finish (in order, so the result doesn't depend on the number
+of workers) and the games stop as soon as it reaches a decision, which
+usually needs far fewer games than a fixed-size test with the same error
+rates.
+
+Usage::
+
+    result = run_ab_test(DefaultRuleset, MyVariant, metric=mean_score, delta=0.5)
+    print(result.format())
+"""
+
+from __future__ import annotations
+
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Literal
+
+from .running_stat import RunningStat
+from .sprt import PairedSPRT
+from ..bots import PolicyFrontend, RandomFrontend
+from ..core import Game, IRuleset
+from ..workers import fork_pool, worker_args
+
+__all__ = ['ABResult', 'run_ab_test', 'mean_score', 'score_spread',
+           'first_player_wins']
+
+MetricT = Callable[[Game], float]
+
+
+# region metrics
+def mean_score(game: Game) -> float:
+    return sum([p.final_score for p in game.players]) / len(game.players)
+
+
+def score_spread(game: Game) -> float:
+    """Best minus worst score (how one-sided the game was)"""
+    scores = [p.final_score for p in game.players]
+    return max(scores) - min(scores)
+
+
+def first_player_wins(game: Game) -> float:
+    return 1 / len(game.winners) if game.players[0] in game.winners else 0.0
+# endregion
+
+
+@dataclass
+class ABResult:
+    # 'A' or 'B' if the metric is higher with that ruleset, 'same' if the
+    #  difference is less than delta or None if max_pairs was reached first
+    decision: Literal['A', 'B', 'same'] | None
+    n_pairs: int
+    max_pairs: int
+    # The estimated number of pairs for a fixed-size test
+    fixed_n: int
+    diff: RunningStat  # metric(B) - metric(A)
+    ci: tuple[float, float]  # 95% confidence interval of the mean difference
+    metric_a: RunningStat = field(default_factory=RunningStat)
+    metric_b: RunningStat = field(default_factory=RunningStat)
+
+    @property
+    def sims_saved(self):
+        """Games not played compared to the fixed-size test (2 per pair)"""
+        return 2 * max(self.fixed_n - self.n_pairs, 0)
+
+    def format(self):
+        return (f'Decision: {self.decision or "none (max_pairs reached)"} '
+                f'after {self.n_pairs} pairs\n'
+                f'A: {self.metric_a.mean:.3f} ± {self.metric_a.stderr:.3f}, '
+                f'B: {self.metric_b.mean:.3f} ± {self.metric_b.stderr:.3f}\n'
+                f'B - A: {self.diff.mean:+.3f} (95% CI {self.ci[0]:+.3f} to {self.ci[1]:+.3f})\n'
+                f'Fixed-size test: {self.fixed_n} pairs, {self.sims_saved} games saved')
+
+
+def _play_pair(game_idx: int, seed: str, ruleset_a: IRuleset, ruleset_b: IRuleset,
+               metric: MetricT, frontend_factory: Callable[[str], PolicyFrontend],
+               n_players: int) -> tuple[float, float]:
+    game_seed = f'{seed}.{game_idx}'
+    results = []
+    for ruleset in (ruleset_a, ruleset_b):
+        game = Game(n_players, frontend_factory(game_seed), ruleset, game_seed)
+        game.run_game()
+        results.append(metric(game))
+    return results[0], results[1]
+
+
+def _worker_play_pair(game_idx: int):
+    return _play_pair(game_idx, *worker_args())
+
+
+def run_ab_test(ruleset_a: Callable[[], IRuleset], ruleset_b: Callable[[], IRuleset],
+                metric: MetricT = mean_score, delta: float = 0.5,
+                alpha: float = 0.05, beta: float = 0.1, max_pairs: int = 10_000,
+                min_pairs: int = 30, seed: str = '0', n_workers: int = None,
+                frontend_factory: Callable[[str], PolicyFrontend] = RandomFrontend,
+                n_players: int = 4) -> ABResult:
+    """Play pairs of games until the test can tell whether ``metric`` is
+    different by at least ``delta`` between the rulesets (or until
+    ``max_pairs``). The ruleset factories and ``metric`` are used in
+    forked worker processes."""
+    test = PairedSPRT(delta, alpha, beta, min_pairs)
+    metric_a, metric_b = RunningStat(), RunningStat()
+    args = (seed, ruleset_a(), ruleset_b(), metric, frontend_factory, n_players)
+    n_workers = n_workers or os.cpu_count() or 1
+
+    def add(result: tuple[float, float]):
+        metric_a.add(result[0])
+        metric_b.add(result[1])
+        return test.add(result[1] - result[0])
+
+    if n_workers == 1:
+        for i in range(max_pairs):
+            if add(_play_pair(i, *args)) is not None:
+                break
+    else:
+        todo = iter(range(max_pairs))
+        with fork_pool(n_workers, *args) as pool:
+            pending = deque(pool.submit(_worker_play_pair, i)
+                            for _, i in zip(range(2 * n_workers), todo))
+            while pending:
+                if add(pending.popleft().result()) is not None:
+                    for fut in pending:
+                        fut.cancel()
+                    break
+                if (i := next(todo, None)) is not None:
+                    pending.append(pool.submit(_worker_play_pair, i))
+    decision = {'positive': 'B', 'negative': 'A', 'null': 'same', None: None}[test.decision]
+    return ABResult(decision, test.stat.n, max_pairs, test.fixed_n(), test.stat,
+                    test.confidence_interval(), metric_a, metric_b)
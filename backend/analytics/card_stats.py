@@ -0,0 +1,270 @@
+"""card_stats.py - Per-card statistics over many simulated games.
+
+For each card template (by its id in the ruleset's ``TemplateCatalog``)
+this counts how often it was dealt and bought, how often it was executed
+and the points that each execution was worth, and compares the win rate
+of the players that own it at the end of the game to the win rate of the
+players in the same games that don't. Everything is kept as running
+totals/``RunningStat``s so memory doesn't grow with the number of games,
+and the stats from different processes can be merged.
+
+Usage::
+
+    stats = simulate_card_stats(range(1000), n_workers=4)
+    print(format_report(stats, TemplateCatalog.for_ruleset(DefaultRuleset())))
+
+or ``python -m backend.analytics --games 0:1000``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Mapping, Sequence
+
+from .running_stat import RunningStat
+from ..bots import PolicyFrontend, RandomFrontend
+from ..core import (Game, Player, Card, Area, Location, PlaceableCardType,
+                    AnyResource, StateListener, DefaultRuleset, IRuleset)
+from ..core.catalog import TemplateCatalog
+from ..util import parse_range
+from ..workers import fork_pool, worker_args
+
+__all__ = ['TemplateStats', 'CardStats', 'CardStatsCollector',
+           'simulate_card_stats', 'format_report']
+
+
+@dataclass
+class TemplateStats:
+    dealt: int = 0
+    bought: int = 0
+    executions: int = 0
+    # Change in the executing player's score (fractional, so resources
+    #  count even if they don't make a whole point) per execution
+    points: RunningStat = field(default_factory=RunningStat)
+    # 1 for a win (split between the winners), 0 otherwise
+    win_owned: RunningStat = field(default_factory=RunningStat)
+    win_not_owned: RunningStat = field(default_factory=RunningStat)
+
+    @property
+    def buy_rate(self):
+        return self.bought / self.dealt if self.dealt else 0.0
+
+    @property
+    def win_rate_delta(self):
+        """How much more often the owners win than the other players"""
+        return self.win_owned.mean - self.win_not_owned.mean
+
+    @property
+    def win_rate_delta_stderr(self):
+        return (self.win_owned.stderr ** 2 + self.win_not_owned.stderr ** 2) ** 0.5
+
+    def merge(self, other: TemplateStats):
+        self.dealt += other.dealt
+        self.bought += other.bought
+        self.executions += other.executions
+        self.points.merge(other.points)
+        self.win_owned.merge(other.win_owned)
+        self.win_not_owned.merge(other.win_not_owned)
+
+    def to_json(self):
+        return {'dealt': self.dealt, 'bought': self.bought,
+                'executions': self.executions, 'points': self.points.to_json(),
+                'win_owned': self.win_owned.to_json(),
+                'win_not_owned': self.win_not_owned.to_json()}
+
+    @classmethod
+    def from_json(cls, j: Mapping):
+        return cls(j['dealt'], j['bought'], j['executions'],
+                   RunningStat.from_json(j['points']),
+                   RunningStat.from_json(j['win_owned']),
+                   RunningStat.from_json(j['win_not_owned']))
+
+
+class CardStats:
+    def __init__(self):
+        self.n_games = 0
+        self.templates: dict[int, TemplateStats] = {}
+
+    def __getitem__(self, template_id: int) -> TemplateStats:
+        if (stats := self.templates.get(template_id)) is None:
+            stats = self.templates[template_id] = TemplateStats()
+        return stats
+
+    def merge(self, other: CardStats):
+        self.n_games += other.n_games
+        for template_id, stats in other.templates.items():
+            self[template_id].merge(stats)
+
+    def to_json(self):
+        return {'n_games': self.n_games,
+                'templates': {str(k): v.to_json()
+                              for k, v in sorted(self.templates.items())}}
+
+    @classmethod
+    def from_json(cls, j: Mapping):
+        inst = cls()
+        inst.n_games = j['n_games']
+        inst.templates = {int(k): TemplateStats.from_json(v)
+                          for k, v in j['templates'].items()}
+        return inst
+
+
+class CardStatsCollector(StateListener):
+    """Adds the stats of games to ``stats``: call ``attach(game)`` before
+    the game starts and ``finish()`` once it has finished."""
+
+    def __init__(self, stats: CardStats = None):
+        self.stats = stats if stats is not None else CardStats()
+        self.game: Game | None = None
+        self._catalog: TemplateCatalog | None = None
+        # Per-game state (the cards stay in the game so their id()s are unique)
+        self._dealt: set[int] = set()  # id()s of the cards
+        self._from_hand: set[int] = set()  # Just taken out of a hand
+        self._game_templates: set[int] = set()  # Dealt this game
+        # [template id, player idx, points] for each card being executed
+        self._executing: list[list] = []
+
+    def attach(self, game: Game):
+        self.game = game
+        self._catalog = TemplateCatalog.for_ruleset(game.ruleset)
+        self._dealt = set()
+        self._from_hand = set()
+        self._game_templates = set()
+        self._executing = []
+        game.add_state_listener(self)
+        return self
+
+    def finish(self):
+        game = self.game
+        game.remove_state_listener(self)
+        self.stats.n_games += 1
+        winners = game.winners or []
+        for p in game.players:
+            outcome = 1 / len(winners) if p in winners else 0.0
+            owned = {self._catalog.id_of(c) for area, cards in p.areas.items()
+                     if PlaceableCardType.has_instance(area)
+                     for c in cards.values() if not c.is_starting_card}
+            for template_id in self._game_templates:
+                stats = self.stats[template_id]
+                if template_id in owned:
+                    stats.win_owned.add(outcome)
+                else:
+                    stats.win_not_owned.add(outcome)
+        self.game = None
+
+    # region StateListener
+    def on_card_put(self, game: Game, location: Location, card: Card):
+        area = location.area
+        if area == Area.HAND:
+            self._from_hand.discard(id(card))  # Only passed on
+            if id(card) not in self._dealt:
+                self._dealt.add(id(card))
+                template_id = self._catalog.id_of(card)
+                self.stats[template_id].dealt += 1
+                self._game_templates.add(template_id)
+        elif id(card) in self._from_hand:
+            self._from_hand.discard(id(card))
+            if PlaceableCardType.has_instance(area):
+                self.stats[self._catalog.id_of(card)].bought += 1
+
+    def on_card_removed(self, game: Game, location: Location, card: Card):
+        if location.area == Area.HAND:
+            self._from_hand.add(id(card))
+
+    def on_resource_changed(self, player: Player, resource: AnyResource,
+                            old: int, new: int):
+        if self._executing and self._executing[-1][1] == player.idx:
+            rpp = player.ruleset.resources_per_point(resource)
+            self._executing[-1][2] += (new - old) / rpp
+
+    def on_card_executing(self, game: Game, card: Card, player: Player):
+        template_id = self._catalog.id_of(card)
+        stats = self.stats[template_id]
+        stats.executions += 1
+        if card.location.area == Area.HAND:
+            stats.bought += 1  # An event (they are executed straight from the hand)
+        self._executing.append([template_id, player.idx, 0.0])
+
+    def on_card_executed(self, game: Game, card: Card, player: Player):
+        template_id, _, points = self._executing.pop()
+        self.stats[template_id].points.add(points)
+    # endregion
+
+
+def _play_games(games: range, seed: str,
+                frontend_factory: Callable[[str], PolicyFrontend],
+                ruleset_factory: Callable[[], IRuleset]) -> CardStats:
+    collector = CardStatsCollector()
+    ruleset = ruleset_factory()
+    for i in games:
+        game_seed = f'{seed}.{i}'
+        game = Game(4, frontend_factory(game_seed), ruleset, game_seed)
+        collector.attach(game)
+        game.run_game()
+        collector.finish()
+    return collector.stats
+
+
+def _worker_play(games: range):
+    return _play_games(games, *worker_args())
+
+
+def simulate_card_stats(games: range, seed: str = '0', n_workers: int = None,
+                        frontend_factory: Callable[[str], PolicyFrontend] = RandomFrontend,
+                        ruleset_factory: Callable[[], IRuleset] = DefaultRuleset
+                        ) -> CardStats:
+    """Play the games (game ``i`` is seeded by ``f'{seed}.{i}'``) split
+    between ``n_workers`` processes and merge their stats"""
+    n_workers = n_workers or os.cpu_count() or 1
+    args = (seed, frontend_factory, ruleset_factory)
+    if n_workers == 1:
+        return _play_games(games, *args)
+    chunk = -(-len(games) // n_workers)  # Round up
+    stats = CardStats()
+    with fork_pool(n_workers, *args) as pool:
+        for part in pool.map(_worker_play, [games[i:i + chunk]
+                                            for i in range(0, len(games), chunk)]):
+            stats.merge(part)
+    return stats
+
+
+def _describe(catalog: TemplateCatalog, template_id: int, width: int = 60):
+    t = catalog.templates[template_id]
+    desc = f'{t.card_type.name}: {t.effect!r}'
+    return desc if len(desc) <= width else desc[:width - 3] + '...'
+
+
+def format_report(stats: CardStats, catalog: TemplateCatalog) -> str:
+    """A table of the dealt cards, most over-powered first (by win rate delta)"""
+    lines = [f'{stats.n_games} games',
+             f'{"id":>4} {"dealt":>6} {"buy%":>6} {"execs":>7} {"pts/ex":>7} '
+             f'{"win delta":>15}  card']
+    rows = sorted([(k, v) for k, v in stats.templates.items() if v.dealt],
+                  key=lambda kv: kv[1].win_rate_delta, reverse=True)
+    for template_id, s in rows:
+        lines.append(
+            f'{template_id:>4} {s.dealt:>6} {s.buy_rate * 100:>5.1f}% {s.executions:>7} '
+            f'{s.points.mean:>7.2f} {s.win_rate_delta:>+7.3f} ±{s.win_rate_delta_stderr:.3f}'
+            f'  {_describe(catalog, template_id)}')
+    return '\n'.join(lines)
+
+
+def main(argv: Sequence[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m backend.analytics',
+        description='Simulate random games and report statistics for each card')
+    parser.add_argument('-g', '--games', type=parse_range, default=range(0, 200),
+                        help='Range of game indices, START:STOP (default: 0:200)')
+    parser.add_argument('-s', '--seed', default='0')
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('-o', '--output', type=Path, help='Also write the stats (JSON) here')
+    args = parser.parse_args(argv)
+    stats = simulate_card_stats(args.games, args.seed, args.workers)
+    if args.output is not None:
+        args.output.write_text(json.dumps(stats.to_json(), indent=2) + '\n')
+    print(format_report(stats, TemplateCatalog.for_ruleset(DefaultRuleset())))
+    return 0
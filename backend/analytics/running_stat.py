@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+__all__ = ['RunningStat']
+
+
+@dataclass
+class RunningStat:
+    """Mean and variance of a stream of values in constant memory (Welford's
+    algorithm). Stats of separate streams (e.g. from worker processes) can
+    be combined exactly using ``merge()`` (Chan et al.)."""
+    n: int = 0
+    mean: float = 0.0
+    m2: float = 0.0  # Sum of squared differences from the mean
+
+    @classmethod
+    def of(cls, values: Iterable[float]):
+        stat = cls()
+        for x in values:
+            stat.add(x)
+        return stat
+
+    def add(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other: RunningStat):
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def total(self):
+        return self.mean * self.n
+
+    @property
+    def variance(self):
+        """Sample variance (0 if there are less than 2 values)"""
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    @property
+    def stderr(self):
+        """Standard error of the mean"""
+        return math.sqrt(self.variance / self.n) if self.n else 0.0
+
+    def to_json(self):
+        return {'n': self.n, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_json(cls, j: Mapping[str, float]):
+        return cls(j['n'], j['mean'], j['m2'])
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import math
+from statistics import NormalDist
+from typing import Literal
+
+from .running_stat import RunningStat
+
+__all__ = ['PairedSPRT', 'SPRTDecisionT']
+
+SPRTDecisionT = Literal['positive', 'negative', 'null']
+
+
+class PairedSPRT:
+    """Wald's sequential probability ratio test on the mean of a stream of
+    (paired) differences: H0 (mean = 0) against H1 (mean = +``delta`` or
+    mean = -``delta``, each tested at ``alpha / 2``). The differences are
+    assumed to be normal with the variance estimated from the values so
+    far, so no decision is made before ``min_n`` values.
+
+    ``add()`` returns the decision once there is one: 'positive' or
+    'negative' (the mean is non-zero, with that sign) or 'null' (the mean
+    is closer to 0 than ``delta``)."""
+
+    def __init__(self, delta: float, alpha: float = 0.05, beta: float = 0.1,
+                 min_n: int = 30):
+        if delta <= 0:
+            raise ValueError("delta must be positive")
+        self.delta = delta
+        self.alpha = alpha
+        self.beta = beta
+        self.min_n = min_n
+        self.upper = math.log((1 - beta) / (alpha / 2))
+        self.lower = math.log(beta / (1 - alpha / 2))
+        self.stat = RunningStat()
+        self.decision: SPRTDecisionT | None = None
+
+    def add(self, x: float) -> SPRTDecisionT | None:
+        self.stat.add(x)
+        if self.decision is None and self.stat.n >= self.min_n:
+            pos, neg = self.llr(self.delta), self.llr(-self.delta)
+            if pos >= self.upper:
+                self.decision = 'positive'
+            elif neg >= self.upper:
+                self.decision = 'negative'
+            elif pos <= self.lower and neg <= self.lower:
+                self.decision = 'null'
+        return self.decision
+
+    def llr(self, mean: float) -> float:
+        """Log likelihood ratio of mean = ``mean`` to mean = 0"""
+        var = max(self.stat.variance, 1e-12)
+        return (mean * self.stat.total - self.stat.n * mean * mean / 2) / var
+
+    def confidence_interval(self, level: float = 0.95) -> tuple[float, float]:
+        z = NormalDist().inv_cdf((1 + level) / 2)
+        half = z * self.stat.stderr
+        return self.stat.mean - half, self.stat.mean + half
+
+    def fixed_n(self) -> int:
+        """The number of values a fixed-size test with the same error rates
+        would need (using the standard deviation estimated so far)"""
+        z = NormalDist().inv_cdf
+        n = ((z(1 - self.alpha / 2) + z(1 - self.beta)) * self.stat.std / self.delta) ** 2
+        return max(math.ceil(n), 1)
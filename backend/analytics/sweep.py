@@ -0,0 +1,214 @@
+"""sweep.py - Simulating many variants of the ruleset (parameter sweeps).
+
+Each configuration is a dict of ``ConfigurableRuleset`` arguments (e.g.
+``{'cards_per_player': 7, 'resources_per_point': {'YELLOW': 2}}``),
+made with ``grid()`` or ``random_search()``. The games of every
+configuration are split into batches that are played in worker processes
+and the stats are collected into one row per configuration.
+
+Finished rows can be cached in a directory: the file for a row is named
+by a hash of the configuration, the seed, the number of players and the
+frontend, and by the range of games, so only new cells are played when
+the sweep is run again. (Clear the cache if the rules themselves change.)
+
+Usage::
+
+    configs = grid(cards_per_player=[6, 7], swap_dirns=[(1, -1, 1), (1, 1, 1)])
+    print(format_table(run_sweep(configs, range(200), cache_dir='sweep-cache')))
+"""
+
+from __future__ import annotations
+
+import concurrent.futures as cf
+import hashlib
+import itertools
+import json
+import os
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Mapping, Sequence
+
+from .ab_test import mean_score, score_spread, first_player_wins
+from .running_stat import RunningStat
+from ..bots import PolicyFrontend, RandomFrontend
+from ..core import Game, ConfigurableRuleset
+from ..core.eenum import ExtendableEnum
+from ..workers import fork_pool, worker_args
+
+__all__ = ['CellStats', 'SweepCell', 'grid', 'random_search', 'config_hash',
+           'run_sweep', 'format_table']
+
+ConfigT = Mapping[str, Any]
+
+
+@dataclass
+class CellStats:
+    n_games: int = 0
+    score: RunningStat = field(default_factory=RunningStat)  # Mean of the players'
+    spread: RunningStat = field(default_factory=RunningStat)  # Best - worst
+    first_wins: RunningStat = field(default_factory=RunningStat)  # Of player 0
+
+    def add(self, game: Game):
+        self.n_games += 1
+        self.score.add(mean_score(game))
+        self.spread.add(score_spread(game))
+        self.first_wins.add(first_player_wins(game))
+
+    def merge(self, other: CellStats):
+        self.n_games += other.n_games
+        self.score.merge(other.score)
+        self.spread.merge(other.spread)
+        self.first_wins.merge(other.first_wins)
+
+    def to_json(self):
+        return {'n_games': self.n_games, 'score': self.score.to_json(),
+                'spread': self.spread.to_json(),
+                'first_wins': self.first_wins.to_json()}
+
+    @classmethod
+    def from_json(cls, j: Mapping):
+        return cls(j['n_games'], RunningStat.from_json(j['score']),
+                   RunningStat.from_json(j['spread']),
+                   RunningStat.from_json(j['first_wins']))
+
+
+@dataclass
+class SweepCell:
+    config: ConfigT
+    stats: CellStats
+    cached: bool = False
+
+
+def grid(**axes: Sequence) -> list[dict[str, Any]]:
+    """Every combination of the values for each argument"""
+    keys = list(axes)
+    return [dict(zip(keys, values)) for values in itertools.product(*axes.values())]
+
+
+def random_search(n: int, seed: int | str = 0, **axes: Sequence) -> list[dict[str, Any]]:
+    """``n`` different configurations with a random value for each argument"""
+    rng = random.Random(seed)
+    all_configs = grid(**axes)
+    return rng.sample(all_configs, min(n, len(all_configs)))
+
+
+def _canonical(value):
+    if isinstance(value, ExtendableEnum):
+        return value.name
+    if isinstance(value, Mapping):
+        return {_canonical(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def config_hash(config: ConfigT, **extra) -> str:
+    """A hash of the configuration (and anything else in ``extra``) that
+    doesn't depend on the order of the keys or on enums vs their names"""
+    data = json.dumps(_canonical({**extra, 'config': config}), sort_keys=True,
+                      separators=(',', ':'))
+    return hashlib.sha256(data.encode()).hexdigest()[:20]
+
+
+def _play_batch(config: ConfigT, games: range, seed: str,
+                frontend_factory: Callable[[str], PolicyFrontend],
+                n_players: int) -> CellStats:
+    ruleset = ConfigurableRuleset(**config)
+    stats = CellStats()
+    for i in games:
+        game_seed = f'{seed}.{i}'
+        game = Game(n_players, frontend_factory(game_seed), ruleset, game_seed)
+        game.run_game()
+        stats.add(game)
+    return stats
+
+
+def _worker_play(config_idx: int, games: range):
+    # The configs are given to the workers when they're forked so only the
+    #  index is sent with each batch
+    configs, *args = worker_args()
+    return _play_batch(configs[config_idx], games, *args)
+
+
+def run_sweep(configs: Sequence[ConfigT], games: range, seed: str = '0',
+              n_workers: int = None, cache_dir: str | Path = None,
+              batch_size: int = 50,
+              frontend_factory: Callable[[str], PolicyFrontend] = RandomFrontend,
+              n_players: int = 4) -> list[SweepCell]:
+    """Play ``games`` (game ``i`` seeded by ``f'{seed}.{i}'``) with each of
+    the configurations, in batches of ``batch_size`` split between
+    ``n_workers`` processes. The cells are in the same order as ``configs``."""
+    for config in configs:  # Check them before starting anything
+        if ConfigurableRuleset(**config).max_players() < n_players:
+            raise ValueError(f"Not enough cards for {n_players} players with {config}")
+    if cache_dir is not None:
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+    frontend_name = f'{frontend_factory.__module__}.{frontend_factory.__qualname__}'
+
+    def cache_path(config: ConfigT):
+        key = config_hash(config, seed=seed, n_players=n_players, frontend=frontend_name)
+        return cache_dir / f'{key}-{games.start}-{games.stop}.json'
+
+    cells: list[SweepCell | None] = [None] * len(configs)
+    for i, config in enumerate(configs):
+        if cache_dir is not None and (path := cache_path(config)).exists():
+            cells[i] = SweepCell(config, CellStats.from_json(json.loads(path.read_text())), True)
+    batches = [games[i:i + batch_size] for i in range(0, len(games), batch_size)]
+    tasks = [(i, b) for i, cell in enumerate(cells) if cell is None for b in batches]
+    # Merged in order of the batches so the result doesn't depend on timing
+    parts: dict[int, list[CellStats | None]] = {
+        i: [None] * len(batches) for i, cell in enumerate(cells) if cell is None}
+
+    def add_part(config_idx: int, batch: range, stats: CellStats):
+        config_parts = parts[config_idx]
+        config_parts[(batch.start - games.start) // batch_size] = stats
+        if all(p is not None for p in config_parts):
+            total = CellStats()
+            for p in config_parts:
+                total.merge(p)
+            cells[config_idx] = SweepCell(configs[config_idx], total)
+            if cache_dir is not None:
+                path = cache_path(configs[config_idx])
+                tmp_path = path.with_name(path.name + '.tmp')
+                tmp_path.write_text(json.dumps(total.to_json()) + '\n')
+                os.replace(tmp_path, path)
+
+    n_workers = n_workers or os.cpu_count() or 1
+    args = (seed, frontend_factory, n_players)
+    if n_workers == 1:
+        for config_idx, batch in tasks:
+            add_part(config_idx, batch, _play_batch(configs[config_idx], batch, *args))
+    elif tasks:
+        with fork_pool(n_workers, list(configs), *args) as pool:
+            futures = {pool.submit(_worker_play, *task): task for task in tasks}
+            for fut in cf.as_completed(futures):
+                add_part(*futures[fut], fut.result())
+    return cells
+
+
+def _format_value(value) -> str:
+    value = _canonical(value)
+    if isinstance(value, dict) and value:
+        return ','.join(f'{k}:{v}' for k, v in value.items())
+    if isinstance(value, list) and value:
+        return ','.join(map(str, value))
+    return str(value)
+
+
+def format_table(cells: Sequence[SweepCell]) -> str:
+    """One row per configuration: the arguments that were given, then the
+    stats (``*`` marks the rows from the cache)"""
+    keys = list(dict.fromkeys(k for c in cells for k in c.config))
+    rows = [[*keys, 'games', 'score', 'spread', 'p0 win']]
+    for c in cells:
+        s = c.stats
+        rows.append([*(_format_value(c.config[k]) if k in c.config else '-' for k in keys),
+                     f'{s.n_games}{"*" if c.cached else ""}',
+                     f'{s.score.mean:.2f}±{s.score.stderr:.2f}',
+                     f'{s.spread.mean:.2f}±{s.spread.stderr:.2f}',
+                     f'{s.first_wins.mean:.3f}±{s.first_wins.stderr:.3f}'])
+    widths = [max(len(r[i]) for r in rows) for i in range(len(rows[0]))]
+    return '\n'.join('  '.join(v.ljust(w) for v, w in zip(r, widths)).rstrip()
+                     for r in rows)
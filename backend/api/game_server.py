@@ -0,0 +1,383 @@
+"""game_server.py - Multi-process server hosting many games at once.
+
+A single process can only use one core for the game logic, so the
+``GameServer`` (the supervisor) forks ``n_workers`` worker processes. It
+accepts every connection itself, peeks at the HTTP request to find the game
+id (from the path, ``/game/<game_id>``) and hands the socket over to
+``route(game_id, n_workers)``'s worker. As the routing only depends on the
+id, reconnecting to a game always ends up in the process running it.
+
+Each worker hosts many games, each one running in its own thread with a
+``JsonAdapter`` using a ``ReconnectableConn``. The protocol is the same as
+with ``WebsocketConn`` except that the client may reconnect at any time: it
+is then sent the latest ``init`` message and the latest message containing
+the state (which is the pending request, if there is one).
+
+On shutdown (``GameServer.drain()``, or SIGTERM/SIGINT in ``main``), no new
+games are started but the existing ones (including reconnects to them) keep
+going until they finish or ``drain_timeout`` runs out.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+import zlib
+from http import HTTPStatus
+from typing import Callable, Sequence
+
+from websockets import ConnectionClosed
+from websockets.sync.server import serve, ServerConnection, Server
+
+from .json_adapter import JsonAdapter
+from .json_connection import JsonConnection
+from ..core import Game, DefaultRuleset
+from ..util import JsonT
+
+__all__ = ['GameServer', 'ReconnectableConn', 'GameAbandoned', 'route',
+           'default_game_factory', 'GAME_PATH_PREFIX', 'main']
+
+
+GAME_PATH_PREFIX = '/game/'
+
+GameFactoryT = Callable[['ReconnectableConn', str], Game]
+
+# Control messages from the supervisor to the workers
+_MSG_CONNECTION = b'C'  # Followed by the JSON of the address, has 1 fd
+_MSG_DRAIN = b'D'
+
+
+class GameAbandoned(Exception):
+    """The client didn't reconnect in time (or the server is shutting down)"""
+
+
+def route(game_id: str, n_workers: int) -> int:
+    """Which worker hosts ``game_id``. Must be the same in every process
+    so can't use ``hash()``."""
+    return zlib.crc32(game_id.encode()) % n_workers
+
+
+def default_game_factory(conn: ReconnectableConn, game_id: str) -> Game:
+    return Game(4, JsonAdapter(conn), DefaultRuleset())
+
+
+def game_id_from_path(path: str) -> str | None:
+    if not path.startswith(GAME_PATH_PREFIX):
+        return None
+    game_id = path.removeprefix(GAME_PATH_PREFIX).split('?', 1)[0]
+    return game_id or None
+
+
+class ReconnectableConn(JsonConnection):
+    """A connection to the client of one game, which may be replaced by a new
+    websocket at any point (see ``attach``)"""
+
+    def __init__(self, game_id: str, reconnect_timeout: float = 300.0):
+        self.game_id = game_id
+        self.reconnect_timeout = reconnect_timeout
+        self._lock = threading.Lock()
+        self._ws: ServerConnection | None = None
+        self._disconnected_at = time.monotonic()
+        self._incoming = queue.Queue[str]()
+        # Sent to clients when they (re)connect so they can carry on
+        self._replay: dict[str, str] = {}
+        self.abandoned = False
+        self.closed = False
+
+    def send(self, obj: JsonT):
+        # Same format as WebsocketConn
+        data = json.dumps(obj, separators=(',', ':'), sort_keys=True)
+        with self._lock:
+            if obj.get('request') == 'init':
+                self._replay = {'init': data}
+            if 'state' in obj:
+                self._replay['state'] = data
+            if self._ws is not None:
+                try:
+                    self._ws.send(data)
+                except ConnectionClosed:
+                    self._set_disconnected()  # Will get it on reconnect
+
+    def receive(self) -> JsonT:
+        while True:
+            try:
+                return json.loads(self._incoming.get(timeout=0.05))
+            except queue.Empty:
+                pass
+            with self._lock:
+                if self.abandoned or (self._ws is None and time.monotonic()
+                                      - self._disconnected_at > self.reconnect_timeout):
+                    self.abandoned = True
+                    raise GameAbandoned(f"Game {self.game_id!r} was abandoned")
+
+    def close(self):
+        with self._lock:
+            self.closed = True
+            ws, self._ws = self._ws, None
+        if ws is not None:
+            ws.close()
+
+    def abandon(self):
+        """Make the game thread stop (at the next ``receive``)"""
+        with self._lock:
+            self.abandoned = True
+
+    def attach(self, ws: ServerConnection):
+        """Use ``ws`` for this game from now on and pass the messages from it
+        to the game. Blocks until ``ws`` is closed/replaced."""
+        with self._lock:
+            if self.closed:
+                ws.close()
+                return
+            old, self._ws = self._ws, ws
+            try:
+                for data in self._replay.values():
+                    ws.send(data)
+            except ConnectionClosed:
+                self._set_disconnected()
+        if old is not None:
+            old.close(reason='Replaced by a new connection')
+        try:
+            for msg in ws:
+                self._incoming.put(msg if isinstance(msg, str) else msg.decode())
+        except ConnectionClosed:
+            pass
+        finally:
+            with self._lock:
+                if self._ws is ws:
+                    self._set_disconnected()
+
+    def _set_disconnected(self):
+        self._ws = None
+        self._disconnected_at = time.monotonic()
+
+
+class _Worker:
+    """Runs in each worker process, hosting the games routed to it"""
+
+    def __init__(self, control: socket.socket, game_factory: GameFactoryT,
+                 reconnect_timeout: float):
+        self.control = control
+        self.game_factory = game_factory
+        self.reconnect_timeout = reconnect_timeout
+        self.games: dict[str, ReconnectableConn] = {}
+        self.games_lock = threading.Lock()
+        self.draining = False
+        self.server: Server | None = None
+
+    def run(self):
+        # The listening socket is never used: connections are handed to
+        #  server.handler (which does the handshake and calls _handler)
+        with serve(self._handler, sock=socket.socket(),
+                   process_request=self._process_request) as self.server:
+            self.control.settimeout(0.05)
+            while not (self.draining and self._n_games() == 0):
+                try:
+                    msg, fds, _, _ = socket.recv_fds(self.control, 1024, 1)
+                except TimeoutError:
+                    continue
+                if not msg:
+                    break  # Supervisor died
+                if msg == _MSG_DRAIN:
+                    self.draining = True
+                elif msg.startswith(_MSG_CONNECTION) and fds:
+                    sock = socket.socket(fileno=fds[0])
+                    sock.settimeout(None)
+                    addr = tuple(json.loads(msg[len(_MSG_CONNECTION):]))
+                    threading.Thread(target=self.server.handler, args=(sock, addr),
+                                     name='Arcanar Worker: Connection', daemon=True).start()
+                else:
+                    for fd in fds:
+                        os.close(fd)
+        with self.games_lock:
+            for conn in self.games.values():
+                conn.abandon()
+
+    def _n_games(self):
+        with self.games_lock:
+            return len(self.games)
+
+    # noinspection PyMethodMayBeStatic
+    def _process_request(self, ws: ServerConnection, request):
+        if game_id_from_path(request.path) is None:
+            return ws.respond(HTTPStatus.NOT_FOUND, 'Expected /game/<game_id>\n')
+        return None
+
+    def _handler(self, ws: ServerConnection):
+        game_id = game_id_from_path(ws.request.path)
+        with self.games_lock:
+            if (conn := self.games.get(game_id)) is None:
+                if self.draining:
+                    ws.close(1013, 'Server is shutting down')  # 1013 = Try Again Later
+                    return
+                conn = self.games[game_id] = ReconnectableConn(
+                    game_id, self.reconnect_timeout)
+                threading.Thread(target=self._run_game, args=(conn,), daemon=True,
+                                 name=f'Arcanar Worker: Game {game_id}').start()
+        conn.attach(ws)
+
+    def _run_game(self, conn: ReconnectableConn):
+        try:
+            self.game_factory(conn, conn.game_id).run_game()
+        except GameAbandoned:
+            pass
+        except Exception:
+            traceback.print_exc()
+        finally:
+            conn.close()
+            with self.games_lock:
+                del self.games[conn.game_id]
+
+
+def _worker_main(control: socket.socket, inherited: list[socket.socket],
+                 game_factory: GameFactoryT, reconnect_timeout: float):
+    for sock in inherited:
+        sock.close()  # Other workers' control sockets (so they can see EOF)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Supervisor decides when to stop
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    _Worker(control, game_factory, reconnect_timeout).run()
+
+
+class GameServer:
+    def __init__(self, port: int = 3141, n_workers: int = None,
+                 host: str = 'localhost', game_factory: GameFactoryT = default_game_factory,
+                 reconnect_timeout: float = 300.0, drain_timeout: float | None = None):
+        """``game_factory(conn, game_id)`` creates the game for a new id.
+        It must be available in the worker processes (they are forked, so
+        anything defined before ``start()`` is fine)."""
+        self.port = port
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.host = host
+        self.game_factory = game_factory
+        self.reconnect_timeout = reconnect_timeout
+        self.drain_timeout = drain_timeout
+        self.workers: list[multiprocessing.Process] = []
+        self._controls: list[socket.socket] = []
+        self._control_locks: list[threading.Lock] = []
+        self._listener: socket.socket | None = None
+        self._drain_requested = threading.Event()
+        self._drain_deadline: float | None = None
+
+    def start(self):
+        # Workers are forked before any threads are started (and before the
+        #  listening socket exists, so only the supervisor has it)
+        ctx = multiprocessing.get_context('fork')
+        for _ in range(self.n_workers):
+            # SEQPACKET so each control message is received separately
+            parent_end, child_end = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            proc = ctx.Process(target=_worker_main, daemon=True,
+                               name='Arcanar Game Worker',
+                               args=(child_end, [*self._controls, parent_end],
+                                     self.game_factory, self.reconnect_timeout))
+            proc.start()
+            child_end.close()
+            self.workers.append(proc)
+            self._controls.append(parent_end)
+            self._control_locks.append(threading.Lock())
+        self._listener = socket.create_server((self.host, self.port))
+        self.port = self._listener.getsockname()[1]  # In case port was 0
+        self._listener.settimeout(0.05)
+
+    def serve_forever(self):
+        """Accept connections until draining has finished"""
+        if self._listener is None:
+            self.start()
+        try:
+            while any(w.is_alive() for w in self.workers):
+                if self._drain_requested.is_set() and self._drain_deadline is None:
+                    self._start_drain()
+                if self._drain_deadline is not None and time.monotonic() > self._drain_deadline:
+                    break
+                try:
+                    sock, addr = self._listener.accept()
+                except TimeoutError:
+                    continue
+                threading.Thread(target=self._route_connection, args=(sock, addr),
+                                 name='Arcanar Supervisor: Route', daemon=True).start()
+        finally:
+            self._stop()
+
+    def drain(self):
+        """Stop starting new games and exit ``serve_forever`` once the existing
+        ones have finished. Safe to call from a signal handler/other thread."""
+        self._drain_requested.set()
+
+    def _start_drain(self):
+        self._drain_deadline = (float('inf') if self.drain_timeout is None
+                                else time.monotonic() + self.drain_timeout)
+        for i in range(len(self.workers)):
+            self._send_control(i, _MSG_DRAIN)
+
+    def _stop(self):
+        self._listener.close()
+        for ctrl in self._controls:
+            ctrl.close()  # Also tells the workers to stop
+        for w in self.workers:
+            w.join(timeout=1.0)
+            if w.is_alive():
+                w.terminate()
+                w.join()
+
+    def _route_connection(self, sock: socket.socket, addr: Sequence[object]):
+        try:
+            path = self._peek_path(sock)
+            game_id = (game_id_from_path(path) if path is not None else None) or ''
+            sock.setblocking(True)
+            self._send_control(route(game_id, self.n_workers),
+                               _MSG_CONNECTION + json.dumps(list(addr)).encode(), sock)
+        except OSError:
+            pass
+        finally:
+            sock.close()  # The worker has its own copy now
+
+    # noinspection PyMethodMayBeStatic
+    def _peek_path(self, sock: socket.socket, timeout: float = 5.0) -> str | None:
+        """Find the path in the HTTP request without consuming it (so that
+        the worker can still do the whole handshake)"""
+        deadline = time.monotonic() + timeout
+        sock.settimeout(timeout)
+        data = b''
+        while b'\r\n' not in data and len(data) < 8192:
+            new_data = sock.recv(8192, socket.MSG_PEEK)
+            if not new_data:
+                return None  # Closed
+            if len(new_data) == len(data):
+                if time.monotonic() > deadline:
+                    return None
+                time.sleep(0.001)  # Peeking doesn't wait for new data
+            data = new_data
+        request_line = data.split(b'\r\n', 1)[0].decode('latin-1').split(' ')
+        return request_line[1] if len(request_line) == 3 else None
+
+    def _send_control(self, worker_idx: int, msg: bytes, sock: socket.socket = None):
+        with self._control_locks[worker_idx]:
+            socket.send_fds(self._controls[worker_idx], [msg],
+                            [sock.fileno()] if sock is not None else [])
+
+
+def main(argv: Sequence[str] = None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Run the multi-process game server')
+    parser.add_argument('-p', '--port', type=int, default=3141)
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--drain-timeout', type=float, default=None,
+                        help='Max seconds to wait for games to finish on shutdown')
+    args = parser.parse_args(argv)
+    server = GameServer(args.port, args.workers, args.host,
+                        drain_timeout=args.drain_timeout)
+    server.start()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: server.drain())
+    print(f'Serving on ws://{args.host}:{server.port}{GAME_PATH_PREFIX}<game_id> '
+          f'with {server.n_workers} workers', file=sys.stderr)
+    server.serve_forever()
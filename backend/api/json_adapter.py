@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-from collections import Counter
+import time
+from collections import Counter, deque
 from typing import Literal, Collection, TypeVar
 
 from .json_connection import JsonConnection
 from .json_deserialise import JsonDeserialiser
 from .json_serialise import JsonSerialiser
+from .latency import LatencyRecorder
 from ..core import (Game, Player, IFrontend, Card, Location, Area,
                     CardCost, AnyResource, EffectExecInfo, Color,
                     CardTypeFilter, ResourceFilter, PlaceableCardType,
                     AdjacenciesMappingT)
+from ..core.legal_moves import LegalMoves
 from ..util import JsonT
 
 __all__ = ['JsonAdapter']
@@ -17,16 +20,36 @@ __all__ = ['JsonAdapter']
 
 T = TypeVar('T')
 
+_NOT_FORCED = object()
+
 
 # TODO: need to make JsonAdapter more robust so it informs server on error.
 class JsonAdapter(IFrontend):
     game: Game
 
-    def __init__(self, conn: JsonConnection):
+    # Requests whose answers are resource counters
+    _RESOURCE_ANSWERS = ('card_payment', 'spend_resources')
+
+    def __init__(self, conn: JsonConnection, latency: LatencyRecorder = None,
+                 auto_resolve: bool = False):
+        """If ``auto_resolve`` is True, decisions with only one legal answer
+        aren't sent to the client. Instead, they are listed in the
+        ``auto_resolved`` key of the next message sent (see API.md)."""
         self.conn = conn
+        self.auto_resolve = auto_resolve
+        self.legal_moves = LegalMoves()
+        self._auto_resolved: list[dict[str, JsonT]] = []
+        self._plan: deque[JsonT] = deque()
+        self._plan_player: int | None = None
+        self._plan_used = 0  # Since the last message sent
+        self._plan_discarded = False
         self.serialiser = JsonSerialiser()
-        self.deserialiser = JsonDeserialiser()
+        # Only answers are deserialised, so there is nothing worth sharing
+        self.deserialiser = JsonDeserialiser(intern=False)
         self._next_thread_id = 1
+        self.latency = latency if latency is not None else LatencyRecorder.from_env()
+        self.conn.latency = self.latency
+        self._curr_request_type: str | None = None
 
     def register_game(self, game: Game):
         self.game = game
@@ -48,12 +71,14 @@ class JsonAdapter(IFrontend):
         # Don't send state for shutdown (no state changes after result)
         self.send({'request': 'shutdown'}, thread=False, state=False)
         self.conn.close()
+        self.latency.dump()
 
     # region main (non-init/non-end) API
     def get_action_type(self, player: Player) -> Literal['buy', 'execute']:
         # TODO: somehow handle multiple people/clients! - LATER,
         #  for now, pass-n-play only
-        resp = self.request({'request': 'action_type', 'player': player.idx})
+        resp = self.request({'request': 'action_type', 'player': player.idx},
+                            options=self.legal_options('get_action_type', player))
         # TODO: perhaps repeat if invalid/resend it ?
         ac_type = resp['action_type']
         assert ac_type in ('buy', 'execute')
@@ -62,35 +87,41 @@ class JsonAdapter(IFrontend):
     def get_discard(self, player: Player) -> Card:
         # TODO: allow cancellation back to choosing action_type from here
         #  /when choosing how to pay.
-        resp = self.request({'request': 'discard_for_exec', 'player': player.idx})
+        resp = self.request({'request': 'discard_for_exec', 'player': player.idx},
+                            options=self.legal_options('get_discard', player))
         # TODO: somehow detect logic error vs invalid response
         card = self.deser_card_ref(resp['discard_for_exec'])
         assert card in player.cards_of_type(Area.HAND)
         return card
 
     def get_card_buy(self, player: Player) -> Card:
-        resp = self.request({'request': 'buy_card', 'player': player.idx})
+        resp = self.request({'request': 'buy_card', 'player': player.idx},
+                            options=self.legal_options('get_card_buy', player))
         card = self.deser_card_ref(resp['buy_card'])
         assert card in player.cards_of_type(Area.HAND)
         return card
 
     def get_card_payment(self, player: Player, cost: CardCost) -> Counter[AnyResource]:
         resp = self.request({'request': 'card_payment', 'player': player.idx,
-                             'cost': self.ser(cost)})
+                             'cost': self.ser(cost)},
+                            options=self.legal_options('get_card_payment', player, cost))
         return self.deser(resp['card_payment'], Counter[AnyResource])
 
     def choose_color_exec(self, info: EffectExecInfo, n_times: int) -> Color:
-        resp = self.request({'request': 'color_exec', 'n_times': n_times}, info=info)
+        resp = self.request({'request': 'color_exec', 'n_times': n_times}, info=info,
+                            options=self.legal_options('choose_color_exec', info, n_times))
         return self.deser(resp['color_exec'], Color)
 
     def choose_excl_color(self, info: EffectExecInfo,
                           top_colors: Collection[Color]) -> Color:
         resp = self.request({'request': 'color_excl',
-                             'of_colors': self.ser(top_colors)}, info=info)
+                             'of_colors': self.ser(top_colors)}, info=info,
+                            options=self.legal_options('choose_excl_color', info, top_colors))
         return self.deser(resp['color_excl'], Color)
 
     def get_foreach_color(self, info: EffectExecInfo) -> Color:
-        resp = self.request({'request': 'color_foreach'}, info=info)
+        resp = self.request({'request': 'color_foreach'}, info=info,
+                            options=self.legal_options('get_foreach_color', info))
         return self.deser(resp['color_foreach'], Color)
 
     def choose_from_discard(self, info: EffectExecInfo, target: Player,
@@ -99,7 +130,9 @@ class JsonAdapter(IFrontend):
             'request': 'card_from_discard',
             'target_player': target.idx,
             'filters': self.ser(filters),  # Will get cards themselves in state
-        }, info=info)
+        }, info=info, options=self.legal_options(
+            # Can't answer with None so never resolve to it
+            'choose_from_discard', info, target, filters, allow_none=False))
         card = self.deser_card_ref(resp['card_from_discard'])
         assert card in target.cards_of_type(Area.DISCARD)
         assert card.card_type in filters.allowed_types
@@ -108,7 +141,8 @@ class JsonAdapter(IFrontend):
     def choose_card_exec(self, info: EffectExecInfo, n_times: int,
                          discard: bool = False) -> Card:
         resp = self.request({'request': 'card_exec', 'n_times': n_times,
-                             'discard': discard}, info=info)
+                             'discard': discard}, info=info, options=self.legal_options(
+                                'choose_card_exec', info, n_times, discard))
         card = self.deser_card_ref(resp['card_exec'])
         assert Color.has_instance(card.location.area)
         assert card.location.player == info.player.idx
@@ -117,7 +151,8 @@ class JsonAdapter(IFrontend):
     def get_spend(self, info: EffectExecInfo, filters: ResourceFilter,
                   amount: int) -> None | Counter[AnyResource]:
         resp = self.request({'request': 'spend_resources', 'amount': amount,
-                             'filters': self.ser(filters)}, info=info)
+                             'filters': self.ser(filters)}, info=info,
+                            options=self.legal_options('get_spend', info, filters, amount))
         if (result_ser := resp['spend_resources']) is None:
             return None
         # TODO: could have more checking here - it happens in the Game backend,
@@ -127,7 +162,8 @@ class JsonAdapter(IFrontend):
     def choose_card_move(self, info: EffectExecInfo,
                          adjacencies: AdjacenciesMappingT) -> Card | None:
         resp = self.request({'request': 'card_move',
-                             'paths': self.ser(adjacencies)}, info=info)
+                             'paths': self.ser(adjacencies)}, info=info,
+                            options=self.legal_options('choose_card_move', info, adjacencies))
         if (card_ser := resp['card_move']) is None:
             return None
         card = self.deser_card_ref(card_ser)
@@ -141,7 +177,9 @@ class JsonAdapter(IFrontend):
         resp = self.request({
             'request': 'where_move_card',
             'card': self.ser(card_to_move.location),
-            'possibilities': self.ser(possibilities)}, info=info)
+            'possibilities': self.ser(possibilities)}, info=info,
+            options=self.legal_options('choose_move_where', info, card_to_move,
+                                       possibilities))
         if (dest_ser := resp['where_move_card']) is None:
             return None
         dest = self.deser(dest_ser, PlaceableCardType)
@@ -149,7 +187,98 @@ class JsonAdapter(IFrontend):
         return dest
     # endregion
 
+    # region auto-resolution and plans
+    def legal_options(self, kind: str, *args, allow_none=True) -> list | None:
+        """The legal answers to the ``IFrontend`` method ``kind``. Returns
+        None if they aren't needed (no auto-resolution and no plan)."""
+        if not self.auto_resolve and not self._plan:
+            return None
+        options = self.legal_moves.options(kind, *args)
+        if not allow_none:
+            options = [o for o in options if o is not None]
+        return options
+
+    def _try_auto_resolve(self, req: dict[str, JsonT], info: EffectExecInfo | None,
+                          options: list | None):
+        """Returns the JSON for the answer if there is only one option.
+        Declining (a ``None`` answer) counts as an option where it is
+        allowed, so optional decisions are only resolved if declining is
+        all that is possible."""
+        if not self.auto_resolve or options is None:
+            return _NOT_FORCED
+        if len(options) != 1:
+            return _NOT_FORCED
+        answer = self.ser_answer(options[0])
+        notif = req | {'answer': answer}
+        if info is not None:
+            notif |= {'exec_info': self.ser_effect_info_ref(info)}
+        self._auto_resolved.append(notif)  # Sent with the next message
+        return answer
+
+    def set_plan(self, plan: list[JsonT], player: int | None):
+        """Use the answers in ``plan`` (in order) instead of asking ``player``,
+        for as long as they are legal (see API.md)"""
+        if self._plan:
+            self._plan_discarded = True  # Replaced by the new one
+        self._plan = deque(plan)
+        self._plan_player = player
+
+    def discard_plan(self):
+        if self._plan:
+            self._plan_discarded = True
+        self._plan.clear()
+
+    def _try_plan(self, req: dict[str, JsonT], player: int | None,
+                  options: list | None, forced_answer: JsonT = _NOT_FORCED):
+        """Returns the JSON for the answer if the plan has a legal answer
+        for this request. If the answer was already forced, a matching
+        plan entry is consumed (the client may not know it was forced)."""
+        if not self._plan:
+            return _NOT_FORCED
+        entry = self._plan[0]
+        if (not isinstance(entry, dict) or entry.get('request') != req['request']
+                or player != self._plan_player or 'answer' not in entry):
+            if forced_answer is _NOT_FORCED:
+                self.discard_plan()  # Plan diverged
+            return _NOT_FORCED
+        answer = entry['answer']
+        valid = options is not None and any(
+            self._answers_equal(req['request'], self.ser_answer(o), answer)
+            for o in options)
+        if forced_answer is not _NOT_FORCED:
+            valid = self._answers_equal(req['request'], forced_answer, answer)
+        if not valid:
+            self.discard_plan()
+            return _NOT_FORCED
+        self._plan.popleft()
+        self._plan_used += 1
+        return answer
+
+    @classmethod
+    def _answers_equal(cls, request: str, a: JsonT, b: JsonT):
+        if request in cls._RESOURCE_ANSWERS and isinstance(a, dict) and isinstance(b, dict):
+            # Allow the client to include resources it isn't spending
+            return ({k: v for k, v in a.items() if v != 0}
+                    == {k: v for k, v in b.items() if v != 0})
+        return a == b
+
+    def _plan_status(self) -> dict[str, JsonT] | None:
+        if self._plan_used == 0 and not self._plan_discarded:
+            return None
+        status = {'used': self._plan_used, 'remaining': len(self._plan),
+                  'discarded': self._plan_discarded}
+        self._plan_used = 0
+        self._plan_discarded = False
+        return status
+    # endregion
+
     # region Custom serialisers
+    def ser_answer(self, o: object) -> JsonT:
+        """Serialise ``o`` in the same way the client would send it"""
+        if isinstance(o, Card):
+            return self.ser(o.location)  # Cards are sent by reference
+        return self.ser(o)
+
     def deser_card_ref(self, ref_json: JsonT) -> Card:
         return self.deser(ref_json, Location).get(self.game)
 
@@ -168,7 +297,8 @@ class JsonAdapter(IFrontend):
         return self.serialiser.ser(o)
 
     def deser(self, j: JsonT, expect_tp: type[T]) -> T:
-        return self.deserialiser.deser(j, expect_tp)
+        with self.latency.timer(self._curr_request_type, 'deserialise'):
+            return self.deserialiser.deser(j, expect_tp)
     # endregion
 
     # region send/receive/request (incl thread logic)
@@ -177,29 +307,55 @@ class JsonAdapter(IFrontend):
         """If thread is True, it returns an opaque 'thread id' that can be
         used to query replies to this message."""
         extra = {}
-        if info is not None:
-            extra |= {'exec_info': self.ser_effect_info_ref(info)}
-        if state:
-            extra |= {'state': self.serialise_state()}
+        with self.latency.timer(obj.get('request'), 'serialise'):
+            if info is not None:
+                extra |= {'exec_info': self.ser_effect_info_ref(info)}
+            if state:
+                extra |= {'state': self.serialise_state()}
         if (tid := self.alloc_thread() if thread else None) is not None:
             extra |= {'thread': tid}
+        if self._auto_resolved:
+            extra |= {'auto_resolved': self._auto_resolved}
+            self._auto_resolved = []
+        if (plan_status := self._plan_status()) is not None:
+            extra |= {'plan': plan_status}
         self.conn.send(obj | extra)
         return tid
 
-    def request(self, req: dict[str, JsonT], state=True, info: EffectExecInfo = None):
+    def request(self, req: dict[str, JsonT], state=True, info: EffectExecInfo = None,
+                options: list = None):
+        """``options`` are the legal answers (if needed, see
+        ``legal_options``). They are used to answer the request without
+        asking the client if only one is possible or if the client's plan
+        has a legal answer for it."""
+        player = req.get('player', info.player.idx if info is not None else None)
+        # Remembered so the deserialisation afterwards can be attributed to
+        #  it (also for forced/planned answers, which are deserialised too)
+        self._curr_request_type = req.get('request')
+        forced = self._try_auto_resolve(req, info, options)
+        planned = self._try_plan(req, player, options, forced)
+        if (answer := forced if forced is not _NOT_FORCED else planned) is not _NOT_FORCED:
+            return {req['request']: answer}
+        start = time.perf_counter_ns()
         th = self.send(req, state=state, info=info)
-        return self.receive(th)
+        resp = self.receive(th, player)
+        self.latency.record(self._curr_request_type, 'round_trip',
+                            time.perf_counter_ns() - start)
+        return resp
 
-    def receive(self, th: int | None):  # No default so tid isn't accidentally forgotten
+    # No default so tid isn't accidentally forgotten
+    def receive(self, th: int | None, player: int | None = None):
         if th is None:
             return self.conn.receive()
         received_th: int = -1  # Can't have this tid, start loop
         resp = None
         while received_th != th:
             # Discard everything else (those referred to older threads,
-            #  can't refer to threads not created yet)
+            #  can't refer to threads not created yet) apart from plans
             resp = self.conn.receive()
             received_th = resp.pop('thread', -1)
+            if (plan := resp.pop('plan', None)) is not None:
+                self.set_plan(plan, resp.get('player', player))
         return resp
 
     def alloc_thread(self):
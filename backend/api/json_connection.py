@@ -1,11 +1,18 @@
 from __future__ import annotations
 
 import abc
+from typing import TYPE_CHECKING
 
 from ..util import JsonT
 
+if TYPE_CHECKING:
+    from .latency import LatencyRecorder
+
 
 class JsonConnection(abc.ABC):
+    # Set by JsonAdapter so that connections can record their own timings
+    latency: LatencyRecorder | None = None
+
     def init(self):
         ...
 
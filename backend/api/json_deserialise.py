@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import sys
+import types
 import typing
 from collections import Counter
+from collections.abc import Collection, Mapping, Set as AbstractSet
 from dataclasses import is_dataclass, fields as d_fields
-from typing import Callable, Any, cast, Mapping, TYPE_CHECKING, TypeVar
+from typing import Callable, Any, cast, TYPE_CHECKING, TypeVar
 
 from .. import core as core_mod
 # noinspection PyProtectedMember
@@ -13,6 +15,7 @@ from ..util import JsonT, FrozenDict
 
 if TYPE_CHECKING:
     from _typeshed import DataclassInstance
+    from ..core import Game, IFrontend, IRuleset
 
 __all__ = ['JsonDeserialiser', 'JsonDeserFuncT']
 
@@ -24,13 +27,41 @@ JsonDeserFuncT = Callable[['JsonDeserialiser', JsonT, type], Any]
 #  class (i.e. using the decorator on its methods)
 _json_deserialiser_dispatch = {}
 
+_subclass_cache: dict[tuple[type, str], type] = {}
+_attr_types_cache: dict[type, dict[str, type]] = {}
+
+# Abstract types used in annotations -> the (immutable) type to create
+_CONCRETE_TYPES: dict[type, type] = {Mapping: FrozenDict, AbstractSet: frozenset,
+                                     Collection: frozenset}
+
+
+def _intern_key(v: object) -> object:
+    """Only equal if the values are exactly the same (``1 == 1.0`` but they
+    mustn't be merged). Dataclasses in it are already interned so are
+    compared by identity."""
+    tp = type(v)
+    if hasattr(tp, '__dataclass_fields__'):
+        return tp, id(v)
+    if tp is tuple or tp is frozenset:
+        return tp, tp(map(_intern_key, v))
+    if tp is FrozenDict:
+        return tp, frozenset((_intern_key(k), _intern_key(x)) for k, x in v.items())
+    return tp, v
+
 
 class JsonDeserialiser:
     dispatch: dict[type, JsonDeserFuncT] = _json_deserialiser_dispatch
 
-    def __init__(self):
+    def __init__(self, intern: bool = True):
+        """If ``intern`` is True, equal frozen dataclasses (e.g. effect trees)
+        are only created once (for as long as this deserialiser is used) so
+        that cards with the same template share them."""
         # Copy to instance so inst.serialiser_func only affects the instance
         self.dispatch = self.dispatch.copy()
+        self.intern = intern
+        self._interned: dict[object, object] = {}
+        # Which function to use for each type (the MRO lookup is quite slow)
+        self._func_cache: dict[type, JsonDeserFuncT] = {}
 
     def deserialiser_func(self: JsonDeserialiser | type, *tps: type):
         def decor(fn: JsonDeserFuncT):
@@ -49,18 +80,30 @@ class JsonDeserialiser:
             tps += (self,)
         else:
             target_dict = self.dispatch
+            self._func_cache.clear()
         return decor
 
     def deser(self, j: JsonT, tp: type[T]) -> T:
+        try:
+            fn = self._func_cache[tp]
+        except KeyError:
+            fn = self._func_cache[tp] = self._find_func(tp)
+        return fn(self, j, tp)
+
+    def _find_func(self, tp: type) -> JsonDeserFuncT:
         cls: type = typing.get_origin(tp)  # type: ignore  # Pycharm is stupid, once again
         if cls is None:
             cls = tp  # Must be a regular class - those have origin as None
+        elif cls is typing.Union or cls is types.UnionType:
+            return type(self).deser_union
         for supercls in cls.__mro__:
             if (fn := self.dispatch.get(supercls)) is not None:
-                return fn(self, j, tp)
-        return self.deser_default(j, tp)
+                return fn
+        return type(self).deser_default
 
     def deser_default(self, j: JsonT, tp: type):
+        if isinstance(j, dict) and (cls_name := j.get('__class__')) is not None:
+            tp = self._get_subclass(tp, cls_name)  # Polymorphic, e.g. CardEffect
         if is_dataclass(tp):
             return self.deser_dataclass(j, tp)
         raise TypeError(f"Cannot serialise into type {tp.__qualname__}")
@@ -70,10 +113,27 @@ class JsonDeserialiser:
         assert isinstance(j, tp)
         return j
 
-    @deserialiser_func(list, tuple, set, frozenset)
+    def deser_union(self, j: JsonT, tp: type):
+        options = typing.get_args(tp)
+        if type(j) in options:  # Atoms, e.g. `float | int` or `X | None`
+            return j
+        # Otherwise, it must be the one that isn't None (polymorphic types
+        #  should be specified using their base class)
+        (inner_tp,) = [t for t in options if t is not type(None)]
+        return self.deser(j, inner_tp)
+
+    @deserialiser_func(list, tuple, set, frozenset, AbstractSet, Collection)
     def deser_collection(self, j: JsonT, tp: type):
-        (inner_tp,) = typing.get_args(tp)
-        return tp([self.deser(v, inner_tp) for v in j])
+        args = typing.get_args(tp)
+        cls = typing.get_origin(tp) or tp
+        cls = _CONCRETE_TYPES.get(cls, cls)
+        if len(args) == 2 and args[1] is Ellipsis:  # tuple[X, ...]
+            args = args[:1]
+        if len(args) == 1:
+            inner_tp = args[0]
+            return cls([self.deser(v, inner_tp) for v in j])
+        assert cls is tuple and len(args) == len(j)  # tuple[X, Y, Z]
+        return tuple([self.deser(v, inner_tp) for v, inner_tp in zip(j, args)])
 
     @deserialiser_func(dict, FrozenDict, Mapping)
     def deser_mapping(self, j: JsonT, tp: type):
@@ -84,11 +144,19 @@ class JsonDeserialiser:
 
     def _deser_mapping_array(self, j: list, tp: type):
         kt, vt = typing.get_args(tp)
-        return tp({self.deser(k, kt): self.deser(v, vt) for k, v in j})
+        return self._make_mapping(
+            tp, {self.deser(k, kt): self.deser(v, vt) for k, v in j})
 
     def _deser_mapping_object(self, j: dict[str, Any], tp: type):
         kt, vt = typing.get_args(tp)
-        return {self._deser_mapping_key(k, kt): self.deser(v, vt) for k, v in j.items()}
+        return self._make_mapping(
+            tp, {self._deser_mapping_key(k, kt): self.deser(v, vt) for k, v in j.items()})
+
+    @classmethod
+    def _make_mapping(cls, tp: type, d: dict):
+        mapping_cls = typing.get_origin(tp) or tp
+        mapping_cls = _CONCRETE_TYPES.get(mapping_cls, mapping_cls)
+        return d if mapping_cls is dict else mapping_cls(d)
 
     # Need separate func, Counter only has one type arg so doesn't work with code above.
     @deserialiser_func(Counter)
@@ -123,11 +191,59 @@ class JsonDeserialiser:
         #  different to the default (e.g. Game) so maybe not?
         #  In any case, this must be though over a bit more.
         inst = tp.__new__(tp)
+        attr_types = self._get_dcls_attr_types(tp)
         for k, v in j.items():  # (k must already be a string as it's a JSON object key)
-            v_new = self.deser(v, self._get_dcls_attr_type(tp, k))
-            object.__setattr__(inst, k, v_new)
+            if k == '__class__':
+                continue
+            if (attr_tp := attr_types.get(k)) is None:
+                attr_tp = attr_types[k] = self._get_dcls_attr_type(tp, k)
+            object.__setattr__(inst, k, self.deser(v, attr_tp))
+        if self.intern and tp.__dataclass_params__.frozen:
+            try:
+                key = (tp, *[(k, _intern_key(v)) for k, v in vars(inst).items()])
+                return self._interned.setdefault(key, inst)
+            except TypeError:  # Not hashable, so can't be shared anyway
+                pass
         return inst
 
+    def deser_game(self, j: JsonT, frontend: IFrontend, ruleset: IRuleset) -> Game:
+        """Rebuild a whole ``Game`` (e.g. from ``JsonAdapter.serialise_state()``),
+        restoring the references back to it (which aren't serialised)"""
+        from ..core import Game
+        game = self.deser(j, Game)
+        game.frontend = frontend
+        game.ruleset = ruleset
+        for p in game.players:
+            p.game = game
+        # These are serialised as copies of the players
+        for attr in ('players_ranked', 'winners'):
+            if (ls := getattr(game, attr)) is not None:
+                setattr(game, attr, [game.players[p.idx] for p in ls])
+        frontend.register_game(game)
+        return game
+
+    @classmethod
+    def _get_subclass(cls, base: type, name: str) -> type:
+        key = (base, name)
+        if (sub := _subclass_cache.get(key)) is not None:
+            return sub
+        todo = [base]
+        while todo:
+            sub = todo.pop()
+            if sub.__name__ == name:
+                _subclass_cache[key] = sub
+                return sub
+            todo += sub.__subclasses__()
+        raise TypeError(f"{name} is not a subclass of {base.__qualname__}")
+
+    @classmethod
+    def _get_dcls_attr_types(cls, dcls: type) -> dict[str, type]:
+        """The attribute types that have been evaluated so far (cached, as
+        evaluating string annotations is slow)"""
+        if (attr_types := _attr_types_cache.get(dcls)) is None:
+            attr_types = _attr_types_cache[dcls] = {}
+        return attr_types
+
     @classmethod
     def _get_dcls_attr_type(cls, dcls: type, name: str):
         annot = cls._get_dcls_attr_annot(dcls, name)
@@ -0,0 +1,315 @@
+"""json_ruleset.py - Rulesets defined by JSON files.
+
+The file has the numbers of the ruleset and the card templates, in the
+format ``JsonSerialiser`` writes them in (but with the enums by name)::
+
+    {
+      "format": 1,
+      "cards_per_player": 6,
+      "max_players": 4,
+      "moon_pool": ["PURPLE", "GREEN", ...],
+      "swap_dirns": [1, -1, 1],
+      "resources_per_point": {"PURPLE": 3, ..., "POINTS": 1},
+      "adjacencies": {"PURPLE": ["GREEN"], ...},
+      "starting_resources": {"PURPLE": 1, ...},
+      "starting_cards": [<template>, ...],
+      "decks": [[<template> or {"count": 2, "card": <template>}, ...], ...]
+    }
+
+``max_players`` is optional (default 4) and every deck must have enough
+cards for that many players. ``ruleset_to_json()`` writes any ruleset in
+this format. Parsing and
+checking the templates is quite slow so the result is pickled into a
+``__pycache__`` directory next to the file (keyed by a hash of the file
+and of the fields of the card and effect classes) and the rulesets
+loaded from identical files share the same templates.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+from collections import Counter
+from dataclasses import dataclass, is_dataclass, fields
+from pathlib import Path
+from typing import Sequence, Collection
+
+from .json_deserialise import JsonDeserialiser
+from .json_serialise import JsonSerialiser
+from ..core import (IRuleset, CardTemplate, AnyResource, MoonPhase, PlaceableCardType,
+                    ConfigurableRuleset, card, card_effects, common, enums)
+from ..core.eenum import ExtendableEnum
+# noinspection PyProtectedMember
+from ..core.enums import _ColorEnumTree
+from ..util import JsonT
+
+__all__ = ['JsonRuleset', 'RulesetFileError', 'ruleset_to_json']
+
+FORMAT_VERSION = 1
+N_ROUNDS = 3
+DEFAULT_MAX_PLAYERS = 4
+
+
+class RulesetFileError(Exception):
+    pass
+
+
+@dataclass
+class _CompiledRuleset:
+    cards_per_player: int
+    max_players: int
+    moon_pool: tuple[MoonPhase, ...]
+    swap_dirns: tuple[int, ...]
+    resources_per_point: dict[AnyResource, int]
+    adjacencies: dict[PlaceableCardType, frozenset[PlaceableCardType]]
+    starting_resources: Counter[AnyResource]
+    starting_cards: list[CardTemplate]
+    decks: list[list[CardTemplate]]
+
+
+# Compiled rulesets by the hash of their file (shared between instances)
+_compiled_cache: dict[str, _CompiledRuleset] = {}
+
+
+class JsonRuleset(IRuleset):
+    def __init__(self, path: str | Path, cache_dir: str | Path | None = ...):
+        """Load the ruleset from ``path``. ``cache_dir`` is where to keep
+        the compiled file (default: ``__pycache__`` next to it, None to not
+        write one)."""
+        path = Path(path)
+        data = path.read_bytes()
+        key = hashlib.sha256(_schema_hash() + data).hexdigest()
+        if (compiled := _compiled_cache.get(key)) is None:
+            if cache_dir is ...:
+                cache_dir = path.parent / '__pycache__'
+            cache_path = None if cache_dir is None else Path(
+                cache_dir, f'{path.stem}.{key[:20]}.pickle')
+            compiled = _read_cache(cache_path)
+            if compiled is None:
+                try:
+                    compiled = _compile(json.loads(data))
+                except RulesetFileError as e:
+                    raise RulesetFileError(f'{path}: {e}') from None
+                _write_cache(cache_path, compiled)
+            _compiled_cache[key] = compiled
+        self._c = compiled
+
+    @classmethod
+    def from_json(cls, j: JsonT) -> JsonRuleset:
+        """Make the ruleset from the (already parsed) JSON, without caching"""
+        inst = cls.__new__(cls)
+        inst._c = _compile(j)
+        return inst
+
+    def get_starting_cards(self) -> list[CardTemplate]:
+        return list(self._c.starting_cards)
+
+    def get_deck(self, round_idx: int) -> list[CardTemplate]:
+        return self._c.decks[round_idx]
+
+    @property
+    def cards_per_player(self) -> int:
+        return self._c.cards_per_player
+
+    def max_players(self) -> int:
+        return self._c.max_players
+
+    def get_moon_pool(self) -> Sequence[MoonPhase]:
+        return list(self._c.moon_pool)
+
+    def get_swap_dirn(self, round_idx: int) -> int:
+        return self._c.swap_dirns[round_idx]
+
+    def resources_per_point(self, r: AnyResource) -> int:
+        return self._c.resources_per_point[r]
+
+    def get_adjacencies(self) -> dict[PlaceableCardType, Collection[PlaceableCardType]]:
+        return dict(self._c.adjacencies)
+
+    def get_starting_resources(self) -> Counter[AnyResource]:
+        return self._c.starting_resources.copy()
+
+
+def _class_shape(cls: type):
+    if is_dataclass(cls):
+        return [(f.name, str(f.type)) for f in fields(cls)]
+    if issubclass(cls, ExtendableEnum):
+        return [(m.name, m.value) for m in cls.members()]
+    return sorted((k, str(v)) for k, v in vars(cls).get('__annotations__', {}).items())
+
+
+@functools.cache
+def _schema_hash() -> bytes:
+    """A hash of the fields of every class that can be in a compiled ruleset
+    (and the members of the enums). Unpickling doesn't call ``__init__`` so
+    the cache files from before any of them changed mustn't be used."""
+    h = hashlib.sha256(repr(_class_shape(_CompiledRuleset)).encode())
+    for mod in (card, card_effects, common, enums):
+        for name, cls in sorted(vars(mod).items()):
+            if isinstance(cls, type) and cls.__module__ == mod.__name__:
+                h.update(f'{cls.__module__}.{cls.__qualname__}:{_class_shape(cls)!r}\n'.encode())
+    return h.digest()
+
+
+def _read_cache(cache_path: Path | None) -> _CompiledRuleset | None:
+    if cache_path is None:
+        return None
+    try:
+        with open(cache_path, 'rb') as f:
+            compiled = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError,
+            KeyError):
+        return None  # Missing or unusable, so compile it again
+    return compiled if isinstance(compiled, _CompiledRuleset) else None
+
+
+def _write_cache(cache_path: Path | None, compiled: _CompiledRuleset):
+    if cache_path is None:
+        return
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(compiled, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass  # Like __pycache__, e.g. a read-only directory is fine
+
+
+# region compiling
+def _enum(tp: type, name: object, what: str):
+    try:
+        if isinstance(name, str):
+            # noinspection PyTypeChecker
+            return tp[name]
+    except KeyError:
+        pass
+    raise RulesetFileError(f'{what}: {name!r} is not a valid {tp.__name__}')
+
+
+def _int(j: object, what: str, minimum: int = None) -> int:
+    if not isinstance(j, int) or isinstance(j, bool):
+        raise RulesetFileError(f'{what} must be an integer')
+    if minimum is not None and j < minimum:
+        raise RulesetFileError(f'{what} must be at least {minimum}')
+    return j
+
+
+def _list(j: object, what: str) -> list:
+    if not isinstance(j, list):
+        raise RulesetFileError(f'{what} must be a list')
+    return j
+
+
+def _dict(j: object, what: str) -> dict:
+    if not isinstance(j, dict):
+        raise RulesetFileError(f'{what} must be an object')
+    return j
+
+
+def _template(deser: JsonDeserialiser, j: JsonT, what: str) -> CardTemplate:
+    try:
+        template = deser.deser(j, CardTemplate)
+    except (AssertionError, TypeError, ValueError, KeyError, AttributeError) as e:
+        raise RulesetFileError(f'{what}: invalid card ({type(e).__name__}: {e})') from None
+    missing = [f for f in ('card_type', 'effect', 'cost') if not hasattr(template, f)]
+    if missing:
+        raise RulesetFileError(f'{what}: card is missing {", ".join(missing)}')
+    return template
+
+
+def _compile(j: JsonT) -> _CompiledRuleset:
+    j = _dict(j, 'ruleset')
+    if j.get('format') != FORMAT_VERSION:
+        raise RulesetFileError(f'unsupported format {j.get("format")!r} '
+                               f'(expected {FORMAT_VERSION})')
+    missing = {'cards_per_player', 'moon_pool', 'swap_dirns', 'resources_per_point',
+               'adjacencies', 'starting_resources', 'starting_cards', 'decks'} - j.keys()
+    if missing:
+        raise RulesetFileError(f'missing {", ".join(sorted(missing))}')
+    cards_per_player = _int(j['cards_per_player'], 'cards_per_player',
+                            ConfigurableRuleset.MIN_CARDS_PER_PLAYER)
+    max_players = _int(j.get('max_players', DEFAULT_MAX_PLAYERS), 'max_players', 1)
+    moon_pool = tuple(_enum(MoonPhase, m, 'moon_pool')
+                      for m in _list(j['moon_pool'], 'moon_pool'))
+    if len(moon_pool) < ConfigurableRuleset.MIN_MOON_POOL:
+        raise RulesetFileError(f'moon_pool must have at least '
+                               f'{ConfigurableRuleset.MIN_MOON_POOL} phases')
+    swap_dirns = tuple(_int(d, 'swap_dirns') for d in _list(j['swap_dirns'], 'swap_dirns'))
+    if len(swap_dirns) != N_ROUNDS:
+        raise RulesetFileError(f'swap_dirns must have {N_ROUNDS} directions')
+    rpp = {_enum(AnyResource, r, 'resources_per_point'): _int(n, f'resources_per_point.{r}')
+           for r, n in _dict(j['resources_per_point'], 'resources_per_point').items()}
+    if missing := [r.name for r in AnyResource.members() if rpp.get(r, 0) == 0]:
+        raise RulesetFileError(f'resources_per_point must be non-zero for {", ".join(missing)}')
+    adjacencies = {
+        _enum(PlaceableCardType, k, 'adjacencies'): frozenset(
+            _enum(PlaceableCardType, v, f'adjacencies.{k}')
+            for v in _list(vs, f'adjacencies.{k}'))
+        for k, vs in _dict(j['adjacencies'], 'adjacencies').items()}
+    starting_resources = Counter({
+        _enum(AnyResource, r, 'starting_resources'): _int(n, f'starting_resources.{r}', 0)
+        for r, n in _dict(j['starting_resources'], 'starting_resources').items()})
+
+    deser = JsonDeserialiser()  # Shared so equal effects are the same objects
+    starting_cards = [_template(deser, t, f'starting_cards[{i}]')
+                      for i, t in enumerate(_list(j['starting_cards'], 'starting_cards'))]
+    if not all(t.is_starting_card for t in starting_cards):
+        raise RulesetFileError('starting_cards must all have is_starting_card')
+    decks_j = _list(j['decks'], 'decks')
+    if len(decks_j) != N_ROUNDS:
+        raise RulesetFileError(f'decks must have {N_ROUNDS} rounds')
+    decks = []
+    for r, deck_j in enumerate(decks_j):
+        deck = []
+        for i, entry in enumerate(_list(deck_j, f'decks[{r}]')):
+            what = f'decks[{r}][{i}]'
+            if isinstance(entry, dict) and 'count' in entry:
+                count = _int(entry['count'], f'{what}.count', 1)
+                entry = entry.get('card')
+            else:
+                count = 1
+            deck += [_template(deser, entry, what)] * count
+        if len(deck) < cards_per_player * max_players:
+            raise RulesetFileError(f'decks[{r}] has fewer than cards_per_player * '
+                                   f'max_players ({cards_per_player * max_players}) cards')
+        decks.append(deck)
+    return _CompiledRuleset(cards_per_player, max_players, moon_pool, swap_dirns, rpp, adjacencies,
+                            starting_resources, starting_cards, decks)
+# endregion
+
+
+def ruleset_to_json(ruleset: IRuleset) -> dict[str, JsonT]:
+    """The JSON for a ``JsonRuleset`` that is the same as ``ruleset``"""
+    ser = JsonSerialiser()
+    # Names are easier to read and edit (the deserialiser accepts both)
+    ser.dispatch[_ColorEnumTree] = lambda _, o: o.name
+
+    def ser_deck(deck: list[CardTemplate]):
+        # Consecutive equal cards as a count (keeping the order)
+        out = []
+        for t in deck:
+            if out and out[-1][0] == t:
+                out[-1][1] += 1
+            else:
+                out.append([t, 1])
+        return [ser.ser(t) if n == 1 else {'count': n, 'card': ser.ser(t)}
+                for t, n in out]
+
+    return {
+        'format': FORMAT_VERSION,
+        'cards_per_player': ruleset.cards_per_player,
+        'max_players': ruleset.max_players(),
+        'moon_pool': [m.name for m in ruleset.get_moon_pool()],
+        'swap_dirns': [ruleset.get_swap_dirn(r) for r in range(N_ROUNDS)],
+        'resources_per_point': {r.name: ruleset.resources_per_point(r)
+                                for r in AnyResource.members()},
+        'adjacencies': {k.name: [v.name for v in PlaceableCardType.members() if v in vs]
+                        for k, vs in ruleset.get_adjacencies().items()},
+        'starting_resources': {r.name: n for r, n in ruleset.get_starting_resources().items()},
+        'starting_cards': [ser.ser(t) for t in ruleset.get_starting_cards()],
+        'decks': [ser_deck(ruleset.get_deck(r)) for r in range(N_ROUNDS)],
+    }
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import abc
 from dataclasses import is_dataclass, fields as d_fields
-from functools import cmp_to_key
+from operator import itemgetter
 
 from typing import Callable, Any, cast, Mapping, TYPE_CHECKING
 
@@ -21,6 +21,8 @@ JsonSerFuncT = Callable[['JsonSerialiser', Any], JsonT]
 #  class (i.e. using the decorator on its methods)
 _json_serialiser_dispatch = {}
 
+_field_names_cache: dict[type, list[str]] = {}
+
 
 class JsonSerialiser:
     dispatch: dict[type, JsonSerFuncT] = _json_serialiser_dispatch
@@ -86,23 +88,28 @@ class JsonSerialiser:
         return self._ser_mapping_as_array(o)
 
     def _try_ser_mapping_as_object(self, o: Mapping) -> dict[str, Any] | None:
-        result = {}
+        items = []
         for k, v in o.items():
             k_ser = self.ser(k)
             if isinstance(k_ser, (int, float, str, bool, type(None))):
                 k_str = str(k_ser)
             else:
                 return None  # Can't easily stringify key, so do array-style
-            result[k_str] = self.ser(v)
-        return result
+            items.append((k_str, v))
+        # Emit the keys in order so the output is already canonical
+        items.sort(key=itemgetter(0))
+        return {k_str: self.ser(v) for k_str, v in items}
 
     def _ser_mapping_as_array(self, o: Mapping) -> list[tuple[JsonT, JsonT]]:
         ls = list(o.items())
         try:
             ls = sorted(ls, key=lambda p: p[0])
         except TypeError:
-            return sorted([(self.ser(k), self.ser(v)) for k, v in o.items()],
-                          key=lambda p: JsonTotalCmp.key(p[0]))
+            # Compute the keys once (not on every comparison)
+            keyed = [(JsonTotalCmp.key(k_ser := self.ser(k)), k_ser, v)
+                     for k, v in o.items()]
+            keyed.sort(key=itemgetter(0))
+            return [(k_ser, self.ser(v)) for _, k_ser, v in keyed]
         else:
             return [(self.ser(k), self.ser(v)) for k, v in ls]
 
@@ -112,23 +119,46 @@ class JsonSerialiser:
 
     def ser_dataclass(self, o: DataclassInstance) -> JsonT:
         # Note: the order here is more on an 'aesthetic choice' - I prefer the
-        #  type to be first in my JSON
+        #  type to be first in my JSON (it also sorts first so the keys are
+        #  still in canonical order)
         res = {}
         # By default, include type if it implements an abstract class
         #  (that means there's likely other implementations).
         if getattr(res, '_ser_polymorphic_', abc.ABC in type(o).__mro__):
             res |= {'__class__': type(o).__name__}
-        # noinspection PyDataclass
-        res |= {f.name: self.ser(getattr(o, f.name)) for f in d_fields(o)
-                if (hasattr(o, f.name)
-                    and f.name not in getattr(o, '_ser_exclude_', ()))}
+        res |= {name: self.ser(getattr(o, name))
+                for name in self._get_field_names(type(o)) if hasattr(o, name)}
         return res
 
+    @classmethod
+    def _get_field_names(cls, tp: type[DataclassInstance]) -> list[str]:
+        """The names of the fields to serialise, in sorted order"""
+        if (names := _field_names_cache.get(tp)) is None:
+            exclude = getattr(tp, '_ser_exclude_', ())
+            # noinspection PyDataclass
+            names = _field_names_cache[tp] = sorted(
+                f.name for f in d_fields(tp) if f.name not in exclude)
+        return names
+
 
 class JsonTotalCmp:
     @classmethod
     def key(cls, v: JsonT):
-        return cmp_to_key(cls.cmp)(v)
+        """A sort key giving the same order as ``cmp()``. It is computed once
+        per value so is much faster than ``cmp_to_key(cls.cmp)``."""
+        return cls._type_key(v), cls._value_key(v)
+
+    @classmethod
+    def _value_key(cls, v: JsonT):
+        # The same order as the builtin comparisons that cmp() uses for
+        #  values of the same type (dicts are compared by their sorted items)
+        tp = type(v)
+        if tp is list or tp is tuple:
+            return tuple([cls._value_key(inner) for inner in v])
+        if tp is dict:
+            return tuple(sorted([(k, cls._value_key(inner)) for k, inner in v.items()],
+                                key=itemgetter(0)))
+        return v
 
     @classmethod
     def cmp(cls, a: JsonT, b: JsonT):
@@ -156,6 +186,9 @@ class JsonTotalCmp:
 
     @classmethod
     def _type_key(cls, v: JsonT):
-        # Let's just order them by flexibility for lack of a more systematic scheme
-        return {type(None): 0, bool: 1, int: 2, float: 3, str: 4,
-                list: 5, dict: 6}[type(v)]
+        return _JSON_TYPE_ORDER[type(v)]
+
+
+# Let's just order them by flexibility for lack of a more systematic scheme
+_JSON_TYPE_ORDER = {type(None): 0, bool: 1, int: 2, float: 3, str: 4,
+                    list: 5, tuple: 5, dict: 6}
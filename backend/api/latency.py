@@ -0,0 +1,194 @@
+"""latency.py - Per-request-type latency histograms for the API layer.
+
+``JsonAdapter`` and ``WebsocketConn`` record how long each stage of each
+request takes into a shared ``LatencyRecorder``:
+
+- ``serialise``: turning game objects into JSON values (``JsonAdapter``)
+- ``encode``: ``json.dumps`` of the message (``WebsocketConn``)
+- ``queue_wait``: time an instruction waits for the socket thread
+- ``network_send``: writing the message to the socket
+- ``client_think``: from our request being sent to the reply arriving
+- ``decode``: ``json.loads`` of the reply (``WebsocketConn``)
+- ``deserialise``: turning the reply into game objects (``JsonAdapter``)
+- ``round_trip``: the whole request, as seen by ``JsonAdapter``
+
+The recorder can be queried at any time (e.g. ``recorder.summary()``) and is
+dumped to ``dump_path`` on shutdown. By default, ``dump_path`` comes from
+the ``ARCANAR_LATENCY_DUMP`` environment variable (may contain ``{pid}``).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Mapping
+
+from ..util import JsonT
+
+__all__ = ['LatencyHistogram', 'LatencyRecorder', 'LATENCY_DUMP_ENV_VAR']
+
+
+LATENCY_DUMP_ENV_VAR = 'ARCANAR_LATENCY_DUMP'
+
+
+class LatencyHistogram:
+    """A HDR-style histogram of non-negative integers (nanoseconds).
+
+    Values below ``2**sub_bucket_bits`` are stored exactly. Above that, each
+    power of 2 is split into ``2**(sub_bucket_bits - 1)`` linear buckets so
+    the relative error is at most ``2**-(sub_bucket_bits - 1)`` (under 1.6%
+    with the default) whatever the magnitude, using a small constant amount
+    of memory per power of 2."""
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._half = 1 << (sub_bucket_bits - 1)
+        self.counts: dict[int, int] = {}  # Sparse, bucket index -> count
+        self.count = 0
+        self.total = 0
+        self.min: int | None = None
+        self.max: int | None = None
+
+    def bucket_index(self, value: int):
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def bucket_bounds(self, index: int) -> tuple[int, int]:
+        """Returns the (inclusive) range of values in bucket ``index``"""
+        if index < 2 * self._half:
+            return index, index
+        shift = (index // self._half) - 1
+        lower = (index - shift * self._half) << shift
+        return lower, lower + (1 << shift) - 1
+
+    def record(self, value: int):
+        value = max(int(value), 0)
+        idx = self.bucket_index(value)
+        self.counts[idx] = self.counts.get(idx, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> int:
+        """The value at percentile ``p`` (0-100), accurate to within the
+        bucket precision"""
+        if self.count == 0:
+            return 0
+        target = max(1, -(-self.count * p // 100))  # ceil, at least 1
+        seen = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= target:
+                return min(self.bucket_bounds(idx)[1], self.max)
+        return self.max
+
+    def merge(self, other: LatencyHistogram):
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError("Cannot merge histograms with different precisions")
+        for idx, n in other.counts.items():
+            self.counts[idx] = self.counts.get(idx, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def summary(self) -> dict[str, JsonT]:
+        return {'count': self.count, 'min': self.min, 'mean': self.mean,
+                'p50': self.percentile(50), 'p90': self.percentile(90),
+                'p99': self.percentile(99), 'max': self.max}
+
+    def to_json(self) -> dict[str, JsonT]:
+        return {'sub_bucket_bits': self.sub_bucket_bits, 'count': self.count,
+                'total': self.total, 'min': self.min, 'max': self.max,
+                'counts': [[k, v] for k, v in sorted(self.counts.items())]}
+
+    @classmethod
+    def from_json(cls, j: Mapping[str, JsonT]):
+        inst = cls(j['sub_bucket_bits'])
+        inst.counts = {k: v for k, v in j['counts']}
+        inst.count, inst.total, inst.min, inst.max = (
+            j['count'], j['total'], j['min'], j['max'])
+        return inst
+
+
+class LatencyRecorder:
+    """Thread-safe collection of histograms keyed by (request type, stage)"""
+
+    def __init__(self, dump_path: str | Path = None, sub_bucket_bits: int = 7):
+        self.dump_path = dump_path
+        self.sub_bucket_bits = sub_bucket_bits
+        self._histograms: dict[tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get(LATENCY_DUMP_ENV_VAR) or None)
+
+    def record(self, request_type: str | None, stage: str, value_ns: int):
+        key = (request_type or '<none>', stage)
+        with self._lock:
+            if (hist := self._histograms.get(key)) is None:
+                hist = self._histograms[key] = LatencyHistogram(self.sub_bucket_bits)
+            hist.record(value_ns)
+
+    @contextmanager
+    def timer(self, request_type: str | None, stage: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(request_type, stage, time.perf_counter_ns() - start)
+
+    def histogram(self, request_type: str, stage: str) -> LatencyHistogram | None:
+        with self._lock:
+            return self._histograms.get((request_type, stage))
+
+    def summary(self) -> dict[str, dict[str, JsonT]]:
+        """``{request_type: {stage: {count, min, mean, p50, ...}}}`` in ns"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            result = {}
+            for (request_type, stage), hist in items:
+                result.setdefault(request_type, {})[stage] = hist.summary()
+            return result
+
+    def to_json(self) -> dict[str, JsonT]:
+        with self._lock:
+            return {'histograms': [[tp, stage, hist.to_json()] for (tp, stage), hist
+                                   in sorted(self._histograms.items())]}
+
+    def merge(self, other: LatencyRecorder):
+        for tp, stage, hist_json in other.to_json()['histograms']:
+            other_hist = LatencyHistogram.from_json(hist_json)
+            with self._lock:
+                if (hist := self._histograms.get((tp, stage))) is None:
+                    self._histograms[(tp, stage)] = other_hist
+                else:
+                    hist.merge(other_hist)
+        return self
+
+    def dump(self, path: str | Path = None):
+        if path is None:
+            path = self.dump_path
+        if path is None:
+            return None
+        path = Path(str(path).format(pid=os.getpid()))
+        path.write_text(json.dumps({'summary': self.summary()} | self.to_json(),
+                                   indent=2) + '\n')
+        return path
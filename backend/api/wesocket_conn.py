@@ -6,8 +6,10 @@ import queue
 import sys
 import threading
 import time
+from collections import deque
 from dataclasses import dataclass
 
+from websockets import ConnectionClosed
 from websockets.sync.server import serve, ServerConnection
 
 from .json_connection import JsonConnection
@@ -23,6 +25,11 @@ class CloseConn(BaseException):
 
 
 class _Instruction(abc.ABC):
+    # Timing info (for the latency histograms), set when put on the queue
+    request_type: str | None = None
+    enqueued_ns: int = 0
+    timing_stage: str | None = None  # What the time spent in run() is recorded as
+
     @abc.abstractmethod
     def run(self, conn: ServerConnection):
         ...
@@ -32,12 +39,17 @@ class _Instruction(abc.ABC):
 class _SendInstruction(_Instruction):
     data: str
 
+    timing_stage = 'network_send'
+
     def run(self, conn: ServerConnection):
         conn.send(self.data)
 
 
 @dataclass
 class _ReceiveInstruction(_Instruction):
+    # The reply comes once the client has made its decision
+    timing_stage = 'client_think'
+
     def run(self, conn: ServerConnection):
         return conn.recv()
 
@@ -48,9 +60,53 @@ class _CloseInstruction(_Instruction):
         raise CloseConn()
 
 
+class _Spectator:
+    """The messages waiting to be sent to a spectator. This is bounded (the
+    oldest are dropped) so a slow spectator can never block the game."""
+
+    def __init__(self, max_pending: int):
+        self.pending = deque[bytes](maxlen=max_pending)
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def push(self, data: bytes):
+        with self.cond:
+            if len(self.pending) == self.pending.maxlen:
+                self.dropped += 1
+            self.pending.append(data)
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+    def next_message(self) -> bytes | None:
+        """Blocks until there is a message. Returns None once closed"""
+        with self.cond:
+            while not self.pending and not self.closed:
+                self.cond.wait(timeout=0.1)
+                if not threading.main_thread().is_alive():
+                    return None
+            return self.pending.popleft() if self.pending else None
+
+
 class WebsocketConn(JsonConnection):
-    def __init__(self, port: int = 3141):
+    SPECTATE_PATH = '/spectate'
+
+    def __init__(self, port: int = 3141, spectator_buffer: int = 16):
+        """Connections to ``SPECTATE_PATH`` are spectators: they receive a
+        copy of every message sent to the player (starting with the latest
+        ``init`` and ``state``). At most ``spectator_buffer`` messages are
+        buffered for each of them."""
         self.port = port
+        self.spectator_buffer = spectator_buffer
+        self._last_request_type: str | None = None
+        self._spectators: set[_Spectator] = set()
+        self._spectators_lock = threading.Lock()
+        # Sent to spectators when they join, so they can start from the current state
+        self._join_messages: dict[str, str] = {}
 
     # noinspection PyAttributeOutsideInit
     def init(self):
@@ -65,28 +121,81 @@ class WebsocketConn(JsonConnection):
         # Separators: no whitespace. Sort keys: so we don't give client any
         #  information about ordering in our sets (and therefore the hashing
         #  seed which could be used for DoS - although this is unlikely)
+        start = time.perf_counter_ns()
         data = json.dumps(obj, separators=(',', ':'), sort_keys=True)
-        self._instruction_queue.put(_SendInstruction(data))
+        self._last_request_type = obj.get('request')
+        self._record('encode', time.perf_counter_ns() - start)
+        self._put_instruction(_SendInstruction(data))
+        self._broadcast(data, obj)
 
     def receive(self) -> JsonT:
-        self._instruction_queue.put(_ReceiveInstruction())
+        self._put_instruction(_ReceiveInstruction())
         while self._server_thread.is_alive():
             try:  # Loop+timeout needed so we can error if _server_thread dies
-                return json.loads(self._results_queue.get(timeout=0.02))
+                data = self._results_queue.get(timeout=0.02)
             except queue.Empty:
-                pass
+                continue
+            start = time.perf_counter_ns()
+            result = json.loads(data)
+            self._record('decode', time.perf_counter_ns() - start)
+            return result
         raise ServerThreadDied("Server thread died, see above for more details")
 
     def close(self):
-        self._instruction_queue.put(_CloseInstruction())
+        self._put_instruction(_CloseInstruction())
         while self._server_thread.is_alive():
             time.sleep(0.001)  # Wait for it to exit
+        with self._spectators_lock:
+            for spec in self._spectators:
+                spec.close()  # Sends what is left, then closes
+
+    @property
+    def n_spectators(self):
+        return len(self._spectators)
+
+    def _broadcast(self, data: str, obj: JsonT):
+        with self._spectators_lock:
+            if obj.get('request') == 'init':
+                self._join_messages = {'init': data}
+            if 'state' in obj:
+                self._join_messages['state'] = data
+            if not self._spectators:
+                return
+            payload = data.encode()  # Only encoded once, for all spectators
+            for spec in self._spectators:
+                spec.push(payload)
+
+    def _spectator_handler(self, conn: ServerConnection):
+        spec = _Spectator(self.spectator_buffer)
+        with self._spectators_lock:
+            for data in self._join_messages.values():
+                spec.push(data.encode())
+            self._spectators.add(spec)
+        try:
+            while (data := spec.next_message()) is not None:
+                conn.send(data, text=True)  # Already-encoded text frame
+        except ConnectionClosed:
+            pass
+        finally:
+            with self._spectators_lock:
+                self._spectators.discard(spec)
+
+    def _put_instruction(self, instr: _Instruction):
+        instr.request_type = self._last_request_type
+        instr.enqueued_ns = time.perf_counter_ns()
+        self._instruction_queue.put(instr)
+
+    def _record(self, stage: str, value_ns: int, request_type: str = None):
+        if self.latency is not None:
+            self.latency.record(request_type or self._last_request_type, stage, value_ns)
 
     def _server_worker(self):
         with serve(self._handler, 'localhost', self.port) as self._server:
             self._server.serve_forever()
 
     def _handler(self, conn: ServerConnection):
+        if conn.request is not None and conn.request.path == self.SPECTATE_PATH:
+            return self._spectator_handler(conn)
         try:
             while True:
                 if not threading.main_thread().is_alive():
@@ -99,7 +208,13 @@ class WebsocketConn(JsonConnection):
                     instr = self._instruction_queue.get(timeout=0.02)
                 except queue.Empty:
                     continue
-                if (result := instr.run(conn)) is not None:
+                start = time.perf_counter_ns()
+                self._record('queue_wait', start - instr.enqueued_ns, instr.request_type)
+                result = instr.run(conn)
+                if instr.timing_stage is not None:
+                    self._record(instr.timing_stage, time.perf_counter_ns() - start,
+                                 instr.request_type)
+                if result is not None:
                     self._results_queue.put(result)
         except CloseConn:
             return
@@ -0,0 +1,98 @@
+"""perft.py - Counting the decision sequences reachable from a position.
+
+Like perft in chess engines: ``perft(game, depth)`` is the number of
+different sequences of ``depth`` decisions that can be made from ``game``
+(sequences that end the game sooner aren't counted). It goes through
+everything the engine does (the ``IFrontend`` decisions, ``LegalMoves``,
+effects and the state changes) so a known-good count catches optimisations
+that change behaviour, and it is a benchmark of all of them together.
+
+The engine can't be paused so each sequence is played from ``game``
+following a prefix of option indices. Between them, the game is put back
+either by undoing the moves with a ``MoveJournal`` or by cloning it again.
+At the last level, the options are counted instead of being played.
+"""
+
+from __future__ import annotations
+
+from typing import Sequence, TypeVar
+
+from ..bots import LineFrontend, LegalMoves, next_prefix
+from ..core import Game, Player
+from ..core.journal import MoveJournal
+
+__all__ = ['perft', 'perft_divide']
+
+T = TypeVar('T')
+
+
+class _Leaf(Exception):
+    def __init__(self, n_options: int):
+        super().__init__(n_options)
+        self.n_options = n_options
+
+
+class _PerftFrontend(LineFrontend):
+    """A ``LineFrontend`` that stops at the last decision of ``depth``"""
+
+    def __init__(self, depth: int, legal_moves: LegalMoves = None):
+        super().__init__(legal_moves)
+        self.depth = depth
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        if len(self.line) == self.depth - 1:
+            raise _Leaf(len(options))
+        return super().choose(kind, player, options)
+
+
+def _play(game: Game):
+    # A game that hasn't been started yet has no moons
+    if game.moon_phases is None:
+        game.run_game()
+    else:
+        game.resume_game()
+
+
+def _count(game: Game, depth: int, fixed: list[int], undo: bool,
+           legal_moves: LegalMoves | None) -> int:
+    if depth == 0:
+        return 1
+    frontend = _PerftFrontend(depth, legal_moves)
+    sim = game.clone(frontend)
+    journal = MoveJournal(sim) if undo else None
+    mark = journal.mark() if undo else None
+    total = 0
+    prefix = fixed
+    while True:
+        frontend.start(prefix)
+        try:
+            _play(sim)
+        except _Leaf as leaf:
+            total += leaf.n_options
+        line, counts, _ = frontend.take()
+        if undo:
+            journal.undo(mark)
+        else:
+            sim = game.clone(frontend)
+        if (prefix := next_prefix(line, counts, len(fixed))) is None:
+            return total
+
+
+def perft(game: Game, depth: int, undo: bool = True,
+          legal_moves: LegalMoves = None) -> int:
+    """The number of sequences of ``depth`` decisions from ``game``, which
+    must be new (not started yet) or at the start of a turn and isn't
+    changed. If ``undo``, the moves are undone using a ``MoveJournal``,
+    otherwise ``game`` is cloned for every sequence."""
+    return _count(game, depth, [], undo, legal_moves)
+
+
+def perft_divide(game: Game, depth: int, undo: bool = True,
+                 legal_moves: LegalMoves = None) -> list[int]:
+    """``perft()`` for each option of the first decision (to find where
+    two counts differ)"""
+    if depth == 0:
+        return []
+    n_first = _count(game, 1, [], undo, legal_moves)
+    return [_count(game, depth, [i], undo, legal_moves) if depth > 1 else 1
+            for i in range(n_first)]
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence
+
+from ..util import JsonT
+
+__all__ = ['Benchmark', 'BenchResult', 'benchmark', 'BENCHMARKS',
+           'run_benchmarks', 'compare_to_baseline', 'main', 'DEFAULT_BASELINE']
+
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+
+BenchOpT = Callable[[], object]
+# The setup function returns the operation to time, optionally with a cleanup
+BenchSetupT = Callable[[], BenchOpT | tuple[BenchOpT, Callable[[], object]]]
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: BenchSetupT
+    number: int = 1  # Operations per sample
+    repeat: int = 5  # Number of samples
+    # If not None, the result of the operation must equal this (so that
+    #  optimisations can't silently change behaviour)
+    expect: JsonT = None
+
+
+@dataclass
+class BenchResult:
+    name: str
+    ops: int
+    min_ns: float
+    median_ns: float
+    mean_ns: float
+    error: str | None = None
+
+    def to_json(self) -> dict[str, JsonT]:
+        res = {'ops': self.ops, 'min_ns': self.min_ns,
+               'median_ns': self.median_ns, 'mean_ns': self.mean_ns}
+        if self.error is not None:
+            res |= {'error': self.error}
+        return res
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, number: int = 1, repeat: int = 5, expect: JsonT = None):
+    """Register the decorated setup function as a benchmark. The setup
+    function must return the operation to time (a function with no args),
+    or a tuple of ``(operation, cleanup)``."""
+    def decor(fn: BenchSetupT):
+        if name in BENCHMARKS:
+            raise ValueError(f"Duplicate benchmark name: {name}")
+        BENCHMARKS[name] = Benchmark(name, fn, number, repeat, expect)
+        return fn
+    return decor
+
+
+def _run_one(bench: Benchmark, quick: bool) -> BenchResult:
+    setup_result = bench.setup()
+    op, cleanup = (setup_result if isinstance(setup_result, tuple)
+                   else (setup_result, None))
+    number = 1 if quick else bench.number
+    repeat = 1 if quick else bench.repeat
+    try:
+        result = op()  # Warmup (also checks the result)
+        if bench.expect is not None and result != bench.expect:
+            return BenchResult(bench.name, 0, 0, 0, 0, error=(
+                f'Expected result {bench.expect!r}, got {result!r}'))
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                op()
+            samples.append((time.perf_counter_ns() - start) / number)
+    finally:
+        if cleanup is not None:
+            cleanup()
+    return BenchResult(bench.name, number * repeat, min(samples),
+                       statistics.median(samples), statistics.fmean(samples))
+
+
+def run_benchmarks(names: Sequence[str] = None, quick: bool = False,
+                   log: Callable[[str], object] = None) -> list[BenchResult]:
+    _load_workloads()
+    results = []
+    for name, bench in BENCHMARKS.items():
+        if names and not any(name.startswith(prefix) for prefix in names):
+            continue
+        res = _run_one(bench, quick)
+        if log is not None:
+            log(f'{name:<40} {res.median_ns / 1e3:>12.1f} us'
+                + (f'  ERROR: {res.error}' if res.error else ''))
+        results.append(res)
+    return results
+
+
+def results_to_json(results: Sequence[BenchResult]) -> dict[str, JsonT]:
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+        },
+        'results': {r.name: r.to_json() for r in results},
+    }
+
+
+def compare_to_baseline(results: dict[str, JsonT], baseline: dict[str, JsonT],
+                        tolerance: float) -> list[str]:
+    """Returns a list of human-readable regressions (empty if none). A result
+    regresses if its median is more than ``tolerance`` (a fraction) slower
+    than the baseline or if it errored."""
+    regressions = []
+    for name, res in results['results'].items():
+        if 'error' in res:
+            regressions.append(f'{name}: {res["error"]}')
+            continue
+        if (base := baseline['results'].get(name)) is None:
+            continue  # New benchmark, nothing to compare to
+        ratio = res['median_ns'] / base['median_ns']
+        if ratio > 1 + tolerance:
+            regressions.append(f'{name}: {ratio:.2f}x slower than baseline '
+                               f'({res["median_ns"]:.0f}ns vs {base["median_ns"]:.0f}ns)')
+    return regressions
+
+
+def _load_workloads():
+    from . import workloads as _  # Registers the benchmarks
+
+
+def main(argv: Sequence[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m backend.bench',
+        description='Run the engine benchmarks and compare them to a baseline')
+    parser.add_argument('names', nargs='*', help='Only run benchmarks starting with these')
+    parser.add_argument('-o', '--output', type=Path, help='Write JSON results here')
+    parser.add_argument('-b', '--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Overwrite the baseline with these results')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.25,
+                        help='Allowed slowdown as a fraction (default: 0.25)')
+    parser.add_argument('-q', '--quick', action='store_true',
+                        help='Run each benchmark once (smoke test, no comparison)')
+    args = parser.parse_args(argv)
+    results = results_to_json(run_benchmarks(
+        args.names, args.quick, log=lambda s: print(s, file=sys.stderr)))
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2) + '\n')
+    else:
+        print(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + '\n')
+        return 0
+    if args.quick or not args.baseline.exists():
+        return 1 if any('error' in r for r in results['results'].values()) else 0
+    regressions = compare_to_baseline(
+        results, json.loads(args.baseline.read_text()), args.tolerance)
+    for msg in regressions:
+        print(f'REGRESSION: {msg}', file=sys.stderr)
+    return 1 if regressions else 0
@@ -0,0 +1,336 @@
+"""The benchmark workloads. All of them are seeded so should do exactly the
+same work on every run."""
+
+from __future__ import annotations
+
+import json
+import socket
+import tempfile
+import time
+from collections import Counter
+from typing import Sequence, TypeVar
+
+import numpy as np
+
+from .perft import perft
+from .runner import benchmark
+from ..api import json_ruleset
+from ..api.json_deserialise import JsonDeserialiser
+from ..api.json_ruleset import JsonRuleset, ruleset_to_json
+from ..api.json_serialise import JsonSerialiser
+from ..bots import (RandomFrontend, LegalMoves, MCTSSearch, LinearModel,
+                    N_FEATURES, extract_batch)
+from ..core import (Game, Player, DefaultRuleset, CardTemplate, CardCost,
+                    AnyResource, Color, Location, PlaceableCardType, Area)
+from ..core.checkpoint import Checkpointer, snapshot_game, restore_game
+
+T = TypeVar('T')
+
+GAME_SEED = '1748776970931817000'
+
+
+class _StopGame(Exception):
+    pass
+
+
+class _StopAfterFrontend(RandomFrontend):
+    """Random bot that aborts the game after answering ``n_decisions``
+    (and, if ``at_turn_start``, waiting for the start of the next turn)"""
+
+    def __init__(self, seed: int | str, n_decisions: int, at_turn_start=False):
+        super().__init__(seed)
+        self.n_left = n_decisions
+        self.at_turn_start = at_turn_start
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        # get_action_type is always the first decision of a turn
+        if self.n_left <= 0 and (kind == 'get_action_type' or not self.at_turn_start):
+            raise _StopGame()
+        self.n_left -= 1
+        return super().choose(kind, player, options)
+
+
+def new_game(seed: int | str = GAME_SEED, bot_seed: int | str = 0):
+    return Game(4, RandomFrontend(bot_seed), DefaultRuleset(), seed)
+
+
+def game_after(n_decisions: int, seed: int | str = GAME_SEED, at_turn_start=False):
+    """A game stopped after ``n_decisions`` random decisions (usually in
+    the middle of a turn, unless ``at_turn_start``). Pass a big number to
+    get a finished game."""
+    g = Game(4, _StopAfterFrontend(0, n_decisions, at_turn_start), DefaultRuleset(), seed)
+    try:
+        g.run_game()
+    except _StopGame:
+        pass
+    return g
+
+
+# region playouts
+@benchmark('playout.random_bots')
+def bench_playout():
+    def op():
+        for seed in range(3):
+            new_game(seed, seed).run_game()
+    return op
+# endregion
+
+
+# region perft
+# The expected counts are known-good: if an optimisation changes them, it
+#  changed what the engine does
+@benchmark('perft.start.d6', expect=2634)
+def bench_perft_start():
+    game = new_game()
+    return lambda: perft(game, 6)
+
+
+@benchmark('perft.start.d5.clone', expect=744)
+def bench_perft_start_clone():
+    game = new_game()
+    return lambda: perft(game, 5, undo=False)
+
+
+@benchmark('perft.mid.d6', expect=1420)
+def bench_perft_mid():
+    game = game_after(150, at_turn_start=True)
+    return lambda: perft(game, 6)
+# endregion
+
+
+# region cloning
+@benchmark('game.clone.mid', number=200)
+def bench_clone_mid():
+    game = game_after(150)
+    frontend = RandomFrontend(0)
+    return lambda: game.clone(frontend)
+# endregion
+
+
+# region search
+@benchmark('mcts.search.mid')
+def bench_mcts_search_mid():
+    game = game_after(150, at_turn_start=True)
+    player = game.players[game.curr_player_idx]
+    n_options = len(LegalMoves().get_action_type(player))
+    return lambda: MCTSSearch(iterations=200, seed=0).search(
+        game, [], player.idx, n_options)
+# endregion
+
+
+# region model
+@benchmark('model.features.mid', number=20)
+def bench_model_features():
+    players = game_after(150).players * 25
+    return lambda: extract_batch(players)
+
+
+@benchmark('model.evaluate.100k', number=20)
+def bench_model_evaluate():
+    features = np.random.default_rng(0).random((100_000, N_FEATURES))
+    model = LinearModel(np.linspace(-1, 1, N_FEATURES))
+    return lambda: model.evaluate(features)
+# endregion
+
+
+# region serialisation
+def _ser_bench(game: Game):
+    ser = JsonSerialiser()
+    return lambda: ser.ser(game)
+
+
+@benchmark('serialise.game.start', number=20)
+def bench_ser_start():
+    return _ser_bench(new_game())
+
+
+@benchmark('serialise.game.mid', number=20)
+def bench_ser_mid():
+    return _ser_bench(game_after(150))
+
+
+@benchmark('serialise.game.end', number=20)
+def bench_ser_end():
+    return _ser_bench(game_after(1_000_000))
+
+
+@benchmark('deserialise.game.mid', number=20)
+def bench_deser_mid():
+    deser = JsonDeserialiser()
+    j = json.loads(json.dumps(JsonSerialiser().ser(game_after(150))))
+    return lambda: deser.deser_game(j, RandomFrontend(0), DefaultRuleset())
+
+
+@benchmark('deserialise.replies', number=500)
+def bench_deser_replies():
+    deser = JsonDeserialiser()
+    replies: list[tuple[object, type]] = [
+        ({'1': 2, '3': 1, '5': 1}, Counter[AnyResource]),
+        ({'area': 10, 'key': 3, 'player': 2}, Location),
+        (4, Color),
+        (6, PlaceableCardType),
+        ('buy', str),
+    ]
+
+    def op():
+        for j, tp in replies:
+            deser.deser(j, tp)
+    return op
+
+
+@benchmark('ruleset.json.compile', number=20)
+def bench_json_ruleset_compile():
+    j = json.loads(json.dumps(ruleset_to_json(DefaultRuleset())))
+    return lambda: JsonRuleset.from_json(j)
+
+
+@benchmark('ruleset.json.cached', number=20)
+def bench_json_ruleset_cached():
+    tmp = tempfile.TemporaryDirectory()
+    path = f'{tmp.name}/default.json'
+    with open(path, 'w') as f:
+        json.dump(ruleset_to_json(DefaultRuleset()), f)
+    JsonRuleset(path)  # Write the cache file
+
+    def op():
+        json_ruleset._compiled_cache.clear()  # Only use the one on disk
+        JsonRuleset(path)
+    return op, tmp.cleanup
+# endregion
+
+
+@benchmark('card_cost.matches_exact', number=2000)
+def bench_matches_exact():
+    cost = CardCost.color_or_any(Color.GREEN, 2, 4)
+    payments = [Counter({Color.GREEN: 2}), Counter({Color.RED: 1, Color.BLUE: 3}),
+                Counter({Color.GREEN: 1, Color.RED: 1}), Counter({Color.YELLOW: 5})]
+
+    def op():
+        for p in payments:
+            cost.matches_exact(p)
+    return op
+
+
+@benchmark('payments.affordable_cards', number=200)
+def bench_affordable_cards():
+    game = game_after(150)
+    players = game.players
+    # Resources change between calls so each player's memo is rebuilt
+    #  (from the memoised payments.can_afford_vector) each time
+    resource_sets = [Counter({c: (i + c.value) % 4 for c in Color.members()})
+                     for i in range(4)]
+
+    def op():
+        for res in resource_sets:
+            for p in players:
+                p.resources = res.copy()
+                p.affordable_cards()
+    return op
+
+
+# region checkpoints
+@benchmark('checkpoint.snapshot.mid', number=50)
+def bench_checkpoint_snapshot():
+    game = game_after(150)
+    return lambda: json.dumps(snapshot_game(game), separators=(',', ':'))
+
+
+@benchmark('checkpoint.write_decision', number=50)
+def bench_checkpoint_write_decision():
+    # What is done after every decision (the snapshot is cached)
+    tmp = tempfile.TemporaryDirectory()
+    game = game_after(150)
+    ckpt = Checkpointer(f'{tmp.name}/game.ckpt.json').attach(game)
+    ckpt.on_turn_start(game)
+    card = game.players[0].cards_of_type(Color.RED)[0]
+
+    def op():
+        ckpt.decisions.clear()
+        for _ in range(5):
+            ckpt.on_decision('choose_card_exec', card)
+    return op, tmp.cleanup
+
+
+@benchmark('checkpoint.restore.mid', number=50)
+def bench_checkpoint_restore():
+    snap = json.loads(json.dumps(snapshot_game(game_after(150))))
+    ruleset = DefaultRuleset()
+    return lambda: restore_game(snap, RandomFrontend(0), ruleset)
+# endregion
+
+
+# region effects
+def _effect_bench(templates: list[CardTemplate]):
+    game = game_after(150)
+    player = game.players[0]
+    frontend: RandomFrontend = game.frontend  # type: ignore
+    resources = Counter({r: 6 for r in AnyResource.members()})
+
+    def op():
+        frontend.rng.seed(0)
+        frontend.n_left = 1_000_000
+        player.resources = resources.copy()
+        for t in templates:
+            card = t.instantiate()
+            if PlaceableCardType.has_instance(t.card_type):
+                player.place_card(card)
+            else:  # Events get executed from the hand
+                card.append_to(game, Area.HAND, player)
+            card.execute(player)
+            card.detach(game)  # Clean up, wherever it ended up
+    return op
+
+
+@benchmark('effects.starting_cards', number=20)
+def bench_effects_starting():
+    return _effect_bench(DefaultRuleset().get_starting_cards())
+
+
+def _register_deck_benches():
+    for round_idx in range(3):
+        def setup(r=round_idx):
+            return _effect_bench(DefaultRuleset().get_deck(r))
+        benchmark(f'effects.deck_round{round_idx}', number=5)(setup)
+
+
+_register_deck_benches()
+# endregion
+
+
+# region websocket
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+@benchmark('websocket.round_trip', number=200)
+def bench_websocket_round_trip():
+    from websockets.sync.client import connect
+    from ..api.wesocket_conn import WebsocketConn
+
+    conn = WebsocketConn(_free_port())
+    conn.init()
+    deadline = time.monotonic() + 5
+    while True:
+        try:
+            client = connect(f'ws://localhost:{conn.port}')
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+    msg = {'request': 'action_type', 'player': 0, 'thread': 1,
+           'state': JsonSerialiser().ser(new_game())}
+
+    def op():
+        conn.send(msg)
+        client.recv()
+        client.send('{"thread":1,"action_type":"buy"}')
+        return conn.receive()
+
+    def cleanup():
+        client.close()
+        conn.close()
+    return op, cleanup
+# endregion
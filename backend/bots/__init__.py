@@ -0,0 +1,7 @@
+from ..core.legal_moves import LegalMoves
+from .policy_frontend import *
+from .lines import *
+from .mcts import *
+from .parallel_mcts import *
+from .last_turn import *
+from .linear_model import *
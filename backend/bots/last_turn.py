@@ -0,0 +1,183 @@
+"""last_turn.py - An exact solver for a player's final turn.
+
+On the last turn of the game (``MoonPhase.LAST_TURN`` in the last round)
+all that's left for a player is their turn and then counting their points
+(which can also need decisions, e.g. for artifacts). That tree is usually
+small so ``LastTurnSolver`` tries every line of decisions and returns the
+one with the highest final score. Chains of effects that execute other
+cards can make it very large, so the search stops after ``max_lines``
+lines (or at its deadline) and returns the best line found so far.
+
+The engine can't be paused so each line is played out from the start of
+the turn (or from the end of it, for the decisions in ``count_points``)
+and then undone using a ``MoveJournal``. The best line for counting points
+only depends on the state at the end of the turn so it is memoised on the
+Zobrist hash of that state, which many lines of the turn share.
+
+It is only exact if nothing after the player's turn changes their score,
+which is true for the last player. For the others, the later players'
+final turns are assumed not to affect them (they can, e.g. by taking
+cards from their discard or with ``MostCardsOfType``).
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Sequence, TypeVar
+
+from .lines import LineFrontend, LineT, next_prefix
+from .policy_frontend import PolicyFrontend, RandomFrontend
+from ..core import Game, Player, MoonPhase
+from ..core.journal import MoveJournal
+from ..core.zobrist import ZobristHasher
+from ..core.legal_moves import LegalMoves
+from ..search import TranspositionTable
+
+__all__ = ['LastTurnSolver', 'LastTurnFrontend', 'SolveResult']
+
+T = TypeVar('T')
+
+
+@dataclass
+class SolveResult:
+    score: int  # The final score of the player
+    # The option indices to choose for every decision after the replay
+    #  (including those with only one option)
+    line: list[int]
+    n_lines: int  # How many lines were tried
+    complete: bool = True  # False if the budget ran out (so it may not be the best)
+
+
+class LastTurnSolver:
+    def __init__(self, memo_size: int = 1 << 16, max_lines: int | None = 2000,
+                 time_limit: float | None = None, legal_moves: LegalMoves = None):
+        self.max_lines = max_lines
+        self.time_limit = time_limit
+        self.legal_moves = legal_moves if legal_moves is not None else LegalMoves()
+        # End-of-turn state hash -> (score, best line for count_points)
+        self.memo = TranspositionTable[tuple[int, list[int]]](memo_size)
+        self._frontend = LineFrontend(self.legal_moves)
+        self._journal: MoveJournal | None = None
+        self._hasher: ZobristHasher | None = None
+        self._n_lines = 0
+        self._deadline: float | None = None
+        self._complete = True
+
+    def solve(self, turn_start: Game, replay: Sequence[int] = (),
+              deadline: float = None) -> SolveResult:
+        """Find the best line for the current player of ``turn_start``
+        (which must be at the start of their turn and isn't changed), after
+        the decisions in ``replay`` (option indices) have been made.
+        ``deadline`` is a ``time.perf_counter()`` value to stop at,
+        overriding ``time_limit``."""
+        if deadline is None and self.time_limit is not None:
+            deadline = time.perf_counter() + self.time_limit
+        sim = turn_start.clone(self._frontend)
+        player = sim.players[sim.curr_player_idx]
+        self._journal = MoveJournal(sim)
+        self._hasher = ZobristHasher(sim)
+        self._n_lines = 0
+        self._deadline = deadline
+        self._complete = True
+        try:
+            score, line = self._best_line(lambda prefix: self._play_turn(player, prefix),
+                                          list(replay))
+        finally:
+            self._journal.detach()
+            self._hasher.detach()
+        return SolveResult(score, line[len(replay):], self._n_lines, self._complete)
+
+    def _out_of_budget(self):
+        return ((self.max_lines is not None and self._n_lines >= self.max_lines)
+                or (self._deadline is not None and time.perf_counter() >= self._deadline))
+
+    def _best_line(self, play: Callable[[list[int]], tuple[LineT, int, list[int]]],
+                   fixed: list[int]) -> tuple[int, list[int]]:
+        """Try every line of ``play`` that starts with ``fixed``, in order.
+        ``play(prefix)`` plays a line starting with ``prefix`` and returns
+        it, its score and the best line for the rest (if it was solved
+        separately). Stops early (keeping the best line so far) if the
+        budget runs out."""
+        mark = self._journal.mark()
+        best_score, best_line = None, None
+        prefix = fixed
+        while True:
+            (line, counts, _), score, tail = play(prefix)
+            self._journal.undo(mark)
+            if best_score is None or score > best_score:
+                best_score, best_line = score, line + tail
+            if (prefix := next_prefix(line, counts, len(fixed))) is None:
+                return best_score, best_line
+            if self._out_of_budget():
+                self._complete = False
+                return best_score, best_line
+
+    def _play_turn(self, player: Player, prefix: list[int]):
+        self._frontend.start(prefix)
+        player.do_turn()
+        turn_line = self._frontend.take()
+        rest = turn_line[2]  # The replay can go on into count_points
+        if rest:
+            score, tail = self._best_line(lambda p: self._play_count(player, p), rest)
+        elif (memo := self.memo.get(self._hasher.value)) is not None:
+            self._n_lines += 1
+            score, tail = memo
+        else:
+            score, tail = self._best_line(lambda p: self._play_count(player, p), [])
+            if self._complete:  # Otherwise, it may not be the best
+                self.memo.put(self._hasher.value, (score, tail))
+        return turn_line, score, tail
+
+    def _play_count(self, player: Player, prefix: list[int]):
+        self._frontend.start(prefix)
+        player.count_points()
+        self._n_lines += 1
+        return self._frontend.take(), player.final_score, []
+
+
+class LastTurnFrontend(PolicyFrontend):
+    """Plays the last turn of the game (and counting the points after it)
+    using ``LastTurnSolver`` (exactly, unless its budget runs out). Every
+    other decision is answered by ``fallback`` (default: random, using
+    ``seed``)."""
+
+    def __init__(self, fallback: PolicyFrontend = None, solver: LastTurnSolver = None,
+                 seed: int | str = None, legal_moves: LegalMoves = None):
+        super().__init__(legal_moves)
+        self.fallback = fallback if fallback is not None else RandomFrontend(
+            seed, legal_moves=self.legal_moves)
+        self.solver = solver if solver is not None else LastTurnSolver(
+            legal_moves=self.legal_moves)
+        # Player idx -> (their turn start, indices chosen since, the plan)
+        self.lines: dict[int, tuple[Game, list[int], deque[int]]] = {}
+
+    def register_game(self, game: Game):
+        super().register_game(game)
+        self.fallback.register_game(game)
+        self.lines = {}
+
+    def register_result(self, winners: list[Player]):
+        self.fallback.register_result(winners)
+
+    def is_last_turn(self):
+        game = self.game
+        return (game.round_num == 2 and game.moon_phases is not None
+                and MoonPhase.LAST_TURN in game.curr_moons)
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        if not self.is_last_turn():
+            return self.fallback.choose(kind, player, options)
+        if kind == 'get_action_type':  # Always the first decision of a turn
+            self.lines[player.idx] = (self.game.clone(RandomFrontend(0)), [], deque())
+        turn_start, log, plan = self.lines[player.idx]
+        if plan:
+            idx = plan.popleft()
+        elif len(options) == 1:
+            idx = 0
+        else:
+            plan.extend(self.solver.solve(turn_start, log).line)
+            idx = plan.popleft()
+        log.append(idx)
+        return options[idx]
@@ -0,0 +1,175 @@
+"""linear_model.py - A linear value model over player features, for bots.
+
+``extract_features()`` turns a player's state into a fixed-length vector
+(see ``FEATURE_NAMES``) and ``LinearModel`` predicts their final score from
+it. Many states are evaluated at once as a matrix product, so evaluating
+is cheap compared to getting the features.
+
+``ModelFrontend`` uses it to play: at the start of each turn, it plays out
+every line of the turn (up to ``max_lines``), evaluates the states they
+end in as one batch and then follows the best line. The weights are
+trained on self-play logs by ``train_model.py``.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from collections import deque
+from pathlib import Path
+from typing import Sequence, TypeVar
+
+import numpy as np
+
+from .lines import LineFrontend, next_prefix
+from .policy_frontend import PolicyFrontend
+from ..core import Game, Player, AnyResource, Area, MoonPhase
+from ..core.journal import MoveJournal
+from ..core.legal_moves import LegalMoves
+
+__all__ = ['FEATURE_NAMES', 'N_FEATURES', 'extract_features', 'extract_batch',
+           'LinearModel', 'ModelFrontend']
+
+T = TypeVar('T')
+
+_RESOURCES = AnyResource.members()
+_AREAS = Area.members()
+_MOONS = MoonPhase.members()
+
+FEATURE_NAMES = (
+    'bias',
+    *[f'resources.{r.name}' for r in _RESOURCES],
+    'points',  # If the points were counted now (without the artifacts)
+    *[f'cards.{a.name}' for a in _AREAS],
+    'markers',
+    *[f'moon.{m.name}' for m in _MOONS],  # Only the current turn's moons
+    'turns_left',
+)
+N_FEATURES = len(FEATURE_NAMES)
+
+_RESOURCE_START = FEATURE_NAMES.index(f'resources.{_RESOURCES[0].name}')
+_POINTS = FEATURE_NAMES.index('points')
+_AREA_START = FEATURE_NAMES.index(f'cards.{_AREAS[0].name}')
+_MARKERS = FEATURE_NAMES.index('markers')
+_MOON_START = FEATURE_NAMES.index(f'moon.{_MOONS[0].name}')
+_TURNS_LEFT = FEATURE_NAMES.index('turns_left')
+_RESOURCE_IDX = {r: _RESOURCE_START + i for i, r in enumerate(_RESOURCES)}
+_MOON_IDX = {m: _MOON_START + i for i, m in enumerate(_MOONS)}
+
+
+def extract_features(player: Player, out: np.ndarray = None) -> np.ndarray:
+    """The features of ``player`` (written into ``out`` if given)"""
+    if out is None:
+        out = np.zeros(N_FEATURES)
+    else:
+        out[:] = 0.0
+    game = player.game
+    rpp = game.ruleset.resources_per_point
+    out[0] = 1.0
+    points = 0
+    for r, n in player.resources.items():
+        out[_RESOURCE_IDX[r]] = n
+        points += n // rpp(r)
+    out[_POINTS] = points
+    markers = 0
+    for i, cards in enumerate(player.areas.values()):
+        out[_AREA_START + i] = len(cards)
+        for c in cards.values():
+            markers += c.markers
+    out[_MARKERS] = markers
+    if game.moon_phases is not None:
+        for m in game.curr_moons:
+            out[_MOON_IDX[m]] = 1.0
+    out[_TURNS_LEFT] = (2 - game.round_num) * 6 + (5 - game.turn_num)
+    return out
+
+
+def extract_batch(players: Sequence[Player]) -> np.ndarray:
+    out = np.empty((len(players), N_FEATURES))
+    for i, p in enumerate(players):
+        extract_features(p, out[i])
+    return out
+
+
+class LinearModel:
+    def __init__(self, weights: np.ndarray = None):
+        self.weights = (np.zeros(N_FEATURES) if weights is None
+                        else np.asarray(weights, dtype=float))
+        if self.weights.shape != (N_FEATURES,):
+            raise ValueError(f"Expected {N_FEATURES} weights, got {self.weights.shape}")
+
+    def evaluate(self, features: np.ndarray) -> np.ndarray:
+        """The predicted final score for each row of ``features``"""
+        return features @ self.weights
+
+    def evaluate_players(self, players: Sequence[Player]) -> np.ndarray:
+        return self.evaluate(extract_batch(players))
+
+    @classmethod
+    def fit(cls, features: np.ndarray, targets: np.ndarray, l2: float = 1.0):
+        """Least squares with an L2 penalty (not applied to the bias)"""
+        penalty = np.full(N_FEATURES, l2)
+        penalty[0] = 0.0
+        gram = features.T @ features + np.diag(penalty)
+        # lstsq so that features that never change don't make it singular
+        return cls(np.linalg.lstsq(gram, features.T @ targets, rcond=None)[0])
+
+    def to_json(self):
+        return {'features': list(FEATURE_NAMES), 'weights': self.weights.tolist()}
+
+    @classmethod
+    def from_json(cls, j):
+        if j['features'] != list(FEATURE_NAMES):
+            raise ValueError("Model was trained with different features")
+        return cls(np.array(j['weights']))
+
+    def save(self, path: str | Path):
+        Path(path).write_text(json.dumps(self.to_json(), indent=2) + '\n')
+
+    @classmethod
+    def load(cls, path: str | Path):
+        return cls.from_json(json.loads(Path(path).read_text()))
+
+
+class ModelFrontend(PolicyFrontend):
+    """Plays the line of each turn that ends in the state with the best
+    value according to ``model``. If there are more than ``max_lines``
+    lines, only the first ones (in depth-first order) are considered. The
+    decisions outside of turns (when counting points) are random."""
+
+    def __init__(self, model: LinearModel, max_lines: int = 500,
+                 seed: int | str = None, legal_moves: LegalMoves = None):
+        super().__init__(legal_moves)
+        self.model = model
+        self.max_lines = max_lines
+        self.rng = random.Random(seed)
+        self.plan: deque[int] = deque()
+        self._line_frontend = LineFrontend(self.legal_moves)
+        self._features = np.empty((max_lines, N_FEATURES))
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        if kind == 'get_action_type':  # Always the first decision of a turn
+            self.plan = deque(self.plan_turn(self.game))
+        if self.plan:
+            return options[self.plan.popleft()]
+        return options[self.rng.randrange(len(options))]
+
+    def plan_turn(self, turn_start: Game) -> list[int]:
+        """The option indices for the best line of the current player's turn"""
+        sim = turn_start.clone(self._line_frontend)
+        player = sim.players[sim.curr_player_idx]
+        journal = MoveJournal(sim)
+        mark = journal.mark()
+        lines = []
+        prefix = []
+        while len(lines) < self.max_lines:
+            self._line_frontend.start(prefix)
+            player.do_turn()
+            line, counts, _ = self._line_frontend.take()
+            extract_features(player, self._features[len(lines)])
+            lines.append(line)
+            journal.undo(mark)
+            if (prefix := next_prefix(line, counts)) is None:
+                break
+        values = self.model.evaluate(self._features[:len(lines)])
+        return lines[int(np.argmax(values))]
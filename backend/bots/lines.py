@@ -0,0 +1,66 @@
+"""lines.py - Going through every line (sequence of option indices) of a
+part of the game.
+
+The engine can't be paused so each line is played from the same position
+following a prefix of option indices (and then the first option at every
+new decision), after which the position is restored and ``next_prefix()``
+gives the prefix for the next line.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Sequence, TypeVar
+
+from .policy_frontend import PolicyFrontend
+from ..core import Player
+from ..core.legal_moves import LegalMoves
+
+__all__ = ['LineT', 'LineFrontend', 'next_prefix']
+
+T = TypeVar('T')
+
+# (line, number of options at each decision in the line, unused prefix)
+LineT = tuple[list[int], list[int], list[int]]
+
+
+class LineFrontend(PolicyFrontend):
+    """Follows ``prefix`` and then always picks the first option, recording
+    the indices chosen and the number of options at each decision"""
+
+    def __init__(self, legal_moves: LegalMoves):
+        super().__init__(legal_moves)
+        self.prefix: deque[int] = deque()
+        self.line: list[int] = []
+        self.counts: list[int] = []
+
+    def start(self, prefix: Sequence[int]):
+        self.prefix = deque(prefix)
+        self.line = []
+        self.counts = []
+
+    def take(self) -> LineT:
+        result = (self.line, self.counts, list(self.prefix))
+        self.start(())
+        return result
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        idx = self.prefix.popleft() if self.prefix else 0
+        if idx >= len(options):
+            raise ValueError(f"Option {idx} is out of range for {kind} "
+                             f"(only {len(options)} options)")
+        self.line.append(idx)
+        self.counts.append(len(options))
+        return options[idx]
+
+
+def next_prefix(line: Sequence[int], counts: Sequence[int],
+                n_fixed: int = 0) -> list[int] | None:
+    """The prefix of the line after ``line`` in depth-first order (like an
+    odometer), given the number of options at each of its decisions, or
+    None if it was the last one. The first ``n_fixed`` decisions are never
+    changed."""
+    for i in reversed(range(n_fixed, len(line))):
+        if line[i] + 1 < counts[i]:
+            return [*line[:i], line[i] + 1]
+    return None
@@ -0,0 +1,278 @@
+"""mcts.py - A bot using information set Monte Carlo Tree Search (IS-MCTS).
+
+The engine can't be stopped in the middle of a turn so each simulation
+starts from a clone of the game at the start of the current turn and
+replays the decisions made since then (they only depend on public
+information and the current player's own cards). Before that, the game is
+'determinised': the cards the current player can't see (the other players'
+hands) are replaced by a random sample of the cards from this round's deck
+that haven't been seen, and the seed is changed so that the later rounds
+are dealt differently.
+
+Each simulation then walks down the tree (one node per decision that has
+more than one option, with each player choosing using UCB1 for their own
+reward), adds one new node, plays randomly for ``rollout_turns`` turns and
+scores the result. The answer is the option that was visited the most.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Sequence, TypeVar
+
+from .policy_frontend import PolicyFrontend
+from ..core import Game, Player, Area, CardTemplate
+from ..core import payments
+from ..core.legal_moves import LegalMoves
+
+__all__ = ['MCTSFrontend', 'MCTSSearch', 'SearchResult']
+
+T = TypeVar('T')
+
+
+class _RolloutDone(Exception):
+    pass
+
+
+class _Diverged(Exception):
+    """The replay doesn't work in this determinisation"""
+
+
+class _Node:
+    __slots__ = ('children', 'visits', 'total_reward', 'avail')
+
+    def __init__(self):
+        self.children: dict[int, _Node] = {}
+        self.visits = 0
+        # Reward for the player that chose this node (in its parent)
+        self.total_reward = 0.0
+        # How many times this node was available to be chosen
+        self.avail = 0
+
+
+@dataclass
+class SearchResult:
+    visits: list[int]  # For each option
+    n_simulations: int
+    elapsed: float  # Seconds
+    # Average reward (for the root player) of each option
+    mean_rewards: list[float] = field(default_factory=list)
+
+    @property
+    def best(self) -> int:
+        # Ties go to the first one so that it is deterministic
+        return max(range(len(self.visits)), key=lambda i: (self.visits[i], -i))
+
+    @property
+    def sims_per_second(self):
+        return self.n_simulations / self.elapsed if self.elapsed else 0.0
+
+
+class _SimFrontend(PolicyFrontend):
+    """Plays out one simulation: replays the decisions made in the real
+    game, then walks down the tree, then plays randomly"""
+
+    def __init__(self, search: MCTSSearch, legal_moves: LegalMoves):
+        super().__init__(legal_moves)
+        self.search = search
+        self.rng = search.rng
+        self.replay: deque[int] = deque()
+        self.node: _Node | None = None
+        self.path: list[tuple[_Node, int]] = []  # (node, player who chose it)
+        self.turns_left = 0
+
+    def start(self, replay: Sequence[int], root: _Node):
+        self.replay = deque(replay)
+        self.node = root
+        self.path = []
+        self.turns_left = self.search.rollout_turns
+
+    def decide(self, kind: str, player: Player, *args):
+        if self.node is None and not self.replay:
+            # Rollout: pick a random payment without listing all of them
+            if kind == 'get_card_payment':
+                _, cost = args
+                n = payments.count_payments(cost, player.resources)
+                return payments.payment_at(cost, player.resources, self.rng.randrange(n))
+            if kind == 'get_spend':
+                _, filters, amount = args
+                n = payments.count_spends(player.resources, filters, amount)
+                if (idx := self.rng.randrange(n + 1)) == n:
+                    return None  # The last option (as in LegalMoves.get_spend)
+                return payments.spend_at(player.resources, filters, amount, idx)
+        return super().decide(kind, player, *args)
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        if self.replay:
+            idx = self.replay.popleft()
+            if idx >= len(options):
+                raise _Diverged()
+            return options[idx]
+        if kind == 'get_action_type':
+            if self.turns_left is not None:
+                if self.turns_left <= 0:
+                    raise _RolloutDone()
+                self.turns_left -= 1
+        if len(options) == 1:
+            return options[0]
+        if self.node is None:  # Rollout
+            return options[self.rng.randrange(len(options))]
+        return options[self._tree_policy(player.idx, len(options))]
+
+    def _tree_policy(self, player_idx: int, n_options: int) -> int:
+        node = self.node
+        untried = [i for i in range(n_options) if i not in node.children]
+        for i, child in node.children.items():
+            if i < n_options:
+                child.avail += 1
+        if untried:
+            idx = untried[self.rng.randrange(len(untried))]
+            child = node.children[idx] = _Node()
+            child.avail += 1
+            self.node = None  # Expanded one node, now do the rollout
+        else:
+            c = self.search.exploration
+            idx, child = max(
+                ((i, ch) for i, ch in node.children.items() if i < n_options),
+                key=lambda p: (p[1].total_reward / p[1].visits
+                               + c * math.sqrt(math.log(p[1].avail) / p[1].visits)))
+            self.node = child
+        self.path.append((child, player_idx))
+        return idx
+
+
+class MCTSSearch:
+    """The search itself, separate from the frontend so that it can be run
+    anywhere the turn-start state and the decisions since can be sent."""
+
+    def __init__(self, iterations: int | None = 200, time_limit: float | None = None,
+                 rollout_turns: int | None = 4, exploration: float = 0.7,
+                 seed: int | str = None, legal_moves: LegalMoves = None):
+        if iterations is None and time_limit is None:
+            raise ValueError("Need an iteration or time budget (or both)")
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.rollout_turns = rollout_turns
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.legal_moves = legal_moves if legal_moves is not None else LegalMoves()
+
+    def search(self, turn_start: Game, replay: Sequence[int], root_player: int,
+               n_options: int, deadline: float = None) -> SearchResult:
+        """Search the decision reached by replaying ``replay`` (option
+        indices) from ``turn_start`` (which must be at the start of a turn
+        and isn't changed). ``deadline`` is a ``time.perf_counter()``
+        value to stop at, overriding ``time_limit``."""
+        start = time.perf_counter()
+        if deadline is None and self.time_limit is not None:
+            deadline = start + self.time_limit
+        sim_frontend = _SimFrontend(self, self.legal_moves)
+        unseen = self._unseen_cards(turn_start, root_player)
+        root = _Node()
+        n = 0
+        while ((self.iterations is None or n < self.iterations)
+               and (deadline is None or time.perf_counter() < deadline)):
+            n += 1
+            sim = self._determinise(turn_start, root_player, unseen, sim_frontend)
+            sim_frontend.start(replay, root)
+            try:
+                sim.resume_game()
+            except _RolloutDone:
+                pass
+            except _Diverged:
+                continue
+            rewards = self.rewards(sim)
+            for node, player_idx in sim_frontend.path:
+                node.visits += 1
+                node.total_reward += rewards[player_idx]
+        visits = [0] * n_options
+        mean_rewards = [0.0] * n_options
+        for i, child in root.children.items():
+            visits[i] = child.visits
+            mean_rewards[i] = child.total_reward / child.visits if child.visits else 0.0
+        return SearchResult(visits, n, time.perf_counter() - start, mean_rewards)
+
+    @classmethod
+    def scores(cls, game: Game) -> list[float]:
+        if game.winners is not None:
+            return [p.final_score for p in game.players]
+        rpp = game.ruleset.resources_per_point
+        # Fractional points so that the rollouts can tell apart states that
+        #  only differ by a few resources
+        return [sum([n / rpp(r) for r, n in p.resources.items()])
+                for p in game.players]
+
+    @classmethod
+    def rewards(cls, game: Game) -> list[float]:
+        """1 for winning (split if it's a tie), 0 otherwise"""
+        scores = cls.scores(game)
+        best = max(scores)
+        n_best = scores.count(best)
+        return [1 / n_best if s == best else 0.0 for s in scores]
+
+    def _unseen_cards(self, game: Game, observer: int) -> list[CardTemplate]:
+        """The templates from this round's deck that ``observer`` hasn't seen
+        (only counting the cards that are visible now)"""
+        unseen = Counter(game.ruleset.get_deck(game.round_num))
+        for p in game.players:
+            for area, cards in p.areas.items():
+                if area == Area.HAND and p.idx != observer:
+                    continue
+                unseen -= Counter([c.template for c in cards.values()])
+        return list(unseen.elements())
+
+    def _determinise(self, game: Game, observer: int, unseen: list[CardTemplate],
+                     sim_frontend: _SimFrontend) -> Game:
+        sim = game.clone(sim_frontend)
+        sim.seed = f'{game.seed}+mcts.{self.rng.getrandbits(32)}'
+        others = [p for p in sim.players if p.idx != observer]
+        n_hidden = sum([len(p.hand) for p in others])
+        if len(unseen) >= n_hidden:
+            templates = self.rng.sample(unseen, n_hidden)
+        else:  # Don't know enough about the deck, just shuffle the hands
+            templates = [c.template for p in others for c in p.hand.values()]
+            self.rng.shuffle(templates)
+        for p in others:
+            for key, old in p.hand.items():
+                card = templates.pop().instantiate(old.location)
+                p.hand[key] = card
+        return sim
+
+
+class MCTSFrontend(PolicyFrontend):
+    """Answers every decision using ``MCTSSearch``, for the players in
+    ``players`` (default: all of them). The others are played randomly."""
+
+    def __init__(self, search: MCTSSearch = None, players: Sequence[int] = None,
+                 seed: int | str = None, legal_moves: LegalMoves = None):
+        super().__init__(legal_moves)
+        self.mcts = search if search is not None else MCTSSearch(
+            seed=seed, legal_moves=self.legal_moves)
+        self.players = None if players is None else frozenset(players)
+        self.rng = random.Random(seed)
+        self.turn_start: Game | None = None
+        self.turn_log: list[int] = []  # Option indices chosen this turn
+        self.last_result: SearchResult | None = None
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        if kind == 'get_action_type':
+            # Always the first decision of a turn
+            self.turn_start = self.game.clone(_SimFrontend(self.mcts, self.legal_moves))
+            self.turn_log = []
+        if len(options) == 1:
+            idx = 0
+        elif self.players is not None and player.idx not in self.players:
+            idx = self.rng.randrange(len(options))
+        else:
+            idx = self.pick(player, len(options))
+        self.turn_log.append(idx)
+        return options[idx]
+
+    def pick(self, player: Player, n_options: int) -> int:
+        self.last_result = self.mcts.search(self.turn_start, self.turn_log,
+                                            player.idx, n_options)
+        return self.last_result.best
@@ -0,0 +1,138 @@
+"""parallel_mcts.py - Root-parallel MCTS over a pool of worker processes.
+
+Each worker runs its own independent ``MCTSSearch`` from the same decision
+(sent as a ``snapshot_game()`` of the turn start plus the option indices
+chosen since) with a different seed, and the visit counts at the root are
+added up. The workers stop a bit before the deadline so that their results
+get back in time; any that don't (or that fail) are left out, so
+``search()`` always returns by the deadline (with whatever simulations
+were finished).
+"""
+
+from __future__ import annotations
+
+import concurrent.futures as cf
+import multiprocessing
+import os
+import time
+from typing import Sequence
+
+from .mcts import MCTSSearch, SearchResult
+from .policy_frontend import RandomFrontend
+from ..core import Game, IRuleset
+from ..core.checkpoint import snapshot_game, restore_game
+
+__all__ = ['ParallelMCTSSearch']
+
+
+# The ruleset in this worker process (set by the pool initializer)
+_worker_ruleset: IRuleset | None = None
+
+
+def _init_worker(ruleset: IRuleset):
+    global _worker_ruleset
+    _worker_ruleset = ruleset
+
+
+def _worker_search(snap: dict, replay: Sequence[int], root_player: int,
+                   n_options: int, wall_deadline: float | None,
+                   params: dict) -> SearchResult:
+    # The frontend isn't used, the search clones the game with its own
+    turn_start = restore_game(snap, RandomFrontend(0), _worker_ruleset)
+    # time.time() is the only clock that can be compared between processes
+    time_limit = None if wall_deadline is None else max(wall_deadline - time.time(), 0.0)
+    search = MCTSSearch(**params, time_limit=time_limit)
+    return search.search(turn_start, replay, root_player, n_options)
+
+
+class ParallelMCTSSearch(MCTSSearch):
+    """A drop-in replacement for ``MCTSSearch`` (e.g. in ``MCTSFrontend``)
+    that runs it in ``n_workers`` processes. ``iterations`` is the total
+    over all the workers. ``margin`` is how long before the deadline the
+    workers stop, to leave time to send the results back.
+
+    The workers are forked (when first needed) so the ruleset must be the
+    same one as the games that are searched. Call ``close()`` (or use it as
+    a context manager) to stop them."""
+
+    def __init__(self, ruleset: IRuleset, n_workers: int = None,
+                 iterations: int | None = None, time_limit: float | None = 1.0,
+                 rollout_turns: int | None = 4, exploration: float = 0.7,
+                 seed: int | str = None, margin: float = 0.02):
+        super().__init__(iterations, time_limit, rollout_turns, exploration, seed)
+        self.ruleset = ruleset
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.margin = margin
+        self._pool: cf.ProcessPoolExecutor | None = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            # Don't wait for searches that missed their deadline
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = cf.ProcessPoolExecutor(
+                self.n_workers, multiprocessing.get_context('fork'),
+                initializer=_init_worker, initargs=(self.ruleset,))
+        return self._pool
+
+    def search(self, turn_start: Game, replay: Sequence[int], root_player: int,
+               n_options: int, deadline: float = None) -> SearchResult:
+        start = time.perf_counter()
+        if deadline is None and self.time_limit is not None:
+            deadline = start + self.time_limit
+        wall_deadline = None
+        if deadline is not None:
+            wall_deadline = time.time() + (deadline - start) - self.margin
+        snap = snapshot_game(turn_start)
+        base_seed = self.rng.getrandbits(64)
+        futures = [self._get_pool().submit(
+            _worker_search, snap, list(replay), root_player, n_options, wall_deadline,
+            dict(iterations=iterations, rollout_turns=self.rollout_turns,
+                 exploration=self.exploration, seed=f'{base_seed}.{i}'))
+            for i, iterations in enumerate(self._split_iterations())
+            if iterations != 0]
+        timeout = None if deadline is None else max(deadline - time.perf_counter(), 0.0)
+        done, late = cf.wait(futures, timeout)
+        for fut in late:
+            fut.cancel()
+        results, errors = [], []
+        for fut in done:
+            try:
+                results.append(fut.result())
+            except Exception as e:  # Still use the other workers' results
+                errors.append(e)
+        if any(isinstance(e, cf.process.BrokenProcessPool) for e in errors):
+            self.close()  # Started again when next needed
+        if errors and not results:
+            raise errors[0]
+        return self.merge(results, n_options, time.perf_counter() - start)
+
+    def _split_iterations(self) -> list[int | None]:
+        """The iterations for each worker (the first ones get the remainder)"""
+        if self.iterations is None:
+            return [None] * self.n_workers
+        base, extra = divmod(self.iterations, self.n_workers)
+        return [base + (i < extra) for i in range(self.n_workers)]
+
+    @classmethod
+    def merge(cls, results: Sequence[SearchResult], n_options: int,
+              elapsed: float) -> SearchResult:
+        """Add up the visits of the independent searches"""
+        visits = [0] * n_options
+        total_rewards = [0.0] * n_options
+        for r in results:
+            for i in range(n_options):
+                visits[i] += r.visits[i]
+                total_rewards[i] += r.mean_rewards[i] * r.visits[i]
+        mean_rewards = [t / v if v else 0.0 for t, v in zip(total_rewards, visits)]
+        return SearchResult(visits, sum([r.n_simulations for r in results]),
+                            elapsed, mean_rewards)
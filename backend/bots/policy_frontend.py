@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import abc
+import random
+from collections import Counter
+from typing import Collection, Literal, Sequence, TypeVar
+
+from ..core import (Game, Player, IFrontend, Card, CardCost, EffectExecInfo,
+                    Color, AnyResource, ResourceFilter, CardTypeFilter,
+                    PlaceableCardType, AdjacenciesMappingT)
+from ..core.legal_moves import LegalMoves
+
+__all__ = ['PolicyFrontend', 'RandomFrontend']
+
+
+T = TypeVar('T')
+
+
+class PolicyFrontend(IFrontend, abc.ABC):
+    """A frontend that answers every decision by picking one of the legal
+    options (as listed by ``LegalMoves``). Subclasses only need to provide
+    ``choose()``. The ``kind`` passed to it is the name of the ``IFrontend``
+    method being answered."""
+
+    game: Game
+
+    def __init__(self, legal_moves: LegalMoves = None):
+        self.legal_moves = legal_moves if legal_moves is not None else LegalMoves()
+
+    @abc.abstractmethod
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        ...
+
+    def decide(self, kind: str, player: Player, *args):
+        return self.choose(kind, player, self.legal_moves.options(kind, *args))
+
+    def register_game(self, game: Game):
+        self.game = game
+
+    def register_result(self, winners: list[Player]):
+        pass
+
+    def get_action_type(self, player: Player) -> Literal['buy', 'execute']:
+        return self.decide('get_action_type', player, player)
+
+    def get_discard(self, player: Player) -> Card:
+        return self.decide('get_discard', player, player)
+
+    def get_card_buy(self, player: Player) -> Card:
+        return self.decide('get_card_buy', player, player)
+
+    def get_card_payment(self, player: Player, cost: CardCost) -> Counter[AnyResource]:
+        return self.decide('get_card_payment', player, player, cost)
+
+    def choose_color_exec(self, info: EffectExecInfo, n_times: int) -> Color:
+        return self.decide('choose_color_exec', info.player, info, n_times)
+
+    def choose_excl_color(self, info: EffectExecInfo,
+                          top_colors: Collection[Color]) -> Color:
+        return self.decide('choose_excl_color', info.player, info, top_colors)
+
+    def get_foreach_color(self, info: EffectExecInfo) -> Color:
+        return self.decide('get_foreach_color', info.player, info)
+
+    def choose_from_discard(self, info: EffectExecInfo, target: Player,
+                            filters: CardTypeFilter) -> Card:
+        return self.decide('choose_from_discard', info.player, info, target, filters)
+
+    def choose_card_exec(self, info: EffectExecInfo, n_times: int,
+                         discard: bool = False) -> Card:
+        return self.decide('choose_card_exec', info.player, info, n_times, discard)
+
+    def get_spend(self, info: EffectExecInfo, filters: ResourceFilter,
+                  amount: int) -> None | Counter[AnyResource]:
+        return self.decide('get_spend', info.player, info, filters, amount)
+
+    def choose_card_move(self, info: EffectExecInfo,
+                         adjacencies: AdjacenciesMappingT) -> Card | None:
+        return self.decide('choose_card_move', info.player, info, adjacencies)
+
+    def choose_move_where(self, info: EffectExecInfo, card_to_move: Card,
+                          possibilities: Collection[PlaceableCardType]
+                          ) -> PlaceableCardType | None:
+        return self.decide('choose_move_where', info.player, info,
+                           card_to_move, possibilities)
+
+
+class RandomFrontend(PolicyFrontend):
+    """Picks uniformly at random from the legal options. Fully reproducible
+    for a given ``seed``."""
+
+    def __init__(self, seed: int | str = None, legal_moves: LegalMoves = None):
+        super().__init__(legal_moves)
+        self.rng = random.Random(seed)
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        return options[self.rng.randrange(len(options))]
@@ -0,0 +1,252 @@
+"""self_play.py - Generating training data from self-play as .npz shards.
+
+Every decision in the games is a sample: the features of the player
+deciding (see ``extract_features``), a mask of the legal option indices,
+the index chosen and the final outcome for that player. Game ``i`` is
+seeded by ``f'{seed}.{i}'`` and the games are played in worker processes
+but written in order, ``shard_size`` samples per shard (the last one can
+be smaller), so the same range of games always gives identical files.
+
+Generating can be stopped and resumed: each shard records the position
+(game, sample in the game) it ends at, so the next run carries on from
+the last complete shard. A smaller last shard is written again when the
+range is extended so that the shards don't depend on how the range was
+split up.
+
+Usage::
+
+    python -m backend.bots.self_play data/ --games 0:1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import sys
+import zipfile
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Sequence, TypeVar
+
+import numpy as np
+
+from .linear_model import N_FEATURES, extract_features
+from .policy_frontend import PolicyFrontend, RandomFrontend
+from ..core import Game, Player, DefaultRuleset, IRuleset
+from ..util import parse_range
+from ..workers import fork_pool, worker_args
+
+__all__ = ['DECISION_KINDS', 'SelfPlayConfig', 'generate_shards', 'read_shard',
+           'list_shards', 'main']
+
+T = TypeVar('T')
+
+DECISION_KINDS = (
+    'get_action_type', 'get_discard', 'get_card_buy', 'get_card_payment',
+    'choose_color_exec', 'choose_excl_color', 'get_foreach_color',
+    'choose_from_discard', 'choose_card_exec', 'get_spend',
+    'choose_card_move', 'choose_move_where',
+)
+_KIND_IDX = {k: i for i, k in enumerate(DECISION_KINDS)}
+
+# So that the zip files don't depend on when they were written
+_ZIP_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+@dataclass(frozen=True)
+class SelfPlayConfig:
+    seed: str = '0'
+    shard_size: int = 4096
+    # Decisions with more options than this aren't recorded
+    max_actions: int = 64
+    n_players: int = 4
+    # Makes the frontend for a game from its seed. Must be available in the
+    #  worker processes (they are forked, so anything is fine)
+    frontend_factory: Callable[[str], PolicyFrontend] = RandomFrontend
+    ruleset_factory: Callable[[], IRuleset] = DefaultRuleset
+
+
+class _RecordingFrontend(PolicyFrontend):
+    def __init__(self, inner: PolicyFrontend, max_actions: int):
+        super().__init__(inner.legal_moves)
+        self.inner = inner
+        self.max_actions = max_actions
+        # (features, n_options, chosen, kind, player idx)
+        self.samples: list[tuple[np.ndarray, int, int, int, int]] = []
+
+    def register_game(self, game: Game):
+        super().register_game(game)
+        self.inner.register_game(game)
+
+    def register_result(self, winners: list[Player]):
+        self.inner.register_result(winners)
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        answer = self.inner.choose(kind, player, options)
+        if len(options) <= self.max_actions:
+            # By identity first as some options can be equal
+            idx = next((i for i, o in enumerate(options) if o is answer), None)
+            if idx is None:
+                idx = options.index(answer)
+            self.samples.append((extract_features(player).astype(np.float32),
+                                 len(options), idx, _KIND_IDX[kind], player.idx))
+        return answer
+
+
+def _play_game(config: SelfPlayConfig, game_idx: int) -> dict[str, np.ndarray]:
+    game_seed = f'{config.seed}.{game_idx}'
+    frontend = _RecordingFrontend(config.frontend_factory(game_seed), config.max_actions)
+    game = Game(config.n_players, frontend, config.ruleset_factory(), game_seed)
+    game.run_game()
+    samples = frontend.samples
+    n = len(samples)
+    states = np.zeros((n, N_FEATURES), dtype=np.float32)
+    masks = np.zeros((n, config.max_actions), dtype=bool)
+    players = np.empty(n, dtype=np.int64)
+    for i, (features, n_options, _, _, player_idx) in enumerate(samples):
+        states[i] = features
+        masks[i, :n_options] = True
+        players[i] = player_idx
+    scores = np.array([p.final_score for p in game.players])
+    winners = np.zeros(len(game.players), dtype=bool)
+    winners[[p.idx for p in game.winners]] = True
+    return {
+        'states': states,
+        'masks': masks,
+        'actions': np.array([s[2] for s in samples], dtype=np.int16),
+        'kinds': np.array([s[3] for s in samples], dtype=np.int8),
+        'scores': scores[players].astype(np.int16),
+        'wins': winners[players],
+        'games': np.full(n, game_idx, dtype=np.int32),
+    }
+
+
+def _write_npz(path: Path, arrays: dict[str, np.ndarray]):
+    """Like ``np.savez_compressed`` but the bytes only depend on ``arrays``"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, arr in arrays.items():
+            buf = io.BytesIO()
+            np.lib.format.write_array(buf, np.ascontiguousarray(arr), allow_pickle=False)
+            info = zipfile.ZipInfo(name + '.npy', date_time=_ZIP_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            zf.writestr(info, buf.getvalue())
+    os.replace(tmp_path, path)
+
+
+def read_shard(path: str | Path) -> dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as f:
+        return {k: f[k] for k in f.files}
+
+
+def list_shards(out_dir: str | Path) -> list[Path]:
+    return sorted(Path(out_dir).glob('shard-*.npz'))
+
+
+class _ShardWriter:
+    def __init__(self, out_dir: Path, config: SelfPlayConfig, first_shard: int,
+                 position: tuple[int, int]):
+        self.out_dir = out_dir
+        self.config = config
+        self.shard_idx = first_shard
+        self.start = position  # Where the current shard starts
+        self.chunks: list[dict[str, np.ndarray]] = []
+        self.n_buffered = 0
+
+    def add(self, game_idx: int, arrays: dict[str, np.ndarray], skip: int):
+        """Add the samples of a game, except the first ``skip`` of them"""
+        n = len(arrays['actions'])
+        while skip < n:
+            take = min(n - skip, self.config.shard_size - self.n_buffered)
+            self.chunks.append({k: v[skip:skip + take] for k, v in arrays.items()})
+            self.n_buffered += take
+            skip += take
+            if self.n_buffered == self.config.shard_size:
+                self.flush((game_idx, skip))
+
+    def flush(self, end: tuple[int, int]):
+        if self.n_buffered == 0:
+            return
+        arrays = {k: np.concatenate([c[k] for c in self.chunks])
+                  for k in self.chunks[0]}
+        arrays['position_start'] = np.array(self.start, dtype=np.int64)
+        arrays['position_end'] = np.array(end, dtype=np.int64)
+        _write_npz(self.out_dir / f'shard-{self.shard_idx:06d}.npz', arrays)
+        self.shard_idx += 1
+        self.start = end
+        self.chunks = []
+        self.n_buffered = 0
+
+
+def _resume_point(out_dir: Path, games: range, config: SelfPlayConfig):
+    """(index of the next shard, position to carry on from)"""
+    shards = list_shards(out_dir)
+    if not shards:
+        return 0, (games.start, 0)
+    first = read_shard(shards[0])
+    if tuple(first['position_start']) != (games.start, 0):
+        raise ValueError(f"The shards in {out_dir} don't start at game {games.start}")
+    last = read_shard(shards[-1])
+    if len(last['actions']) < config.shard_size:
+        # Not a full shard (end of the last range) so write it again
+        shards[-1].unlink()
+        return len(shards) - 1, tuple(map(int, last['position_start']))
+    return len(shards), tuple(map(int, last['position_end']))
+
+
+def _worker_play(game_idx: int):
+    return _play_game(*worker_args(), game_idx)
+
+
+def generate_shards(out_dir: str | Path, games: range, config: SelfPlayConfig = None,
+                    n_workers: int = None, log: Callable[[str], object] = None):
+    """Play the games in ``games`` and write the samples to shards in
+    ``out_dir``, carrying on from the shards already there (which must be
+    for a range starting at the same game). At most ``2 * n_workers``
+    games are held in memory at once."""
+    config = config if config is not None else SelfPlayConfig()
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shard_idx, (first_game, skip) = _resume_point(out_dir, games, config)
+    writer = _ShardWriter(out_dir, config, shard_idx, (first_game, skip))
+    todo = iter(range(first_game, games.stop))
+    n_workers = n_workers or os.cpu_count() or 1
+    with fork_pool(n_workers, config) as pool:
+        # Only a few games ahead so that memory use is bounded
+        pending = deque(pool.submit(_worker_play, i)
+                        for _, i in zip(range(2 * n_workers), todo))
+        game_idx = first_game
+        while pending:
+            arrays = pending.popleft().result()
+            if (i := next(todo, None)) is not None:
+                pending.append(pool.submit(_worker_play, i))
+            writer.add(game_idx, arrays, skip)
+            if log is not None:
+                log(f'Game {game_idx}: {len(arrays["actions"]) - skip} samples')
+            game_idx += 1
+            skip = 0
+    writer.flush((games.stop, 0))
+
+
+def main(argv: Sequence[str] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m backend.bots.self_play',
+        description='Write self-play samples to .npz shards (resumes from the existing ones)')
+    parser.add_argument('out_dir', type=Path)
+    parser.add_argument('-g', '--games', type=parse_range, required=True,
+                        help='Range of game indices, START:STOP')
+    parser.add_argument('-s', '--seed', default='0')
+    parser.add_argument('--shard-size', type=int, default=4096)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+    generate_shards(args.out_dir, args.games,
+                    SelfPlayConfig(seed=args.seed, shard_size=args.shard_size),
+                    args.workers, log=lambda s: print(s, file=sys.stderr))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""train_model.py - Self-play logs and training the ``LinearModel`` on them.
+
+A self-play log is a JSON lines file with one game per line: the
+``snapshot_game()`` at the start of every turn and the final scores. Each
+snapshot gives one training example per player (their features then, and
+their final score as the target).
+
+Usage::
+
+    python -m backend.bots.train_model play -n 200 games.jsonl
+    python -m backend.bots.train_model fit games.jsonl -o weights.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+import numpy as np
+
+from .linear_model import LinearModel, extract_batch
+from .policy_frontend import PolicyFrontend, RandomFrontend
+from ..core import Game, DefaultRuleset, IRuleset
+from ..core.catalog import TemplateCatalog
+from ..core.checkpoint import snapshot_game, restore_game
+
+__all__ = ['record_self_play', 'load_training_data', 'main']
+
+
+class _SnapshotRecorder:
+    """Used as the game's checkpointer to get a snapshot at each turn start"""
+
+    def __init__(self, catalog: TemplateCatalog):
+        self.catalog = catalog
+        self.snapshots = []
+
+    def on_turn_start(self, game: Game):
+        self.snapshots.append(snapshot_game(game, self.catalog))
+
+
+def record_self_play(path: str | Path, n_games: int, seed: int | str = 0,
+                     frontend_factory: Callable[[str], PolicyFrontend] = RandomFrontend,
+                     ruleset: IRuleset = None, n_players: int = 4):
+    """Play ``n_games`` games (game ``i`` is seeded by ``f'{seed}.{i}'``)
+    and append them to the log at ``path``"""
+    ruleset = ruleset if ruleset is not None else DefaultRuleset()
+    catalog = TemplateCatalog.for_ruleset(ruleset)
+    with open(path, 'a') as f:
+        for i in range(n_games):
+            game_seed = f'{seed}.{i}'
+            game = Game(n_players, frontend_factory(game_seed), ruleset, game_seed)
+            game.checkpointer = recorder = _SnapshotRecorder(catalog)
+            game.run_game()
+            f.write(json.dumps({
+                'seed': game_seed, 'snapshots': recorder.snapshots,
+                'final_scores': [p.final_score for p in game.players],
+            }, separators=(',', ':')) + '\n')
+
+
+def _iter_games(paths: Iterable[str | Path]):
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_training_data(paths: Iterable[str | Path], ruleset: IRuleset = None
+                       ) -> tuple[np.ndarray, np.ndarray]:
+    """The features and targets (final scores) from the self-play logs"""
+    ruleset = ruleset if ruleset is not None else DefaultRuleset()
+    catalog = TemplateCatalog.for_ruleset(ruleset)
+    features, targets = [], []
+    for record in _iter_games(paths):
+        for snap in record['snapshots']:
+            game = restore_game(snap, RandomFrontend(0), ruleset, catalog)
+            features.append(extract_batch(game.players))
+            targets.extend(record['final_scores'])
+    if not features:
+        raise ValueError("No training data in the logs")
+    return np.concatenate(features), np.array(targets, dtype=float)
+
+
+def main(argv: Sequence[str] = None, log: Callable[[str], object] = None):
+    parser = argparse.ArgumentParser(
+        prog='python -m backend.bots.train_model',
+        description='Record self-play games and fit the linear value model to them')
+    sub = parser.add_subparsers(dest='command', required=True)
+    play = sub.add_parser('play', help='Append random self-play games to a log')
+    play.add_argument('log', type=Path)
+    play.add_argument('-n', '--n-games', type=int, default=100)
+    play.add_argument('-s', '--seed', default='0')
+    fit = sub.add_parser('fit', help='Fit the model to self-play logs')
+    fit.add_argument('logs', type=Path, nargs='+')
+    fit.add_argument('-o', '--output', type=Path, required=True,
+                     help='Write the weights (JSON) here')
+    fit.add_argument('--l2', type=float, default=1.0)
+    args = parser.parse_args(argv)
+    if log is None:
+        log = lambda s: print(s, file=sys.stderr)
+    if args.command == 'play':
+        record_self_play(args.log, args.n_games, args.seed)
+        return 0
+    features, targets = load_training_data(args.logs)
+    model = LinearModel.fit(features, targets, args.l2)
+    rmse = float(np.sqrt(np.mean((model.evaluate(features) - targets) ** 2)))
+    log(f'Fit {len(targets)} examples, RMSE {rmse:.3f}')
+    model.save(args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,3 +6,4 @@ from .enums import *
 from .ifrontend import IFrontend
 from .player import Player
 from .ruleset import *
+from .state_listener import StateListener
@@ -3,6 +3,7 @@ from __future__ import annotations
 import abc
 from collections import Counter
 from dataclasses import dataclass, fields
+from functools import cached_property
 from typing import TYPE_CHECKING, Mapping
 
 from .common import Location, ResourceFilter
@@ -53,10 +54,12 @@ class CardTemplate:  # Frozen-by-convention
         (apart from ``move()`` which is built to handle this).
         Also note that ``player`` **MUST** be specified otherwise the
         card doesn't know which player to attach to."""
-        return Card(
+        card = Card(
             self.card_type, self.effect, self.cost, self.always_triggers,
             self.is_starting_card, to_location, markers
         )
+        card.template = self  # Saves creating a new one if it's needed
+        return card
 
 
 @dataclass(eq=False)
@@ -64,12 +67,32 @@ class Card(CardTemplate):
     location: Location = None
     markers: int = 0
 
+    @cached_property
+    def template(self) -> CardTemplate:
+        """The template this card was created from (or an equal one)"""
+        return CardTemplate(self.card_type, self.effect, self.cost,
+                            self.always_triggers, self.is_starting_card)
+
     def execute(self, player: Player):
         # Player is the player to execute the effects for (other players can
         #  execute a player's card and get the effect for themselves in
         #  theory - although maybe not with the base cards)
         info = EffectExecInfo(self, player)
+        game = player.game
+        if not (listeners := game.state_listeners):
+            self.effect.execute(info)
+            return
+        for listener in listeners:
+            listener.on_card_executing(game, self, player)
         self.effect.execute(info)
+        for listener in listeners:
+            listener.on_card_executed(game, self, player)
+
+    def change_markers(self, game: Game, delta: int):
+        old = self.markers
+        self.markers = old + delta
+        for listener in game.state_listeners:
+            listener.on_markers_changed(game, self, old, self.markers)
 
     def detach(self, game: Game):
         """Detach ourself from `self.location`"""
@@ -136,11 +159,12 @@ class CardCost:
     def matches_exact(self, resources: Counter[AnyResource]):
         """Returns the first ColorFilter it matched"""
         resources = +resources  # Remove negative/zero values
+        total_have = sum(resources.values())
+        used_mask = AnyResource.mask_of(resources.keys())
         for color_filter, n in self.possibilities.items():
-            total_have = sum(resources.values())
             if n != total_have:
                 continue  # Need exact
-            if all(map(color_filter.is_allowed, resources.keys())):
+            if color_filter.allows_all(used_mask):
                 return color_filter
         return None
 
@@ -48,7 +48,7 @@ class GainResource(CardEffect):
     amount: int
 
     def execute(self, info: EffectExecInfo):
-        info.player.resources[self.resource] += self.amount
+        info.player.gain_resource(self.resource, self.amount)
 
 
 @dataclass(frozen=True)
@@ -65,7 +65,7 @@ class SpendResource(CardEffect):
         assert spent <= info.player.resources  # (Subset)
         assert spent.total() == self.amount
         assert all(map(self.colors.is_allowed, spent))
-        info.player.resources -= spent
+        info.player.spend_resources(spent)
 
 
 @dataclass(frozen=True)
@@ -73,7 +73,7 @@ class AddMarker(CardEffect):
     amount: int = 1
 
     def execute(self, info: EffectExecInfo):
-        info.card.markers += 1
+        info.card.change_markers(info.game, 1)
 
 
 @dataclass(frozen=True)
@@ -85,7 +85,7 @@ class RemoveMarker(CardEffect):
     def execute(self, info: EffectExecInfo) -> object | None:
         if info.card.markers < self.amount:
             return CANT_EXEC
-        info.card.markers -= self.amount
+        info.card.change_markers(info.game, -self.amount)
 
 
 @dataclass(frozen=True)
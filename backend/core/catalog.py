@@ -0,0 +1,64 @@
+"""catalog.py - Numbering the card templates of a ruleset.
+
+The ids are used wherever cards need to be stored or hashed compactly
+(e.g. checkpoints, Zobrist hashing and statistics).
+"""
+
+from __future__ import annotations
+
+import weakref
+from typing import TYPE_CHECKING, Collection
+
+from .card import Card, CardTemplate
+
+if TYPE_CHECKING:
+    from .ruleset import IRuleset
+
+__all__ = ['TemplateCatalog', 'UnknownTemplateError']
+
+
+class UnknownTemplateError(LookupError):
+    pass
+
+
+class TemplateCatalog:
+    """Gives an id to every template in a ruleset (starting cards and decks)"""
+
+    _cache: weakref.WeakKeyDictionary[IRuleset, TemplateCatalog] = (
+        weakref.WeakKeyDictionary())
+    # How many templates that are equal to (but not the same objects as) the
+    #  ruleset's ones are remembered by id(), after which they are forgotten
+    MAX_EXTRA_OBJS = 1024
+
+    def __init__(self, templates: Collection[CardTemplate]):
+        self.templates = list(dict.fromkeys(templates))  # Remove duplicates
+        self.ids = {t: i for i, t in enumerate(self.templates)}
+        # Hashing templates is slow (it hashes the whole effect) so cache by
+        #  id(), keeping a reference so the id() can't be reused
+        self._ids_by_obj: dict[int, tuple[CardTemplate, int]] = {}
+        self._forget_extra_objs()
+
+    @classmethod
+    def for_ruleset(cls, ruleset: IRuleset, n_rounds: int = 3):
+        if (inst := cls._cache.get(ruleset)) is None:
+            templates = [*ruleset.get_starting_cards()]
+            for r in range(n_rounds):
+                templates += ruleset.get_deck(r)
+            inst = cls._cache[ruleset] = cls(templates)
+        return inst
+
+    def id_of(self, card: Card) -> int:
+        template = card.template
+        if (entry := self._ids_by_obj.get(id(template))) is not None:
+            return entry[1]
+        try:
+            template_id = self.ids[template]
+        except KeyError:
+            raise UnknownTemplateError(f"Card not from the ruleset: {card!r}") from None
+        if len(self._ids_by_obj) >= len(self.templates) + self.MAX_EXTRA_OBJS:
+            self._forget_extra_objs()
+        self._ids_by_obj[id(template)] = (template, template_id)
+        return template_id
+
+    def _forget_extra_objs(self):
+        self._ids_by_obj = {id(t): (t, i) for i, t in enumerate(self.templates)}
@@ -0,0 +1,286 @@
+"""checkpoint.py - Saving running games to disk and resuming them.
+
+A checkpoint is a snapshot of the game at the start of the current player's
+turn, plus the decisions made since then. The game can't be stopped in the
+middle of an effect so, to restore it, the snapshot is loaded and the
+decisions are replayed (which is deterministic as the only randomness is
+seeded by ``Game.seed``). Cards are stored as ids into the ruleset's
+``TemplateCatalog`` so the checkpoints are compact.
+
+Usage::
+
+    Checkpointer('game.ckpt.json').attach(game)  # Written as the game runs
+    game.run_game()
+    ...
+    game = load_checkpoint('game.ckpt.json', frontend, ruleset)
+    game.resume_game()
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import Counter, deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Collection, Mapping
+
+from .card import Card, CardCost, EffectExecInfo
+from .catalog import TemplateCatalog, UnknownTemplateError  # re-export
+from .common import Location, ResourceFilter, CardTypeFilter, AdjacenciesMappingT
+from .enums import Area, AnyResource, Color, MoonPhase, PlaceableCardType
+from .ifrontend import IFrontend
+from ..util import JsonT
+
+if TYPE_CHECKING:
+    from .game import Game
+    from .player import Player
+    from .ruleset import IRuleset
+
+__all__ = ['TemplateCatalog', 'UnknownTemplateError', 'CheckpointError', 'snapshot_game',
+           'restore_game', 'Checkpointer', 'load_checkpoint', 'CHECKPOINT_VERSION']
+
+
+CHECKPOINT_VERSION = 1
+
+
+class CheckpointError(Exception):
+    pass
+
+
+# region snapshots
+def snapshot_game(game: Game, catalog: TemplateCatalog = None) -> dict[str, JsonT]:
+    """A JSON-able snapshot of ``game``. This is only valid at the start of
+    a player's turn (at other points, use a ``Checkpointer``)."""
+    if catalog is None:
+        catalog = TemplateCatalog.for_ruleset(game.ruleset)
+    return {
+        'version': CHECKPOINT_VERSION,
+        'seed': game.seed,
+        'n_players': game.n_players,
+        'round': game.round_num,
+        'turn': game.turn_num,
+        'player': game.curr_player_idx,
+        'moons': [sorted(m.value for m in moons) for moons in game.moon_phases],
+        'players': [_snapshot_player(p, catalog) for p in game.players],
+    }
+
+
+def _snapshot_player(player: Player, catalog: TemplateCatalog):
+    return {
+        'resources': _ser_counter(player.resources),
+        # area -> [[key, template_id, markers], ...] (in order)
+        'areas': {str(area.value): [[k, catalog.id_of(c), c.markers]
+                                    for k, c in cards.items()]
+                  for area, cards in player.areas.items() if cards},
+    }
+
+
+def restore_game(snap: Mapping[str, JsonT], frontend: IFrontend,
+                 ruleset: IRuleset, catalog: TemplateCatalog = None) -> Game:
+    """Rebuild the game from ``snapshot_game()``. Call ``resume_game()``
+    on the result to carry on playing."""
+    from .game import Game
+    from .player import Player
+
+    if snap.get('version') != CHECKPOINT_VERSION:
+        raise CheckpointError(f"Unsupported checkpoint version: {snap.get('version')}")
+    if catalog is None:
+        catalog = TemplateCatalog.for_ruleset(ruleset)
+    game = Game.__new__(Game)
+    game.frontend = frontend
+    game.ruleset = ruleset
+    game.seed = snap['seed']
+    game.n_players = snap['n_players']
+    game.round_num = snap['round']
+    game.turn_num = snap['turn']
+    game.curr_player_idx = snap['player']
+    game.moon_phases = [{MoonPhase(v) for v in moons} for moons in snap['moons']]
+    game.players_ranked = game.winners = None
+    game.players = [Player.new(i, game) for i in range(game.n_players)]
+    for player, player_snap in zip(game.players, snap['players']):
+        player.resources = _deser_counter(player_snap['resources'])
+        for area_value, cards in player_snap['areas'].items():
+            area = Area(int(area_value))
+            for key, template_id, markers in cards:
+                card = catalog.templates[template_id].instantiate(markers=markers)
+                card.attach_to(game, Location(player.idx, area, key))
+    frontend.register_game(game)
+    return game
+
+
+def _ser_counter(c: Counter[AnyResource]) -> list[list[int]]:
+    return sorted([r.value, n] for r, n in c.items() if n != 0)
+
+
+def _deser_counter(j: list[list[int]]) -> Counter[AnyResource]:
+    return Counter({AnyResource(v): n for v, n in j})
+# endregion
+
+
+# region decisions
+# How to (de)serialise the answer for each IFrontend method
+_CARD_DECISIONS = frozenset({'get_discard', 'get_card_buy', 'choose_from_discard',
+                             'choose_card_exec', 'choose_card_move'})
+_COUNTER_DECISIONS = frozenset({'get_card_payment', 'get_spend'})
+_ENUM_DECISIONS = {'choose_color_exec': Color, 'choose_excl_color': Color,
+                   'get_foreach_color': Color, 'choose_move_where': PlaceableCardType}
+
+
+def _ser_answer(kind: str, answer: object) -> JsonT:
+    if answer is None or kind == 'get_action_type':
+        return answer
+    if kind in _CARD_DECISIONS:
+        loc = answer.location
+        return [loc.player, loc.area.value, loc.key]
+    if kind in _COUNTER_DECISIONS:
+        return _ser_counter(answer)
+    return answer.value
+
+
+def _deser_answer(game: Game, kind: str, j: JsonT) -> object:
+    if j is None or kind == 'get_action_type':
+        return j
+    if kind in _CARD_DECISIONS:
+        player, area, key = j
+        return Location(player, Area(area), key).get(game)
+    if kind in _COUNTER_DECISIONS:
+        return _deser_counter(j)
+    return _ENUM_DECISIONS[kind](j)
+
+
+class _CheckpointFrontend(IFrontend):
+    """Records the decisions made by ``inner`` for the checkpointer, first
+    replaying any decisions that were loaded from a checkpoint."""
+
+    def __init__(self, inner: IFrontend, checkpointer: Checkpointer,
+                 replay: list[list[JsonT]] = ()):
+        self.inner = inner
+        self.checkpointer = checkpointer
+        self.replay = deque(replay)
+        self.game: Game | None = None
+
+    def _decide(self, kind: str, *args):
+        if self.replay:
+            recorded_kind, answer_json = self.replay.popleft()
+            if recorded_kind != kind:
+                raise CheckpointError(f"Replay diverged: expected {recorded_kind} "
+                                      f"decision but got {kind}")
+            answer = _deser_answer(self.game, kind, answer_json)
+        else:
+            answer = getattr(self.inner, kind)(*args)
+        self.checkpointer.on_decision(kind, answer)
+        return answer
+
+    def register_game(self, game: Game):
+        self.game = game
+        self.inner.register_game(game)
+
+    def register_result(self, winners: list[Player]):
+        self.inner.register_result(winners)
+        self.checkpointer.on_game_finished()
+
+    def get_action_type(self, player: Player):
+        return self._decide('get_action_type', player)
+
+    def get_discard(self, player: Player):
+        return self._decide('get_discard', player)
+
+    def get_card_buy(self, player: Player):
+        return self._decide('get_card_buy', player)
+
+    def get_card_payment(self, player: Player, cost: CardCost):
+        return self._decide('get_card_payment', player, cost)
+
+    def choose_color_exec(self, info: EffectExecInfo, n_times: int):
+        return self._decide('choose_color_exec', info, n_times)
+
+    def choose_excl_color(self, info: EffectExecInfo, top_colors: Collection[Color]):
+        return self._decide('choose_excl_color', info, top_colors)
+
+    def get_foreach_color(self, info: EffectExecInfo):
+        return self._decide('get_foreach_color', info)
+
+    def choose_from_discard(self, info: EffectExecInfo, target: Player,
+                            filters: CardTypeFilter):
+        return self._decide('choose_from_discard', info, target, filters)
+
+    def choose_card_exec(self, info: EffectExecInfo, n_times: int, discard: bool = False):
+        return self._decide('choose_card_exec', info, n_times, discard)
+
+    def get_spend(self, info: EffectExecInfo, filters: ResourceFilter, amount: int):
+        return self._decide('get_spend', info, filters, amount)
+
+    def choose_card_move(self, info: EffectExecInfo, adjacencies: AdjacenciesMappingT):
+        return self._decide('choose_card_move', info, adjacencies)
+
+    def choose_move_where(self, info: EffectExecInfo, card_to_move: Card,
+                          possibilities: Collection[PlaceableCardType]):
+        return self._decide('choose_move_where', info, card_to_move, possibilities)
+# endregion
+
+
+class Checkpointer:
+    """Keeps a checkpoint of a game up to date on disk. The snapshot is only
+    serialised at the start of each turn; after each decision, the file is
+    rewritten with the cached snapshot followed by the decisions."""
+
+    def __init__(self, path: str | Path, every_decision: bool = True,
+                 delete_when_finished: bool = True):
+        self.path = Path(path)
+        self.every_decision = every_decision
+        self.delete_when_finished = delete_when_finished
+        self.decisions: list[list[JsonT]] = []
+        self._snapshot_prefix: str | None = None  # The JSON, without the closing '}'
+        self._catalog: TemplateCatalog | None = None
+
+    def attach(self, game: Game, replay: list[list[JsonT]] = ()):
+        """Start checkpointing ``game`` (must be called before it starts).
+        ``replay`` is for ``load_checkpoint`` only."""
+        self._catalog = TemplateCatalog.for_ruleset(game.ruleset)
+        game.checkpointer = self
+        frontend = _CheckpointFrontend(game.frontend, self, replay)
+        frontend.game = game
+        game.frontend = frontend
+        return self
+
+    def on_turn_start(self, game: Game):
+        snap_json = json.dumps(snapshot_game(game, self._catalog), separators=(',', ':'))
+        self._snapshot_prefix = snap_json[:-1]
+        self.decisions = []
+        self.write()
+
+    def on_decision(self, kind: str, answer: object):
+        self.decisions.append([kind, _ser_answer(kind, answer)])
+        if self.every_decision:
+            self.write()
+
+    def on_game_finished(self):
+        if self.delete_when_finished:
+            self.path.unlink(missing_ok=True)
+
+    def to_json_str(self) -> str | None:
+        if self._snapshot_prefix is None:
+            return None  # Not started yet
+        return (self._snapshot_prefix + ',"decisions":'
+                + json.dumps(self.decisions, separators=(',', ':')) + '}')
+
+    def write(self):
+        if (data := self.to_json_str()) is None:
+            return
+        # Write then rename so there is always a complete checkpoint on disk
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        tmp_path.write_text(data)
+        os.replace(tmp_path, self.path)
+
+
+def load_checkpoint(path: str | Path, frontend: IFrontend, ruleset: IRuleset,
+                    checkpointer: Checkpointer = None) -> Game:
+    """Restore the game from the checkpoint at ``path``. Call ``resume_game()``
+    on the result to carry on playing. By default, it carries on being
+    checkpointed to ``path``."""
+    j = json.loads(Path(path).read_text())
+    game = restore_game(j, frontend, ruleset)
+    if checkpointer is None:
+        checkpointer = Checkpointer(path)
+    checkpointer.attach(game, replay=j['decisions'])
+    return game
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cached_property
 from typing import AbstractSet, TYPE_CHECKING, Iterable, Mapping, Collection
 
 from .enums import Area, AnyResource, CardType, Color, PlaceableCardType
@@ -26,7 +27,10 @@ class Location:
         return game.get_areas_for(self.player)[self.area][self.key]
 
     def clear(self, game: Game) -> Card:
-        return game.get_areas_for(self.player)[self.area].pop(self.key)
+        card = game.get_areas_for(self.player)[self.area].pop(self.key)
+        for listener in game.state_listeners:
+            listener.on_card_removed(game, self, card)
+        return card
 
     def put(self, game: Game, card: Card):
         dest_area = game.get_areas_for(self.player)[self.area]
@@ -34,6 +38,10 @@ class Location:
         #  and return previous value)
         prev = dest_area.get(self.key)
         dest_area[self.key] = card
+        for listener in game.state_listeners:
+            if prev is not None:
+                listener.on_card_removed(game, self, prev)
+            listener.on_card_put(game, self, card)
         return prev
 
 
@@ -44,8 +52,30 @@ class ResourceFilter:
     def __init__(self, allowed_resources: AbstractSet[AnyResource]):
         object.__setattr__(self, 'allowed_resources', frozenset(allowed_resources))
 
+    # Not a field so isn't serialised/compared. Computed lazily as
+    #  deserialised instances don't go through __init__.
+    @cached_property
+    def mask(self) -> int:
+        return AnyResource.mask_of(self.allowed_resources)
+
     def is_allowed(self, c: AnyResource):
-        return c in self.allowed_resources
+        return bool(c._eenum_bit_ & self.mask)
+
+    def allows_all(self, mask: int):
+        """Returns True if all the resources in ``mask`` are allowed"""
+        return not (mask & ~self.mask)
+
+    def intersection(self, other: ResourceFilter):
+        return ResourceFilter.from_mask(self.mask & other.mask)
+    __and__ = intersection
+
+    def members(self) -> tuple[AnyResource, ...]:
+        """The allowed resources, in the usual enum order"""
+        return AnyResource.members_in_mask(self.mask)
+
+    @classmethod
+    def from_mask(cls, mask: int):
+        return cls(AnyResource.members_in_mask(mask))
 
     @classmethod
     def any_color(cls):
@@ -67,8 +97,23 @@ class CardTypeFilter:
     def __init__(self, allowed_types: Iterable[CardType]):
         object.__setattr__(self, 'allowed_types', frozenset(allowed_types))
 
+    @cached_property
+    def mask(self) -> int:
+        return CardType.mask_of(self.allowed_types)
+
     def is_allowed(self, c: CardType):
-        return c in self.allowed_types
+        return bool(c._eenum_bit_ & self.mask)
+
+    def intersection(self, other: CardTypeFilter):
+        return CardTypeFilter.from_mask(self.mask & other.mask)
+    __and__ = intersection
+
+    def members(self) -> tuple[CardType, ...]:
+        return CardType.members_in_mask(self.mask)
+
+    @classmethod
+    def from_mask(cls, mask: int):
+        return cls(CardType.members_in_mask(mask))
 
     @classmethod
     def any_type(cls):
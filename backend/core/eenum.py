@@ -46,10 +46,13 @@ class EnumHierarchyData(Generic[T]):
     name_to_inst: dict[str, ExtendableEnum[T]]
     value_to_inst: dict[T, ExtendableEnum[T]]
     all_instances: set[ExtendableEnum[T]]  # Fast containment check
+    # Each instance gets a bit (in order of creation) so that sets of
+    #  instances can be represented as an int (see ExtendableEnumMeta.mask_of)
+    inst_by_bit_idx: list[ExtendableEnum[T]]
 
     @classmethod
     def empty(cls):
-        return cls({}, {}, set())
+        return cls({}, {}, set(), [])
 
     def inst_from_value(self, value: T | ExtendableEnum[T] | object,
                         allow_name: bool = False) -> ExtendableEnum[T] | None:
@@ -73,6 +76,8 @@ class EnumHierarchyData(Generic[T]):
             raise ValueError("Duplicate name in eenum")
         if inst.value in self.value_to_inst:
             raise ValueError("eenum value already registered")
+        inst._eenum_bit_ = 1 << len(self.inst_by_bit_idx)
+        self.inst_by_bit_idx.append(inst)
         self.all_instances.add(inst)
         self.name_to_inst[inst.name] = inst
         self.value_to_inst[inst.value] = inst
@@ -102,6 +107,10 @@ class ExtendableEnumMeta(type, Generic[T]):
     _eenum_top_: type[ExtendableEnum[T]] | None = None
     _eenum_data_: EnumHierarchyData
     _eenum_members_: set[ExtendableEnum[T]] | None
+    # Precomputed from _eenum_members_ (as these are used in hot loops)
+    _eenum_mask_: int = 0
+    _eenum_ordered_: tuple[ExtendableEnum[T], ...] = ()
+    _eenum_mask_cache_: dict[int, tuple[ExtendableEnum[T], ...]]
 
     @classmethod
     def _is_special_name(cls, name: str):
@@ -126,6 +135,7 @@ class ExtendableEnumMeta(type, Generic[T]):
             cls._eenum_members_ = cls._eenum_data_.all_instances
             cls._init_members_from_ns(ns, possible_members=None,
                                       allow_exclude=False, allow_none=True)
+            cls._update_members_cache()
             return
         eenum_tops = {b._eenum_top_ for b in eenum_bases}
         if len(eenum_tops) > 1:
@@ -141,6 +151,22 @@ class ExtendableEnumMeta(type, Generic[T]):
             # Makes no sense to allow exclude in a root class (would
             #  only be excluding from the current class)
             ns, possible_members, allow_exclude=possible_members is not None)
+        cls._update_members_cache()
+        # This class may have added new members to the top class
+        top._update_members_cache()
+
+    def _update_members_cache(cls):
+        cls._eenum_mask_ = cls.mask_of(cls._eenum_members_)
+        cls._eenum_ordered_ = tuple(cls._sorted_members())
+        cls._eenum_mask_cache_ = {cls._eenum_mask_: cls._eenum_ordered_}
+
+    def _sorted_members(cls):
+        try:  # Try to sort it by value...
+            return sorted(cls._eenum_members_, key=lambda m: m.value)
+        except TypeError:  # .. if we can't sort it by definition order
+            # Ordering information is implicitly stored in the ordering of value_to_inst.
+            return [m for m in cls._eenum_data_.value_to_inst.values()
+                    if m in cls._eenum_members_]
 
     def _init_members_from_ns(cls, ns: dict[str, object],
                               possible_members: set[ExtendableEnum[T]] | None,
@@ -257,10 +283,36 @@ class ExtendableEnumMeta(type, Generic[T]):
         return cls._eenum_top_ is cls
 
     def __contains__(cls, item) -> TypeGuard[Self]:
-        return item in cls._eenum_members_
+        # The bit check is much faster than hashing the item for a set lookup
+        return bool(getattr(item, '_eenum_bit_', 0) & cls._eenum_mask_
+                    and item._eenum_top_ is cls._eenum_top_)
 
     def has_instance(cls, item) -> TypeGuard[Self]:
-        return item in cls
+        return bool(getattr(item, '_eenum_bit_', 0) & cls._eenum_mask_
+                    and item._eenum_top_ is cls._eenum_top_)
+
+    # region bitmasks
+    def get_mask(cls) -> int:
+        """Returns the bitmask of all the members of this class"""
+        return cls._eenum_mask_
+
+    def mask_of(cls, items: Iterable[ExtendableEnum[T]]) -> int:
+        """Returns the bitmask representing ``items``. These must be instances
+        from this enum tree (but not necessarily of this class)"""
+        mask = 0
+        for m in items:
+            mask |= m._eenum_bit_
+        return mask
+
+    def members_in_mask(cls, mask: int) -> tuple[Self, ...]:
+        """Returns the members of this class that are in ``mask``, in the
+        same order as iterating over the class"""
+        mask &= cls._eenum_mask_
+        if (result := cls._eenum_mask_cache_.get(mask)) is None:
+            result = cls._eenum_mask_cache_[mask] = tuple(
+                m for m in cls._eenum_ordered_ if m._eenum_bit_ & mask)
+        return result
+    # endregion
 
     def __getitem__(cls: type[ExtendableEnum[T]], item):
         if cls is ExtendableEnum:
@@ -272,16 +324,10 @@ class ExtendableEnumMeta(type, Generic[T]):
         return inst
 
     def __iter__(cls):
-        try:  # Try to sort it by value...
-            ls = sorted(cls._eenum_members_, key=lambda m: m.value)
-        except TypeError:  # .. if we can't sort it by definition order
-            # Ordering information is implicitly stored in the ordering of value_to_inst.
-            ls = [m for m in cls._eenum_data_.value_to_inst.values()
-                  if m in cls._eenum_members_]
-        yield from ls
+        return iter(cls._eenum_ordered_)
 
     def __len__(cls):
-        return len(cls._eenum_members_)
+        return len(cls._eenum_ordered_)
 
 
 class ExtendableEnum(Generic[T], metaclass=ExtendableEnumMeta):
@@ -293,6 +339,7 @@ class ExtendableEnum(Generic[T], metaclass=ExtendableEnumMeta):
     #  tries to find a sensible 'more specific class' (currently the one
     #  with the least other members)
     _eenum_canonical_class_: ExtendableEnumMeta[T]
+    _eenum_bit_: int  # Set when registered in the EnumHierarchyData
     _init_ran_: bool = False
 
     _eenum_special_: bool = True  # ClassVar
@@ -329,19 +376,29 @@ class ExtendableEnum(Generic[T], metaclass=ExtendableEnumMeta):
         # noinspection PyProtectedMember
         return self._eenum_top_ == other._eenum_top_ and self.value == other.value
 
+    def __reduce__(self):
+        # Look the member up again so there's still only one of each
+        return type(self), (self.name,)
+
     def __hash__(self):
-        # Value because name could have aliases
-        return hash((self._eenum_top_, self.value))
+        # Value because name could have aliases. Cached because members are
+        #  hashed a lot (e.g. as Counter keys) and can't change
+        try:
+            return self._eenum_hash_
+        except AttributeError:
+            h = self._eenum_hash_ = hash((self._eenum_top_, self.value))
+            return h
 
     @classmethod
     def has_instance(cls, inst: object) -> TypeGuard[Self]:
-        return inst in cls
+        return bool(getattr(inst, '_eenum_bit_', 0) & cls._eenum_mask_
+                    and inst._eenum_top_ is cls._eenum_top_)
 
     # Just for the typing (doesn't work properly on the __iter__ as it's
     #  defined on the metaclass)
     @classmethod
     def members(cls) -> tuple[Self, ...]:
-        return tuple(cls)  # Already iterable
+        return cls._eenum_ordered_  # Precomputed (and immutable)
 
     def _on_adopted_(self, into: ExtendableEnumMeta[T]):
         if (self._eenum_canonical_class_ is None
@@ -4,10 +4,12 @@ import random
 import time
 from dataclasses import dataclass
 
+from . import profiling
 from .enums import *
 from .ifrontend import IFrontend
 from .player import Player
 from .ruleset import IRuleset
+from .state_listener import StateListener
 
 
 @dataclass
@@ -34,8 +36,17 @@ class Game:
     #     out) and it requires a lot of ugly special cases.
     _ser_exclude_ = ('frontend', 'ruleset')  # TODO: maybe include ruleset?
 
+    # Not a field (so not serialised), see checkpoint.Checkpointer
+    checkpointer = None
+    # Not a field either (so no annotation): a tuple of StateListener,
+    #  see add_state_listener()
+    state_listeners = ()
+
     def __init__(self, n_players: int, frontend: IFrontend, ruleset: IRuleset,
                  seed: int | str = None):
+        if n_players > ruleset.max_players():
+            raise ValueError(f"The decks only have enough cards for "
+                             f"{ruleset.max_players()} players")
         self.frontend = frontend
         self.ruleset = ruleset
         if seed is None:
@@ -55,18 +66,67 @@ class Game:
         for p in self.players:
             p.init_cards()
 
+    def clone(self, frontend: IFrontend) -> Game:
+        """A copy of this game that uses ``frontend``. Only the mutable state
+        (players, their cards and resources) is copied: the ruleset, card
+        effects/costs and locations are shared. State listeners and the
+        checkpointer aren't copied."""
+        game = Game.__new__(Game)
+        game.frontend = frontend
+        game.ruleset = self.ruleset
+        game.n_players = self.n_players
+        game.seed = self.seed
+        game.round_num = self.round_num
+        game.turn_num = self.turn_num
+        game.curr_player_idx = self.curr_player_idx
+        # The sets are never changed (only replaced) so can be shared
+        game.moon_phases = (None if self.moon_phases is None
+                            else list(self.moon_phases))
+        game.players = [p.clone(game) for p in self.players]
+        game.players_ranked = game.winners = None
+        if self.players_ranked is not None:
+            game.players_ranked = [game.players[p.idx] for p in self.players_ranked]
+        if self.winners is not None:
+            game.winners = [game.players[p.idx] for p in self.winners]
+        frontend.register_game(game)
+        return game
+
+    def add_state_listener(self, listener: StateListener):
+        self.state_listeners = (*self.state_listeners, listener)
+
+    def remove_state_listener(self, listener: StateListener):
+        self.state_listeners = tuple(
+            lst for lst in self.state_listeners if lst is not listener)
+
     def run_game(self):
-        for self.round_num in range(3):
-            self.do_round()
+        profiling.on_game_started(self)
+        self._play_from(0, 0, 0, resuming=False)
+
+    def resume_game(self):
+        """Carry on with a game restored at the start of a player's turn
+        (see ``checkpoint.restore_game``)"""
+        profiling.on_game_started(self)
+        self._play_from(self.round_num, self.turn_num, self.curr_player_idx,
+                        resuming=True)
+
+    def _play_from(self, first_round: int, first_turn: int, first_player: int,
+                   resuming: bool):
+        for self.round_num in range(first_round, 3):
+            self.do_round(first_turn, first_player, resuming)
+            first_turn, first_player, resuming = 0, 0, False
         self.count_points()
         self.frontend.register_result(self.winners)
-
-    def do_round(self):
-        self.prepare_round()
-        for self.turn_num in range(6):
-            if self.turn_num != 0:
+        profiling.on_game_finished(self)
+
+    def do_round(self, first_turn: int = 0, first_player: int = 0,
+                 resuming: bool = False):
+        if not resuming:
+            self.prepare_round()
+        for self.turn_num in range(first_turn, 6):
+            if self.turn_num != 0 and not resuming:
                 self.rotate_cards()
-            self.do_turn()
+            self.do_turn(first_player)
+            first_player, resuming = 0, False
 
     def prepare_round(self):
         self.prepare_hands()
@@ -95,14 +155,25 @@ class Game:
     def rotate_cards(self):
         by = self.ruleset.get_swap_dirn(self.round_num)
         hands_old = [p.hand for p in self.players]
+        # The cards don't go through Location.put()/clear() so tell the listeners here
+        for listener in self.state_listeners:
+            for hand in hands_old:
+                for c in hand.values():
+                    listener.on_card_removed(self, c.location, c)
         for i, p in enumerate(self.players):
             # (i+by)-th player gets from i-th player so i-th player get from (i-by)-th
             p.hand = p.posses_area_obj(hands_old[(i - by) % self.n_players])
+        for listener in self.state_listeners:
+            for p in self.players:
+                for c in p.hand.values():
+                    listener.on_card_put(self, c.location, c)
 
-    def do_turn(self):
+    def do_turn(self, first_player: int = 0):
         # TODO: hooks for UI to display state changes
-        for self.curr_player_idx, p in enumerate(self.players):
-            p.do_turn()
+        for self.curr_player_idx in range(first_player, self.n_players):
+            if self.checkpointer is not None:
+                self.checkpointer.on_turn_start(self)
+            self.players[self.curr_player_idx].do_turn()
 
     def count_points(self):
         for p in self.players:
@@ -0,0 +1,161 @@
+"""journal.py - Undoing changes to the game state (make/unmake for search).
+
+A ``MoveJournal`` records every change to the game as it is made (using the
+``StateListener`` hooks) so that they can be undone back to a ``mark()`` in
+O(number of changes), which is usually much cheaper than ``Game.clone()``.
+Anything that changes the state goes through those hooks, including
+effects made of other effects (e.g. ``MoveChosenAndExecNewColor``).
+
+Usage::
+
+    journal = MoveJournal(game)
+    mark = journal.mark()
+    ...  # Play on, e.g. in a frontend
+    journal.undo(mark)  # Back to exactly the state at mark()
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .enums import AnyResource, MoonPhase
+from .state_listener import StateListener
+
+if TYPE_CHECKING:
+    from .card import Card
+    from .common import Location
+    from .game import Game
+    from .player import Player
+
+__all__ = ['MoveJournal', 'JournalMark']
+
+
+# The kinds of journal entries
+_PUT = 0
+_REMOVED = 1
+_RESOURCE = 2
+_MARKERS = 3
+
+
+@dataclass(frozen=True)
+class JournalMark:
+    n_entries: int
+    # The attributes that aren't reported to listeners are saved instead
+    round_num: int
+    turn_num: int
+    curr_player_idx: int
+    moon_phases: list[set[MoonPhase]] | None
+    players_ranked: list[Player] | None
+    winners: list[Player] | None
+    final_scores: tuple[int | None, ...]
+
+
+class MoveJournal(StateListener):
+    def __init__(self, game: Game):
+        self.game = game
+        self.entries: list[tuple] = []
+        game.add_state_listener(self)
+
+    def detach(self):
+        self.game.remove_state_listener(self)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def mark(self) -> JournalMark:
+        game = self.game
+        return JournalMark(len(self.entries), game.round_num, game.turn_num,
+                           game.curr_player_idx, game.moon_phases,
+                           game.players_ranked, game.winners,
+                           tuple(p.final_score for p in game.players))
+
+    def undo(self, mark: JournalMark):
+        """Undo all the changes since ``mark``. Other state listeners are
+        told about the changes made by undoing them."""
+        game = self.game
+        if mark.n_entries > len(self.entries):
+            raise ValueError("Mark is newer than the journal (already undone?)")
+        others = [lst for lst in game.state_listeners if lst is not self]
+        entries = self.entries
+        while len(entries) > mark.n_entries:
+            kind, *args = entries.pop()
+            if kind == _PUT:
+                self._undo_put(others, *args)
+            elif kind == _REMOVED:
+                self._undo_remove(others, *args)
+            elif kind == _RESOURCE:
+                self._undo_resource(others, *args)
+            else:
+                self._undo_markers(others, *args)
+        game.round_num = mark.round_num
+        game.turn_num = mark.turn_num
+        game.curr_player_idx = mark.curr_player_idx
+        game.moon_phases = mark.moon_phases
+        game.players_ranked = mark.players_ranked
+        game.winners = mark.winners
+        for p, score in zip(game.players, mark.final_scores):
+            p.final_score = score
+
+    @contextmanager
+    def trial(self):
+        """Undo everything done in the ``with`` block when it exits"""
+        mark = self.mark()
+        try:
+            yield mark
+        finally:
+            self.undo(mark)
+
+    def clear(self):
+        """Forget the changes so far (invalidating all marks)"""
+        self.entries = []
+
+    # region undoing
+    def _undo_put(self, others: list[StateListener], location: Location, card: Card):
+        area = self.game.get_areas_for(location.player)[location.area]
+        popped = area.pop(location.key)
+        assert popped is card
+        for lst in others:
+            lst.on_card_removed(self.game, location, card)
+
+    def _undo_remove(self, others: list[StateListener], location: Location, card: Card):
+        area = self.game.get_areas_for(location.player)[location.area]
+        area[location.key] = card
+        # Areas are in order of key so move the later cards after this one
+        for k in [k for k in area if k > location.key]:
+            area.move_to_end(k)
+        card.location = location
+        for lst in others:
+            lst.on_card_put(self.game, location, card)
+
+    def _undo_resource(self, others: list[StateListener], player: Player,
+                       resource: AnyResource, old: int, new: int):
+        if old == 0:
+            # The Counter operations never leave zero counts
+            player.resources.pop(resource, None)
+        else:
+            player.resources[resource] = old
+        for lst in others:
+            lst.on_resource_changed(player, resource, new, old)
+
+    def _undo_markers(self, others: list[StateListener], card: Card, old: int, new: int):
+        card.markers = old
+        for lst in others:
+            lst.on_markers_changed(self.game, card, new, old)
+    # endregion
+
+    # region StateListener
+    def on_card_put(self, game: Game, location: Location, card: Card):
+        self.entries.append((_PUT, location, card))
+
+    def on_card_removed(self, game: Game, location: Location, card: Card):
+        self.entries.append((_REMOVED, location, card))
+
+    def on_resource_changed(self, player: Player, resource: AnyResource,
+                            old: int, new: int):
+        self.entries.append((_RESOURCE, player, resource, old, new))
+
+    def on_markers_changed(self, game: Game, card: Card, old: int, new: int):
+        self.entries.append((_MARKERS, card, old, new))
+    # endregion
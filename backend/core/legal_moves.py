@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from collections import Counter
+from typing import Collection, Literal
+
+from . import payments
+from .card import Card, CardCost, EffectExecInfo
+from .common import ResourceFilter, CardTypeFilter, AdjacenciesMappingT
+from .enums import Color, Area, AnyResource, PlaceableCardType
+from .player import Player
+
+__all__ = ['LegalMoves']
+
+
+# noinspection PyMethodMayBeStatic
+class LegalMoves:
+    """Lists the answers a frontend could legally give to each ``IFrontend``
+    decision. The methods have the same names and arguments as the
+    corresponding ``IFrontend`` method so that they can be dispatched
+    generically using ``legal_moves.options(kind, *args)``.
+
+    The answers allowed are those that ``JsonAdapter`` would accept from a
+    client (e.g. ``None`` is only allowed where the API allows ``null``).
+    Options are always returned in a deterministic order."""
+
+    def options(self, kind: str, *args) -> list:
+        return getattr(self, kind)(*args)
+
+    def get_action_type(self, player: Player) -> list[Literal['buy', 'execute']]:
+        if len(player.affordable_cards()) != 0:
+            return ['buy', 'execute']
+        return ['execute']
+
+    def get_discard(self, player: Player) -> list[Card]:
+        return player.cards_of_type(Area.HAND)
+
+    def get_card_buy(self, player: Player) -> list[Card]:
+        return player.affordable_cards()
+
+    def get_card_payment(self, player: Player, cost: CardCost) -> list[Counter[AnyResource]]:
+        return payments.payments(cost, player.resources)
+
+    def choose_color_exec(self, info: EffectExecInfo, n_times: int) -> list[Color]:
+        return list(Color.members())
+
+    def choose_excl_color(self, info: EffectExecInfo,
+                          top_colors: Collection[Color]) -> list[Color]:
+        return sorted(top_colors, key=lambda c: c.value)
+
+    def get_foreach_color(self, info: EffectExecInfo) -> list[Color]:
+        return list(Color.members())
+
+    def choose_from_discard(self, info: EffectExecInfo, target: Player,
+                            filters: CardTypeFilter) -> list[Card | None]:
+        cards = [c for c in target.cards_of_type(Area.DISCARD)
+                 if filters.is_allowed(c.card_type)]
+        # The API can't express 'no card' so only allow it if it is forced
+        return cards if len(cards) != 0 else [None]
+
+    def choose_card_exec(self, info: EffectExecInfo, n_times: int,
+                         discard: bool = False) -> list[Card]:
+        return [c for color in Color.members()
+                for c in info.player.cards_of_type(color)]
+
+    def get_spend(self, info: EffectExecInfo, filters: ResourceFilter,
+                  amount: int) -> list[Counter[AnyResource] | None]:
+        return [*payments.spends(info.player.resources, filters, amount), None]
+
+    def choose_card_move(self, info: EffectExecInfo,
+                         adjacencies: AdjacenciesMappingT) -> list[Card | None]:
+        return [c for color in Color.members()
+                if len(adjacencies.get(color, ())) != 0
+                for c in info.player.cards_of_type(color, include_starting=False)
+                ] + [None]
+
+    def choose_move_where(self, info: EffectExecInfo, card_to_move: Card,
+                          possibilities: Collection[PlaceableCardType]
+                          ) -> list[PlaceableCardType | None]:
+        return sorted(possibilities, key=lambda c: c.value) + [None]
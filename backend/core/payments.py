@@ -0,0 +1,161 @@
+"""payments.py - Finding (or counting) the ways to pay for things.
+
+Resources are passed around as ``Counter`` objects but are converted to a
+'resource vector' (a tuple with the amount of each ``AnyResource``, in
+enum order) internally so that the results can be memoised on
+``(cost, resources)``. Results are returned as new ``Counter`` objects in
+a deterministic order (sorted by resource vector)."""
+
+from __future__ import annotations
+
+import functools
+import itertools
+from collections import Counter
+from typing import Mapping, TYPE_CHECKING
+
+from .enums import AnyResource
+
+if TYPE_CHECKING:
+    from .card import CardCost
+    from .common import ResourceFilter
+
+__all__ = ['ResourceVectorT', 'resource_vector', 'vector_to_counter',
+           'spends', 'payments', 'count_spends', 'count_payments', 'spend_at',
+           'payment_at', 'can_afford', 'can_afford_vector']
+
+ResourceVectorT = tuple[int, ...]
+
+_CACHE_SIZE = 4096
+
+
+def resource_vector(resources: Mapping[AnyResource, int]) -> ResourceVectorT:
+    return tuple([max(resources.get(r, 0), 0) for r in AnyResource.members()])
+
+
+def vector_to_counter(vec: ResourceVectorT) -> Counter[AnyResource]:
+    return Counter({r: n for r, n in zip(AnyResource.members(), vec) if n > 0})
+
+
+def spends(resources: Mapping[AnyResource, int], filters: ResourceFilter,
+           amount: int) -> list[Counter[AnyResource]]:
+    """All the ways to take exactly ``amount`` resources allowed by
+    ``filters`` out of ``resources``"""
+    return [vector_to_counter(v) for v in _spends(
+        resource_vector(resources), filters.mask, amount)]
+
+
+def payments(cost: CardCost, resources: Mapping[AnyResource, int]
+             ) -> list[Counter[AnyResource]]:
+    """All the distinct payments for ``cost`` that can be made out of
+    ``resources`` (i.e. those accepted by ``cost.matches_exact``)"""
+    return [vector_to_counter(v) for v in _payments(
+        cost, resource_vector(resources))]
+
+
+def count_payments(cost: CardCost, resources: Mapping[AnyResource, int]) -> int:
+    """Same as ``len(payments(cost, resources))`` but without listing them"""
+    return _count_payments(cost, resource_vector(resources))
+
+
+def count_spends(resources: Mapping[AnyResource, int], filters: ResourceFilter,
+                 amount: int) -> int:
+    return len(_spends(resource_vector(resources), filters.mask, amount))
+
+
+def spend_at(resources: Mapping[AnyResource, int], filters: ResourceFilter,
+             amount: int, index: int) -> Counter[AnyResource]:
+    """Same as ``spends(...)[index]`` but without making all the others"""
+    return vector_to_counter(_spends(resource_vector(resources), filters.mask, amount)[index])
+
+
+def payment_at(cost: CardCost, resources: Mapping[AnyResource, int],
+               index: int) -> Counter[AnyResource]:
+    """Same as ``payments(...)[index]`` but without making all the others"""
+    return vector_to_counter(_payments(cost, resource_vector(resources))[index])
+
+
+def can_afford(cost: CardCost, resources: Mapping[AnyResource, int]) -> bool:
+    return can_afford_vector(cost, resource_vector(resources))
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def can_afford_vector(cost: CardCost, vec: ResourceVectorT) -> bool:
+    for color_filter, n in cost.possibilities.items():
+        if _total_allowed(vec, color_filter.mask) >= n:
+            return True
+    return False
+
+
+# region implementation
+def _total_allowed(vec: ResourceVectorT, mask: int):
+    return sum([n for r, n in zip(AnyResource.members(), vec)
+                if r._eenum_bit_ & mask])
+
+
+def _caps(vec: ResourceVectorT, mask: int) -> list[tuple[int, int]]:
+    """(vector index, amount held) of the allowed resources that we have"""
+    return [(i, n) for i, (r, n) in enumerate(zip(AnyResource.members(), vec))
+            if n > 0 and r._eenum_bit_ & mask]
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _spends(vec: ResourceVectorT, mask: int, amount: int) -> tuple[ResourceVectorT, ...]:
+    out: list[ResourceVectorT] = []
+    _spends_inner(_caps(vec, mask), 0, amount, [0] * len(vec), out)
+    return tuple(sorted(out))
+
+
+def _spends_inner(caps: list[tuple[int, int]], i: int, remaining: int,
+                  curr: list[int], out: list[ResourceVectorT]):
+    if remaining == 0:
+        out.append(tuple(curr))
+        return
+    if i == len(caps):
+        return
+    idx, have = caps[i]
+    for n in range(min(have, remaining), -1, -1):
+        curr[idx] = n
+        _spends_inner(caps, i + 1, remaining - n, curr, out)
+    curr[idx] = 0
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _payments(cost: CardCost, vec: ResourceVectorT) -> tuple[ResourceVectorT, ...]:
+    result: set[ResourceVectorT] = set()
+    for color_filter, n in cost.possibilities.items():
+        result.update(_spends(vec, color_filter.mask, n))
+    return tuple(sorted(result))
+
+
+@functools.lru_cache(maxsize=_CACHE_SIZE)
+def _count_payments(cost: CardCost, vec: ResourceVectorT) -> int:
+    # The payments for different filters can only overlap if they have the
+    #  same amount. Those that do overlap are exactly the payments for the
+    #  intersection of the filters so use inclusion-exclusion on those.
+    masks_by_amount: dict[int, list[int]] = {}
+    for color_filter, n in cost.possibilities.items():
+        masks_by_amount.setdefault(n, []).append(color_filter.mask)
+    total = 0
+    for n, masks in masks_by_amount.items():
+        for k in range(1, len(masks) + 1):
+            sign = 1 if k % 2 == 1 else -1
+            for combo in itertools.combinations(masks, k):
+                mask = functools.reduce(int.__and__, combo)
+                total += sign * _count_bounded([have for _, have in _caps(vec, mask)], n)
+    return total
+
+
+def _count_bounded(caps: list[int], amount: int) -> int:
+    """Number of ways to choose ``0 <= x[i] <= caps[i]`` with ``sum(x) == amount``"""
+    ways = [1] + [0] * amount  # ways[s] = ways to make s using the caps so far
+    for cap in caps:
+        new_ways = [0] * (amount + 1)
+        running = 0  # Sliding window sum of ways[s - cap : s + 1]
+        for s in range(amount + 1):
+            running += ways[s]
+            if s - cap - 1 >= 0:
+                running -= ways[s - cap - 1]
+            new_ways[s] = running
+        ways = new_ways
+    return ways[amount]
+# endregion
@@ -4,6 +4,7 @@ from collections import Counter, OrderedDict
 from dataclasses import dataclass, replace as d_replace
 from typing import Callable, TYPE_CHECKING, Sequence, MutableSequence
 
+from . import payments
 from .card import Card, CardTemplate, CardCost
 from .enums import *
 
@@ -36,15 +37,35 @@ class Player:
 
     _ser_exclude_ = ('game',)
 
+    # Memo for affordable_cards() (not fields so not serialised): whether
+    #  each hand card could be paid for with the resources at _afford_vec
+    _afford_vec = None
+    _afford_index = None
+
     @classmethod
     def new(cls, idx: int, game: Game):
         return cls(idx, game, {a: OrderedDict() for a in Area.members()}, Counter())
 
+    def clone(self, game: Game):
+        """A copy of this player (and its cards) for ``game``, see ``Game.clone``"""
+        new_card = Card.__new__
+        areas = {}
+        for area, cards in self.areas.items():
+            areas[area] = copied = OrderedDict()
+            for k, c in cards.items():
+                # Shares the (immutable) effect, cost, template and location
+                copied[k] = card = new_card(Card)
+                card.__dict__.update(c.__dict__)
+        return Player(self.idx, game, areas, self.resources.copy(), self.final_score)
+
     def init_cards(self):  # Should only be called straight after, or in, new()
         for c_template in self.ruleset.get_starting_cards():
             c = c_template.instantiate()
             self.place_card(c)
-        self.resources |= self.ruleset.get_starting_resources()
+        starting = self.ruleset.get_starting_resources()
+        old = self._resources_before(starting)
+        self.resources |= starting
+        self._on_resources_changed(old)
 
     def place_card(self, card: Card):
         card_type = card.card_type
@@ -113,7 +134,51 @@ class Player:
     def pay_for_card(self, cost: CardCost):
         payment = self.frontend.get_card_payment(self, cost)
         assert cost.matches_exact(payment)
-        self.resources -= payment
+        self.spend_resources(payment)
+
+    def gain_resource(self, resource: AnyResource, amount: int):
+        old = self.resources[resource]
+        self.resources[resource] += amount
+        for listener in self.game.state_listeners:
+            listener.on_resource_changed(self, resource, old, old + amount)
+
+    def spend_resources(self, spent: Counter[AnyResource]):
+        old = self._resources_before(spent)
+        self.resources -= spent
+        self._on_resources_changed(old)
+
+    def _resources_before(self, changes: Counter[AnyResource]):
+        if not self.game.state_listeners:
+            return None
+        return {r: self.resources[r] for r in changes}
+
+    def _on_resources_changed(self, old: dict[AnyResource, int] | None):
+        if old is None:
+            return
+        for listener in self.game.state_listeners:
+            for r, n in old.items():
+                listener.on_resource_changed(self, r, n, self.resources[r])
+
+    def can_afford(self, cost: CardCost):
+        return payments.can_afford(cost, self.resources)
+
+    def affordable_cards(self) -> list[Card]:
+        """The cards in our hand that we can currently pay for.
+
+        The answers from the previous call are only reused if our resources
+        haven't changed since then (it isn't kept up to date as they
+        change); otherwise every card is checked again, using the memoised
+        ``payments.can_afford_vector``."""
+        vec = payments.resource_vector(self.resources)
+        old_index = self._afford_index if vec == self._afford_vec else None
+        index: dict[Card, bool] = {}
+        for c in self.hand.values():
+            if old_index is None or (ok := old_index.get(c)) is None:
+                ok = payments.can_afford_vector(c.cost, vec)
+            index[c] = ok
+        # Only the current hand is kept, so it doesn't keep old cards alive
+        self._afford_vec, self._afford_index = vec, index
+        return [c for c, ok in index.items() if ok]
 
     def action_execute(self):
         self.frontend.get_discard(self).discard(self.game, self)
@@ -0,0 +1,319 @@
+"""profiling.py - Opt-in profiler for card/effect execution.
+
+When enabled, ``Card.execute`` and the ``execute`` method of every
+``CardEffect`` subclass are replaced by timing wrappers, and the
+``frontend`` properties of ``Player``/``EffectExecInfo`` return a proxy that
+measures how long is spent blocked in the frontend. When disabled, the
+original methods are put back so there is no overhead at all.
+
+Usage::
+
+    with EffectProfiler(dump_path='effects-{pid}.json') as prof:
+        game.run_game()  # Report is dumped after each game
+    print(prof.format_report())
+
+Setting the ``ARCANAR_PROFILE_EFFECTS`` environment variable to a path
+(which may contain ``{pid}``) enables it for every game run by the process,
+which is useful for simulations that run games in many processes. The
+per-process reports can then be combined using ``merge_report_files()``.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import time
+from dataclasses import dataclass, is_dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Mapping
+
+from .card import Card, CardEffect, EffectExecInfo
+from .eenum import ExtendableEnum
+
+if TYPE_CHECKING:
+    from .game import Game
+    from .player import Player
+
+__all__ = ['EffectStats', 'EffectProfiler', 'merge_report_files',
+           'PROFILE_ENV_VAR']
+
+
+PROFILE_ENV_VAR = 'ARCANAR_PROFILE_EFFECTS'
+
+_active: EffectProfiler | None = None
+
+
+@dataclass
+class EffectStats:
+    calls: int = 0
+    total_ns: int = 0  # Inclusive of frontend time and of inner effects
+    frontend_ns: int = 0  # Time spent blocked in frontend calls
+
+    @property
+    def engine_ns(self):
+        return self.total_ns - self.frontend_ns
+
+    def merge(self, other: EffectStats):
+        self.calls += other.calls
+        self.total_ns += other.total_ns
+        self.frontend_ns += other.frontend_ns
+
+    def to_json(self):
+        return {'calls': self.calls, 'total_ns': self.total_ns,
+                'frontend_ns': self.frontend_ns, 'engine_ns': self.engine_ns}
+
+    @classmethod
+    def from_json(cls, j: Mapping[str, int]):
+        return cls(j['calls'], j['total_ns'], j['frontend_ns'])
+
+
+class _OpenFrame:
+    __slots__ = ('stats', 'depth', 'start_ns')
+
+    def __init__(self, stats: EffectStats):
+        self.stats = stats
+        self.depth = 0
+        self.start_ns = 0
+
+
+class _TimedFrontend:
+    """Proxy for a frontend that attributes the time spent in its methods
+    to everything currently executing."""
+
+    def __init__(self, inner: object, profiler: EffectProfiler):
+        self._inner = inner
+        self._profiler = profiler
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._profiler._add_frontend_time(time.perf_counter_ns() - start)
+        return timed
+
+
+class EffectProfiler:
+    def __init__(self, dump_path: str | Path = None):
+        """``dump_path`` may contain ``{pid}`` to get a file per process."""
+        self.dump_path = dump_path
+        self.by_effect: dict[str, EffectStats] = {}
+        self.by_template: dict[str, EffectStats] = {}
+        self.games = 0
+        # Keyed by the stats object's id so recursion into the same
+        #  effect class isn't double counted.
+        self._open: dict[int, _OpenFrame] = {}
+        self._template_keys: dict[int, tuple[Card, str]] = {}
+        self._proxies: dict[int, _TimedFrontend] = {}
+        self._patched: list[tuple[type, str, object]] = []
+
+    # region enable/disable
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disable()
+
+    def enable(self):
+        global _active
+        if _active is not None:
+            raise RuntimeError("Another EffectProfiler is already enabled")
+        _active = self
+        self._patch(Card, 'execute', self._wrap_card_execute(Card.execute))
+        for cls in _all_subclasses(CardEffect):
+            if 'execute' in vars(cls) and not getattr(
+                    vars(cls)['execute'], '__isabstractmethod__', False):
+                self._patch(cls, 'execute', self._wrap_effect_execute(vars(cls)['execute']))
+        from .player import Player
+        for cls in (Player, EffectExecInfo):
+            self._patch(cls, 'frontend', self._wrap_frontend_prop(vars(cls)['frontend']))
+
+    def disable(self):
+        global _active
+        if _active is not self:
+            return
+        for cls, name, orig in reversed(self._patched):
+            setattr(cls, name, orig)
+        self._patched.clear()
+        # Don't keep the frontends and cards alive (only the stats are kept)
+        self._proxies.clear()
+        self._template_keys.clear()
+        self._open.clear()
+        _active = None
+
+    @property
+    def enabled(self):
+        return _active is self
+
+    def _patch(self, cls: type, name: str, new: object):
+        self._patched.append((cls, name, vars(cls)[name]))
+        setattr(cls, name, new)
+    # endregion
+
+    # region wrappers
+    def _wrap_card_execute(self, orig: Callable[[Card, Player], object]):
+        def execute(card: Card, player: Player):
+            frame = self._enter(self.by_template, self._template_key(card))
+            try:
+                return orig(card, player)
+            finally:
+                self._exit(frame)
+        return execute
+
+    def _wrap_effect_execute(self, orig: Callable[[CardEffect, EffectExecInfo], object]):
+        def execute(effect: CardEffect, info: EffectExecInfo):
+            frame = self._enter(self.by_effect, type(effect).__qualname__)
+            try:
+                return orig(effect, info)
+            finally:
+                self._exit(frame)
+        return execute
+
+    def _wrap_frontend_prop(self, orig: property):
+        def frontend(obj):
+            inner = orig.fget(obj)
+            if (proxy := self._proxies.get(id(inner))) is None:
+                proxy = self._proxies[id(inner)] = _TimedFrontend(inner, self)
+            return proxy
+        return property(frontend)
+
+    def _enter(self, table: dict[str, EffectStats], key: str):
+        if (stats := table.get(key)) is None:
+            stats = table[key] = EffectStats()
+        stats.calls += 1
+        if (frame := self._open.get(id(stats))) is None:
+            frame = self._open[id(stats)] = _OpenFrame(stats)
+        if frame.depth == 0:
+            frame.start_ns = time.perf_counter_ns()
+        frame.depth += 1
+        return frame
+
+    def _exit(self, frame: _OpenFrame):
+        frame.depth -= 1
+        if frame.depth == 0:
+            frame.stats.total_ns += time.perf_counter_ns() - frame.start_ns
+            del self._open[id(frame.stats)]
+
+    def _add_frontend_time(self, elapsed_ns: int):
+        for frame in self._open.values():
+            frame.stats.frontend_ns += elapsed_ns
+
+    def _template_key(self, card: Card):
+        # Cached as the description is slow to compute. Keep a reference to
+        #  the card so its id() can't be reused by another card.
+        if (entry := self._template_keys.get(id(card))) is None:
+            entry = self._template_keys[id(card)] = (card, describe_template(card))
+        return entry[1]
+    # endregion
+
+    # region reporting
+    def on_game_finished(self, game: Game):
+        self.games += 1
+        self._template_keys.clear()  # Cards (and their ids) die with the game
+        if self.dump_path is not None:
+            self.dump(self.dump_path)
+
+    def to_json(self):
+        return {
+            'games': self.games,
+            'by_effect': {k: v.to_json() for k, v in sorted(self.by_effect.items())},
+            'by_template': {k: v.to_json() for k, v in sorted(self.by_template.items())},
+        }
+
+    @classmethod
+    def from_json(cls, j: Mapping[str, object]):
+        inst = cls()
+        inst.games = j['games']
+        inst.by_effect = {k: EffectStats.from_json(v) for k, v in j['by_effect'].items()}
+        inst.by_template = {k: EffectStats.from_json(v) for k, v in j['by_template'].items()}
+        return inst
+
+    def merge(self, other: EffectProfiler):
+        """Add the results of ``other`` (e.g. from another process) to this"""
+        self.games += other.games
+        for mine, theirs in ((self.by_effect, other.by_effect),
+                             (self.by_template, other.by_template)):
+            for k, v in theirs.items():
+                mine.setdefault(k, EffectStats()).merge(v)
+        return self
+
+    def dump(self, path: str | Path):
+        path = Path(str(path).format(pid=os.getpid()))
+        path.write_text(json.dumps(self.to_json(), indent=2) + '\n')
+        return path
+
+    def format_report(self, limit: int = 30) -> str:
+        lines = []
+        for title, table in (('Effect class', self.by_effect),
+                             ('Card template', self.by_template)):
+            lines.append(f'{title:<60} {"calls":>9} {"total ms":>10} '
+                         f'{"engine ms":>10} {"frontend ms":>12}')
+            top = sorted(table.items(), key=lambda p: p[1].total_ns, reverse=True)
+            for k, v in top[:limit]:
+                lines.append(f'{k[:60]:<60} {v.calls:>9} {v.total_ns / 1e6:>10.2f} '
+                             f'{v.engine_ns / 1e6:>10.2f} {v.frontend_ns / 1e6:>12.2f}')
+            lines.append('')
+        return '\n'.join(lines)
+    # endregion
+
+
+def merge_report_files(paths: Iterable[str | Path]) -> EffectProfiler:
+    result = EffectProfiler()
+    for p in paths:
+        result.merge(EffectProfiler.from_json(json.loads(Path(p).read_text())))
+    return result
+
+
+def describe_template(card: Card) -> str:
+    """A deterministic (between processes) description of the template
+    ``card`` was created from so that reports can be merged."""
+    return (f'{card.card_type.name} {_stable_repr(card.effect)} '
+            f'cost={_stable_repr(card.cost)}'
+            + (' [always]' if card.always_triggers else '')
+            + (' [starting]' if card.is_starting_card else ''))
+
+
+def _stable_repr(o: object) -> str:
+    # Regular repr() isn't stable between processes as set ordering depends
+    #  on the hash of the eenum class, which is based on its id().
+    if isinstance(o, ExtendableEnum):
+        return o.name
+    if isinstance(o, (set, frozenset)):
+        return '{' + ', '.join(sorted(map(_stable_repr, o))) + '}'
+    if isinstance(o, Mapping):
+        return '{' + ', '.join(sorted(f'{_stable_repr(k)}: {_stable_repr(v)}'
+                                      for k, v in o.items())) + '}'
+    if isinstance(o, (list, tuple)):
+        return '(' + ', '.join(map(_stable_repr, o)) + ')'
+    if is_dataclass(o):
+        args = ', '.join(_stable_repr(getattr(o, f.name))
+                         for f in dataclasses.fields(o) if hasattr(o, f.name))
+        return f'{type(o).__name__}({args})'
+    return repr(o)
+
+
+def _all_subclasses(cls: type) -> list[type]:
+    result = []
+    for sub in cls.__subclasses__():
+        result.append(sub)
+        result.extend(_all_subclasses(sub))
+    return list(dict.fromkeys(result))  # Remove duplicates (multiple inheritance)
+
+
+# region hooks called by Game
+def on_game_started(game: Game):
+    if _active is None and (path := os.environ.get(PROFILE_ENV_VAR)):
+        EffectProfiler(dump_path=path).enable()  # Stays enabled for the process
+
+
+def on_game_finished(game: Game):
+    if _active is not None:
+        _active.on_game_finished(game)
+# endregion
@@ -2,14 +2,14 @@ from __future__ import annotations
 
 import abc
 from collections import Counter
-from typing import Sequence, Collection
+from typing import Sequence, Collection, Mapping
 
 from .card import CardTemplate, CardCost, CardEffect
 from .card_effects import *
 from .common import ResourceFilter
 from .enums import MoonPhase, AnyResource, Color, PlaceableCardType, CardType, Area
 
-__all__ = ['IRuleset', 'DefaultRuleset']
+__all__ = ['IRuleset', 'DefaultRuleset', 'ConfigurableRuleset']
 
 
 class IRuleset(abc.ABC):
@@ -46,6 +46,10 @@ class IRuleset(abc.ABC):
     def get_starting_resources(self) -> Counter[AnyResource]:
         ...
 
+    def max_players(self) -> int:
+        """The most players that every deck has enough cards for"""
+        return min(len(self.get_deck(r)) for r in range(3)) // self.cards_per_player
+
 
 # noinspection PyMethodMayBeStatic
 class DefaultRuleset(IRuleset):
@@ -317,3 +321,59 @@ class DefaultRuleset(IRuleset):
                 Card(s, MoveCardAndRunColor(), Cost(y, 2, 6)),
             ]
         ]
+
+
+class ConfigurableRuleset(DefaultRuleset):
+    """The default ruleset (same cards and adjacencies) with the numbers
+    changed. Anything not given is the same as in ``DefaultRuleset``;
+    ``resources_per_point`` only needs the resources that are different."""
+
+    # A card is used every turn and there are 6 turns in a round, and 2
+    #  moon phases for each of the first 5 (see Game.prepare_moon_phases)
+    MIN_CARDS_PER_PLAYER = 6
+    MIN_MOON_POOL = 10
+
+    def __init__(self, cards_per_player: int = None,
+                 resources_per_point: Mapping[AnyResource, int] = None,
+                 swap_dirns: Sequence[int] = None,
+                 moon_pool: Sequence[MoonPhase] = None,
+                 starting_resources: Mapping[AnyResource, int] = None):
+        if cards_per_player is not None:
+            if cards_per_player < self.MIN_CARDS_PER_PLAYER:
+                raise ValueError(f"cards_per_player must be at least {self.MIN_CARDS_PER_PLAYER}")
+            self.cards_per_player = cards_per_player
+        self._rpp = {r: super(ConfigurableRuleset, self).resources_per_point(r)
+                     for r in AnyResource.members()}
+        if resources_per_point is not None:
+            for r, n in resources_per_point.items():
+                if n == 0:
+                    raise ValueError("resources_per_point can't be 0")
+                self._rpp[AnyResource[r]] = n
+        if swap_dirns is not None and len(swap_dirns) != 3:
+            raise ValueError("swap_dirns must have a direction for each of the 3 rounds")
+        self._swap_dirns = swap_dirns
+        if moon_pool is not None:
+            moon_pool = [MoonPhase[m] for m in moon_pool]
+            if len(moon_pool) < self.MIN_MOON_POOL:
+                raise ValueError(f"moon_pool must have at least {self.MIN_MOON_POOL} phases")
+        self._moon_pool = moon_pool
+        self._starting_resources = None if starting_resources is None else Counter(
+            {AnyResource[r]: n for r, n in starting_resources.items()})
+
+    def get_moon_pool(self) -> Sequence[MoonPhase]:
+        if self._moon_pool is None:
+            return super().get_moon_pool()
+        return list(self._moon_pool)
+
+    def get_swap_dirn(self, round_idx: int) -> int:
+        if self._swap_dirns is None:
+            return super().get_swap_dirn(round_idx)
+        return self._swap_dirns[round_idx]
+
+    def resources_per_point(self, r: AnyResource) -> int:
+        return self._rpp[r]
+
+    def get_starting_resources(self) -> Counter[AnyResource]:
+        if self._starting_resources is None:
+            return super().get_starting_resources()
+        return self._starting_resources.copy()
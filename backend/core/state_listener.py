@@ -0,0 +1,47 @@
+"""state_listener.py - Being told about every change to the game state.
+
+Listeners are added using ``Game.add_state_listener()``. They are told
+about cards being put into/removed from locations, resource counts and
+markers changing, and also about cards being executed (which doesn't change
+the state by itself, but is useful for statistics). The turn-related
+attributes (``round_num``, ``turn_num``, ``curr_player_idx``,
+``moon_phases``) aren't reported as they are cheap to read directly.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .enums import AnyResource
+
+if TYPE_CHECKING:
+    from .card import Card
+    from .common import Location
+    from .game import Game
+    from .player import Player
+
+__all__ = ['StateListener']
+
+
+class StateListener:
+    """Base class for listeners, all the methods do nothing by default"""
+
+    def on_card_put(self, game: Game, location: Location, card: Card):
+        """``card`` was put at ``location`` (``card.location`` may not
+        have been updated yet)"""
+
+    def on_card_removed(self, game: Game, location: Location, card: Card):
+        """``card`` was removed from ``location``"""
+
+    def on_resource_changed(self, player: Player, resource: AnyResource,
+                            old: int, new: int):
+        ...
+
+    def on_markers_changed(self, game: Game, card: Card, old: int, new: int):
+        ...
+
+    def on_card_executing(self, game: Game, card: Card, player: Player):
+        """``card`` is about to be executed for ``player``"""
+
+    def on_card_executed(self, game: Game, card: Card, player: Player):
+        """``card`` has finished being executed for ``player``"""
@@ -0,0 +1,128 @@
+"""zobrist.py - 64-bit hashes of game states, kept up to date as the game runs.
+
+The hash is the XOR of a random key for each part of the state: each card
+(by template, player, area and key) and its markers, each player's
+resource counts and the current round/turn/player/moon phases. When the
+state changes, only the keys for the parts that changed are XORed in/out
+so keeping it up to date is cheap. Equal states always have equal hashes
+(in every process, the keys don't depend on the hash seed).
+
+Usage::
+
+    hasher = ZobristHasher(game)  # Adds itself as a state listener
+    game.run_game()  # (or in a frontend) ... hasher.value ...
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .catalog import TemplateCatalog
+from .enums import AnyResource
+from .state_listener import StateListener
+
+if TYPE_CHECKING:
+    from .card import Card
+    from .common import Location
+    from .game import Game
+    from .player import Player
+
+__all__ = ['ZobristHasher', 'splitmix64']
+
+
+_MASK64 = (1 << 64) - 1
+
+# What each key is for (the first part of the key)
+_CARD = 1
+_MARKERS = 2
+_RESOURCE = 3
+_TURN = 4
+_MOON = 5
+
+
+def splitmix64(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class ZobristHasher(StateListener):
+    def __init__(self, game: Game, seed: int = 0):
+        self.game = game
+        self.seed = seed
+        self._catalog = TemplateCatalog.for_ruleset(game.ruleset)
+        self._keys: dict[tuple[int, ...], int] = {}
+        self._hash = self.compute_state_hash()
+        game.add_state_listener(self)
+
+    def detach(self):
+        self.game.remove_state_listener(self)
+
+    @property
+    def value(self) -> int:
+        """The hash of the current state"""
+        return self._hash ^ self._turn_hash()
+
+    def recompute(self) -> int:
+        """Compute the hash from scratch (slow, mainly for checking)"""
+        return self.compute_state_hash() ^ self._turn_hash()
+
+    def compute_state_hash(self):
+        h = 0
+        for player in self.game.players:
+            for area, cards in player.areas.items():
+                for key, card in cards.items():
+                    h ^= self._card_hash(player.idx, area.value, key, card)
+            for r, n in player.resources.items():
+                h ^= self._resource_hash(player.idx, r, n)
+        return h
+
+    def key(self, *parts: int) -> int:
+        if (k := self._keys.get(parts)) is None:
+            k = self.seed
+            for p in parts:
+                k = splitmix64(k ^ p)
+            self._keys[parts] = k
+        return k
+
+    def _card_hash(self, player: int, area: int, key: int, card: Card):
+        h = self.key(_CARD, player, area, key, self._catalog.id_of(card))
+        if card.markers:
+            h ^= self.key(_MARKERS, player, area, key, card.markers)
+        return h
+
+    def _resource_hash(self, player: int, resource: AnyResource, n: int):
+        # So that a 0 count is the same as no count at all
+        return self.key(_RESOURCE, player, resource.value, n) if n else 0
+
+    def _turn_hash(self):
+        game = self.game
+        h = self.key(_TURN, game.round_num, game.turn_num, game.curr_player_idx)
+        if game.moon_phases is not None:
+            for moon in game.curr_moons:
+                h ^= self.key(_MOON, moon.value)
+        return h
+
+    # region StateListener
+    def on_card_put(self, game: Game, location: Location, card: Card):
+        self._hash ^= self._card_hash(location.player, location.area.value,
+                                      location.key, card)
+
+    def on_card_removed(self, game: Game, location: Location, card: Card):
+        self._hash ^= self._card_hash(location.player, location.area.value,
+                                      location.key, card)
+
+    def on_resource_changed(self, player: Player, resource: AnyResource,
+                            old: int, new: int):
+        self._hash ^= (self._resource_hash(player.idx, resource, old)
+                       ^ self._resource_hash(player.idx, resource, new))
+
+    def on_markers_changed(self, game: Game, card: Card, old: int, new: int):
+        loc = card.location
+        parts = (loc.player, loc.area.value, loc.key)
+        if old:
+            self._hash ^= self.key(_MARKERS, *parts, old)
+        if new:
+            self._hash ^= self.key(_MARKERS, *parts, new)
+    # endregion
@@ -0,0 +1,8 @@
+import setpath
+
+if setpath.setpath():
+    from backend.api.game_server import main
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+from .transposition import *
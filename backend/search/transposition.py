@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import Generic, TypeVar
+
+__all__ = ['TranspositionTable']
+
+T = TypeVar('T')
+
+
+class TranspositionTable(Generic[T]):
+    """A fixed-size table from state hashes (e.g. ``ZobristHasher.value``)
+    to search results. Each hash can only go in one slot so when two
+    collide, the one to keep is chosen by the replacement policy: an entry
+    from an older generation (see ``new_generation()``) is always replaced,
+    otherwise the one searched to the greater ``depth`` is kept."""
+
+    def __init__(self, size: int = 1 << 16):
+        if size <= 0:
+            raise ValueError("size must be positive")
+        # Round up to a power of 2 so the slot is just `hash & mask`
+        size = 1 << (size - 1).bit_length()
+        self.size = size
+        self._mask = size - 1
+        self._hashes: list[int | None] = [None] * size
+        self._values: list[T | None] = [None] * size
+        self._depths = [0] * size
+        self._generations = [0] * size
+        self.generation = 0
+        self.n_entries = 0
+        self.hits = self.misses = self.n_replaced = 0
+
+    def __len__(self):
+        return self.n_entries
+
+    def __contains__(self, h: int):
+        return self._hashes[h & self._mask] == h
+
+    def get(self, h: int, min_depth: int = 0) -> T | None:
+        """The value stored for ``h``, if it was searched to at least ``min_depth``"""
+        slot = h & self._mask
+        if self._hashes[slot] == h and self._depths[slot] >= min_depth:
+            self.hits += 1
+            return self._values[slot]
+        self.misses += 1
+        return None
+
+    def put(self, h: int, value: T, depth: int = 0) -> bool:
+        """Store ``value`` for ``h``. Returns False if the existing entry
+        was kept instead."""
+        slot = h & self._mask
+        prev = self._hashes[slot]
+        if prev is None:
+            self.n_entries += 1
+        elif prev != h and (self._generations[slot] == self.generation
+                            and self._depths[slot] > depth):
+            return False  # Existing one is more valuable
+        elif prev != h:
+            self.n_replaced += 1
+        self._hashes[slot] = h
+        self._values[slot] = value
+        self._depths[slot] = depth
+        self._generations[slot] = self.generation
+        return True
+
+    def new_generation(self):
+        """Mark the current entries as old (e.g. when a new search starts)
+        so they are replaced first. They can still be looked up."""
+        self.generation += 1
+
+    def clear(self):
+        self._hashes = [None] * self.size
+        self._values = [None] * self.size
+        self._depths = [0] * self.size
+        self._generations = [0] * self.size
+        self.n_entries = 0
+        self.hits = self.misses = self.n_replaced = 0
@@ -7,7 +7,7 @@ from .frozendict import FrozenDict  # re-export
 if TYPE_CHECKING:
     from _typeshed import SupportsDunderGT, SupportsDunderLT
 
-__all__ = ['JsonT', 'FrozenDict', 'cmp']
+__all__ = ['JsonT', 'FrozenDict', 'cmp', 'parse_range']
 
 
 T = TypeVar('T')
@@ -35,3 +35,9 @@ def cmp(a, b, key: Callable[[object], Any] = None):
     if a < b:
         return -1
     return +1
+
+
+def parse_range(s: str) -> range:
+    """Parse ``'START:STOP'`` (e.g. a range of game indices on the command line)"""
+    start, stop = s.split(':')
+    return range(int(start), int(stop))
@@ -0,0 +1,32 @@
+"""workers.py - Process pools for the simulations.
+
+The workers are forked so they get the arguments (e.g. ruleset factories,
+lambdas and configurations) without them being pickled; the tasks then
+only need to send small things like the range of games to play.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures as cf
+import multiprocessing
+
+__all__ = ['fork_pool', 'worker_args']
+
+_worker_args: tuple = ()
+
+
+def _init_worker(*args):
+    global _worker_args
+    _worker_args = args
+
+
+def fork_pool(n_workers: int, *args) -> cf.ProcessPoolExecutor:
+    """A pool of ``n_workers`` forked processes in which ``worker_args()``
+    returns ``args``"""
+    return cf.ProcessPoolExecutor(n_workers, multiprocessing.get_context('fork'),
+                                  initializer=_init_worker, initargs=args)
+
+
+def worker_args() -> tuple:
+    """The ``args`` given to ``fork_pool()`` (in a worker process)"""
+    return _worker_args
@@ -0,0 +1,57 @@
+import random
+import unittest
+from collections import Counter
+
+from backend.analytics import PairedSPRT, run_ab_test, mean_score
+from backend.core import DefaultRuleset, AnyResource
+
+
+class _BonusRuleset(DefaultRuleset):
+    def get_starting_resources(self) -> Counter[AnyResource]:
+        return super().get_starting_resources() + Counter({AnyResource.POINTS: 2})
+
+
+class PairedSPRTTest(unittest.TestCase):
+    def _run(self, mean: float, seed: int):
+        rng = random.Random(seed)
+        test = PairedSPRT(0.5, min_n=10)
+        for n in range(1, 10_000):
+            if test.add(rng.gauss(mean, 2)) is not None:
+                return test.decision, n, test
+        self.fail('No decision')
+
+    def test_decisions(self):
+        self.assertEqual(self._run(1.0, 0)[0], 'positive')
+        self.assertEqual(self._run(-1.0, 0)[0], 'negative')
+        self.assertEqual(self._run(0.0, 0)[0], 'null')
+
+    def test_stops_before_fixed_n(self):
+        decision, n, test = self._run(1.0, 1)
+        self.assertLess(n, test.fixed_n())
+        lo, hi = test.confidence_interval()
+        self.assertLess(lo, test.stat.mean)
+        self.assertLess(test.stat.mean, hi)
+
+    def test_bad_delta(self):
+        with self.assertRaises(ValueError):
+            PairedSPRT(0)
+
+
+class ABTest(unittest.TestCase):
+    def test_detects_bonus(self):
+        result = run_ab_test(DefaultRuleset, _BonusRuleset, mean_score, delta=0.5,
+                             max_pairs=200, min_pairs=10, n_workers=1)
+        self.assertEqual(result.decision, 'B')
+        self.assertEqual(result.n_pairs, 10)
+        self.assertGreater(result.diff.mean, 0.5)
+        self.assertIn('Decision: B', result.format())
+
+    def test_workers_match(self):
+        kwargs = dict(metric=mean_score, delta=2.0, max_pairs=12, min_pairs=4)
+        a = run_ab_test(DefaultRuleset, _BonusRuleset, n_workers=1, **kwargs)
+        b = run_ab_test(DefaultRuleset, _BonusRuleset, n_workers=2, **kwargs)
+        self.assertEqual((a.decision, a.n_pairs, a.diff), (b.decision, b.n_pairs, b.diff))
+
+
+if __name__ == '__main__':
+    unittest.main()
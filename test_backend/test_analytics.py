@@ -0,0 +1,84 @@
+import random
+import statistics
+import unittest
+from typing import Sequence, TypeVar
+
+from backend.analytics import RunningStat, CardStats, CardStatsCollector, simulate_card_stats
+from backend.bots import RandomFrontend
+from backend.core import Game, DefaultRuleset, Player
+
+T = TypeVar('T')
+
+
+class _CountingFrontend(RandomFrontend):
+    def __init__(self, seed: int):
+        super().__init__(seed)
+        self.n_buys = 0
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        answer = super().choose(kind, player, options)
+        if kind == 'get_action_type' and answer == 'buy':
+            self.n_buys += 1
+        return answer
+
+
+class RunningStatTest(unittest.TestCase):
+    def test_matches_statistics(self):
+        rng = random.Random(0)
+        values = [rng.gauss(5, 2) for _ in range(1000)]
+        stat = RunningStat.of(values)
+        self.assertEqual(stat.n, 1000)
+        self.assertAlmostEqual(stat.mean, statistics.fmean(values))
+        self.assertAlmostEqual(stat.variance, statistics.variance(values))
+
+    def test_merge(self):
+        rng = random.Random(1)
+        values = [rng.random() * 10 for _ in range(500)]
+        merged = RunningStat()
+        for i in range(0, 500, 70):  # Uneven parts
+            merged.merge(RunningStat.of(values[i:i + 70]))
+        merged.merge(RunningStat())
+        whole = RunningStat.of(values)
+        self.assertEqual(merged.n, whole.n)
+        self.assertAlmostEqual(merged.mean, whole.mean)
+        self.assertAlmostEqual(merged.m2, whole.m2)
+
+
+class CardStatsTest(unittest.TestCase):
+    def test_collects(self):
+        collector = CardStatsCollector()
+        n_buys = 0
+        for seed in range(5):
+            frontend = _CountingFrontend(seed)
+            game = Game(4, frontend, DefaultRuleset(), f'seed-{seed}')
+            collector.attach(game)
+            game.run_game()
+            collector.finish()
+            n_buys += frontend.n_buys
+            self.assertEqual(game.state_listeners, ())
+        stats = collector.stats
+        self.assertEqual(stats.n_games, 5)
+        self.assertEqual(sum([s.bought for s in stats.templates.values()]), n_buys)
+        for s in stats.templates.values():
+            self.assertLessEqual(s.bought, s.dealt)
+            self.assertEqual(s.points.n, s.executions)
+            if s.dealt:
+                # Every player in every game it was dealt in
+                self.assertEqual((s.win_owned.n + s.win_not_owned.n) % 4, 0)
+
+    def test_parallel_matches_serial(self):
+        serial = simulate_card_stats(range(6), n_workers=1)
+        parallel = simulate_card_stats(range(6), n_workers=2)
+        self.assertEqual(parallel.n_games, 6)
+        self.assertEqual(parallel.templates.keys(), serial.templates.keys())
+        for k, s in serial.templates.items():
+            p = parallel.templates[k]
+            self.assertEqual((p.dealt, p.bought, p.executions), (s.dealt, s.bought, s.executions))
+            self.assertAlmostEqual(p.points.mean, s.points.mean)
+            self.assertAlmostEqual(p.win_rate_delta, s.win_rate_delta)
+        # And through JSON
+        self.assertEqual(CardStats.from_json(serial.to_json()).to_json(), serial.to_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+from collections import Counter
+
+from backend.api.json_adapter import JsonAdapter
+from backend.api.json_connection import JsonConnection
+from backend.core import (Game, DefaultRuleset, CardCost, Color, ResourceFilter,
+                          EffectExecInfo)
+
+
+class _RecordingConn(JsonConnection):
+    def __init__(self, replies=()):
+        self.sent = []
+        self.replies = list(replies)
+
+    def send(self, obj):
+        self.sent.append(obj)
+
+    def receive(self):
+        if not self.replies:
+            raise AssertionError("Client was asked for a reply")
+        return self.replies.pop(0)
+
+
+class AutoResolveTest(unittest.TestCase):
+    def make_game(self, auto_resolve=True, replies=()):
+        conn = _RecordingConn(replies)
+        adapter = JsonAdapter(conn, auto_resolve=auto_resolve)
+        game = Game(4, adapter, DefaultRuleset(), seed='1748776970931817000')
+        return game, adapter, conn
+
+    def test_single_payment_resolved(self):
+        game, adapter, conn = self.make_game()
+        player = game.players[0]
+        player.resources = Counter({Color.GREEN: 2, Color.RED: 1})
+        cost = CardCost.color_or_any(Color.GREEN, 2, 4)
+        self.assertEqual(adapter.get_card_payment(player, cost), Counter({Color.GREEN: 2}))
+        adapter.send({'request': 'result'}, thread=False, state=False)
+        self.assertEqual(conn.sent[-1]['auto_resolved'], [{
+            'request': 'card_payment', 'player': 0, 'cost': adapter.ser(cost),
+            'answer': {str(Color.GREEN.value): 2}}])
+        adapter.send({'request': 'shutdown'}, thread=False, state=False)
+        self.assertNotIn('auto_resolved', conn.sent[-1])
+
+    def test_impossible_spend_resolved(self):
+        game, adapter, conn = self.make_game()
+        player = game.players[1]
+        player.resources = Counter({Color.RED: 1})
+        info = EffectExecInfo(next(iter(player.areas[Color.RED].values())), player)
+        self.assertIsNone(adapter.get_spend(info, ResourceFilter({Color.BLUE}), 2))
+        self.assertEqual(len(adapter._auto_resolved), 1)
+
+    def test_single_optional_spend_asked(self):
+        game, adapter, conn = self.make_game(replies=[
+            {'thread': 1, 'spend_resources': None}])
+        player = game.players[1]
+        player.resources = Counter({Color.RED: 1})
+        info = EffectExecInfo(next(iter(player.areas[Color.RED].values())), player)
+        # Declining is still a choice, even though there is only one way to spend
+        self.assertIsNone(adapter.get_spend(info, ResourceFilter({Color.RED}), 1))
+        self.assertEqual(conn.sent[-1]['request'], 'spend_resources')
+        self.assertEqual(adapter._auto_resolved, [])
+
+    def test_choice_still_asked(self):
+        game, adapter, conn = self.make_game(replies=[
+            {'thread': 1, 'card_payment': {str(Color.RED.value): 1}}])
+        player = game.players[0]
+        player.resources = Counter({Color.GREEN: 1, Color.RED: 1})
+        cost = CardCost({ResourceFilter.any_color(): 1})
+        self.assertEqual(adapter.get_card_payment(player, cost), Counter({Color.RED: 1}))
+        self.assertEqual(conn.sent[-1]['request'], 'card_payment')
+
+    def test_disabled_by_default(self):
+        game, adapter, conn = self.make_game(auto_resolve=False, replies=[
+            {'thread': 1, 'card_payment': {str(Color.GREEN.value): 2}}])
+        player = game.players[0]
+        player.resources = Counter({Color.GREEN: 2})
+        adapter.get_card_payment(player, CardCost.color_or_any(Color.GREEN, 2, 4))
+        self.assertEqual(conn.sent[-1]['request'], 'card_payment')
+
+
+class PlanTest(unittest.TestCase):
+    def make_game(self, replies):
+        conn = _RecordingConn(replies)
+        adapter = JsonAdapter(conn)
+        game = Game(4, adapter, DefaultRuleset(), seed='1748776970931817000')
+        player = game.players[0]
+        player.init_hand(game.ruleset.get_deck(0)[:7])
+        player.resources = Counter({c: 5 for c in Color.members()})
+        return game, adapter, conn, player
+
+    def test_buy_in_one_round_trip(self):
+        replies = [{'thread': 1, 'action_type': 'buy', 'plan': []}]
+        game, adapter, conn, player = self.make_game(replies)
+        card = player.affordable_cards()[0]
+        payment = adapter.legal_moves.get_card_payment(player, card.cost)[0]
+        replies[0]['plan'] = [
+            {'request': 'buy_card', 'answer': adapter.ser_answer(card)},
+            {'request': 'card_payment', 'answer': adapter.ser_answer(payment)}]
+        self.assertEqual(adapter.get_action_type(player), 'buy')
+        self.assertIs(adapter.get_card_buy(player), card)
+        self.assertEqual(adapter.get_card_payment(player, card.cost), payment)
+        self.assertEqual(len(conn.sent), 3)  # init, state, action_type
+        adapter.send({'request': 'result'}, thread=False, state=False)
+        self.assertEqual(conn.sent[-1]['plan'],
+                         {'used': 2, 'remaining': 0, 'discarded': False})
+
+    def test_color_plan_followed(self):
+        replies = [{'thread': 1, 'action_type': 'execute', 'plan': [
+            {'request': 'color_exec', 'answer': Color.BLUE.value},
+            {'request': 'color_foreach', 'answer': Color.RED.value}]}]
+        game, adapter, conn, player = self.make_game(replies)
+        info = EffectExecInfo(next(iter(player.areas[Color.RED].values())), player)
+        adapter.get_action_type(player)
+        self.assertEqual(adapter.choose_color_exec(info, 1), Color.BLUE)
+        self.assertEqual(adapter.get_foreach_color(info), Color.RED)
+        self.assertEqual(len(conn.sent), 3)  # init, state, action_type
+        adapter.send({'request': 'result'}, thread=False, state=False)
+        self.assertEqual(conn.sent[-1]['plan'],
+                         {'used': 2, 'remaining': 0, 'discarded': False})
+
+    def test_illegal_plan_discarded(self):
+        replies = [{'thread': 1, 'action_type': 'buy', 'plan': [
+                       {'request': 'buy_card', 'answer': {'player': 0, 'area': 10, 'key': 99}},
+                       {'request': 'card_payment', 'answer': {}}]},
+                   {'thread': 2, 'buy_card': None}]
+        game, adapter, conn, player = self.make_game(replies)
+        card = player.affordable_cards()[0]
+        replies[1]['buy_card'] = adapter.ser_answer(card)
+        adapter.get_action_type(player)
+        self.assertIs(adapter.get_card_buy(player), card)
+        self.assertEqual(conn.sent[-1]['request'], 'buy_card')
+        self.assertEqual(conn.sent[-1]['plan'],
+                         {'used': 0, 'remaining': 0, 'discarded': True})
+
+    def test_plan_only_for_its_player(self):
+        replies = [{'thread': 1, 'action_type': 'execute', 'plan': [
+                       {'request': 'action_type', 'answer': 'execute'}]},
+                   {'thread': 2, 'action_type': 'buy'}]
+        game, adapter, conn, player = self.make_game(replies)
+        adapter.get_action_type(player)
+        self.assertEqual(adapter.get_action_type(game.players[1]), 'buy')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,12 @@
+import unittest
+
+from backend.bench import run_benchmarks
+
+
+class BenchSmokeTest(unittest.TestCase):
+    def test_all_benchmarks_run(self):
+        results = run_benchmarks(quick=True)
+        self.assertNotEqual(len(results), 0)
+        for r in results:
+            with self.subTest(r.name):
+                self.assertIsNone(r.error)
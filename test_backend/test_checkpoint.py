@@ -0,0 +1,87 @@
+import dataclasses
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Sequence, TypeVar
+
+from backend.api.json_serialise import JsonSerialiser
+from backend.bots import PolicyFrontend
+from backend.core import Game, DefaultRuleset, Player
+from backend.core.catalog import TemplateCatalog
+from backend.core.checkpoint import Checkpointer, load_checkpoint
+
+T = TypeVar('T')
+
+
+class _Stop(Exception):
+    pass
+
+
+class _CyclingFrontend(PolicyFrontend):
+    """Deterministic bot (only depends on the state and the decision number)
+    that can stop the game after a number of decisions"""
+
+    def __init__(self, stop_after: int = None, start_at: int = 0):
+        super().__init__()
+        self.stop_after = stop_after
+        self.n = start_at
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        if self.stop_after is not None and self.n >= self.stop_after:
+            raise _Stop()
+        self.n += 1
+        return options[(self.n * 7) % len(options)]
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / 'game.ckpt.json'
+
+    def run_until_stopped(self, n_decisions: int):
+        game = Game(4, _CyclingFrontend(n_decisions), DefaultRuleset(), 'seed-1')
+        Checkpointer(self.path).attach(game)
+        with self.assertRaises(_Stop):
+            game.run_game()
+        return game
+
+    def test_restore_is_exact(self):
+        for n in (0, 1, 37, 100, 150):
+            with self.subTest(n=n):
+                orig = self.run_until_stopped(n)
+                restored = load_checkpoint(self.path, _CyclingFrontend(0), DefaultRuleset())
+                with self.assertRaises(_Stop):
+                    restored.resume_game()  # Replays up to where it stopped
+                ser = JsonSerialiser()
+                self.assertEqual(ser.ser(restored), ser.ser(orig))
+
+    def test_resumed_game_has_same_result(self):
+        full = Game(4, _CyclingFrontend(), DefaultRuleset(), 'seed-1')
+        full.run_game()
+        self.run_until_stopped(121)
+        self.assertNotEqual(json.loads(self.path.read_text())['decisions'], [])
+        # The replayed decisions don't go to the new frontend
+        restored = load_checkpoint(self.path, _CyclingFrontend(start_at=121),
+                                   DefaultRuleset())
+        restored.resume_game()
+        ser = JsonSerialiser()
+        self.assertEqual(ser.ser(restored), ser.ser(full))
+        self.assertFalse(self.path.exists())  # Removed once finished
+
+
+class TemplateCatalogTest(unittest.TestCase):
+    def test_equal_templates_are_bounded(self):
+        ruleset = DefaultRuleset()
+        catalog = TemplateCatalog(ruleset.get_deck(0))
+        catalog.MAX_EXTRA_OBJS = 10
+        template = ruleset.get_deck(0)[3]
+        for _ in range(25):  # Equal copies, as if from another ruleset object
+            copy = dataclasses.replace(template)
+            self.assertEqual(catalog.id_of(copy.instantiate()), catalog.ids[template])
+        self.assertLessEqual(len(catalog._ids_by_obj), len(catalog.templates) + 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from backend.api.json_serialise import JsonSerialiser
+from backend.bench import workloads
+from backend.bots import RandomFrontend
+from backend.core import Game, DefaultRuleset
+
+
+class CloneTest(unittest.TestCase):
+    def test_clone_is_equal_and_independent(self):
+        ser = JsonSerialiser()
+        game = workloads.game_after(100, seed='seed-1')
+        before = ser.ser(game)
+        frontend = RandomFrontend(1)
+        clone = game.clone(frontend)
+        self.assertIs(frontend.game, clone)
+        self.assertEqual(ser.ser(clone), before)
+        self.assertTrue(all(p.game is clone for p in clone.players))
+        self.assertIs(clone.ruleset, game.ruleset)
+        # Carry on playing the clone (from the start of the next turn)
+        clone.curr_player_idx += 1
+        clone.resume_game()
+        self.assertIsNotNone(clone.winners)
+        self.assertEqual(ser.ser(game), before)  # Unchanged
+
+    def test_clone_plays_the_same(self):
+        ser = JsonSerialiser()
+        game = Game(4, RandomFrontend(0), DefaultRuleset(), 'seed-2')
+        clone = game.clone(RandomFrontend(0))
+        game.run_game()
+        clone.run_game()
+        self.assertEqual(ser.ser(clone), ser.ser(game))
+
+
+if __name__ == '__main__':
+    unittest.main()
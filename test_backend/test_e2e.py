@@ -11,6 +11,7 @@ from websockets import ConnectionClosedOK
 from websockets.sync.client import connect, ClientConnection
 
 from backend.api.json_adapter import JsonAdapter
+from backend.api.latency import LatencyRecorder
 from backend.api.wesocket_conn import WebsocketConn
 from backend.core import Game, DefaultRuleset
 
@@ -31,19 +32,32 @@ class E2ETestCase(unittest.TestCase):
         self.addCleanup(os.chdir, orig_wd)
 
     def start_server(self):
+        self.latency = LatencyRecorder()
         self._server_th = threading.Thread(
             target=self.server_main, name='main_v3 example server', daemon=True)
         self._server_th.start()
 
     def server_main(self):
         try:
-            g = Game(4, JsonAdapter(WebsocketConn(_PORT)),
+            g = Game(4, JsonAdapter(WebsocketConn(_PORT), self.latency),
                      DefaultRuleset(), seed='1748776970931817000')
             g.run_game()
         except Exception as e:
             self._server_failed = e
             raise
 
+    # noinspection PyMethodMayBeStatic
+    def connect_to_server(self):
+        # The server thread may not be listening yet so retry for a bit
+        deadline = time.monotonic() + 2.0
+        while True:
+            try:
+                return connect(f"ws://localhost:{_PORT}")
+            except ConnectionRefusedError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.005)
+
     # noinspection PyMethodMayBeStatic
     def _load_actions(self):
         with open('./test_backend/test_e2e_data.json') as f:
@@ -52,7 +66,7 @@ class E2ETestCase(unittest.TestCase):
 
     def test(self):
         self.start_server()
-        with connect(f"ws://localhost:{_PORT}") as ws:
+        with self.connect_to_server() as ws:
             for self._idx, (tp, data) in enumerate(self._load_actions()):
                 if self._server_failed:
                     self.fail("Server encountered error! See above for details.")
@@ -68,6 +82,19 @@ class E2ETestCase(unittest.TestCase):
             time.sleep(0.1)
             if self._server_failed:
                 self.fail("Server encountered error! See above for details.")
+        self.assert_latency_recorded()
+
+    def assert_latency_recorded(self):
+        summary = self.latency.summary()
+        # Every stage of a request that the client answered (with an
+        #  answer that has to be deserialised)
+        for stage in ('serialise', 'encode', 'queue_wait', 'network_send',
+                      'client_think', 'decode', 'deserialise', 'round_trip'):
+            with self.subTest(stage=stage):
+                self.assertGreaterEqual(summary['buy_card'][stage]['count'], 1)
+        # Messages that aren't requests don't wait for the client
+        self.assertIn('network_send', summary['init'])
+        self.assertNotIn('client_think', summary['init'])
 
     def send_and_assert_no_recv(self, ws: ClientConnection, data):
         # Test that server hasn't sent anything
@@ -0,0 +1,45 @@
+import unittest
+
+from backend.core import (Color, PlaceableCardType, CardType, Area, AnyResource,
+                          MoonPhase, ResourceFilter, CardTypeFilter)
+
+
+class EnumMaskTest(unittest.TestCase):
+    def test_membership_matches_members(self):
+        classes = [Color, PlaceableCardType, CardType, Area, AnyResource, MoonPhase]
+        every = {m for cls in classes for m in cls}
+        for cls in classes:
+            for m in every:
+                self.assertEqual(cls.has_instance(m), m in set(cls.members()), (cls, m))
+            self.assertFalse(cls.has_instance(1))
+            self.assertFalse(cls.has_instance(None))
+
+    def test_members_in_mask_ordered(self):
+        mask = Color.mask_of([Color.YELLOW, Color.PURPLE, Area.HAND])
+        self.assertEqual(Color.members_in_mask(mask), (Color.PURPLE, Color.YELLOW))
+        self.assertEqual(Color.members_in_mask(Color.get_mask()), Color.members())
+        self.assertEqual(Color.members(), tuple(sorted(Color, key=lambda c: c.value)))
+
+
+class FilterMaskTest(unittest.TestCase):
+    def test_resource_filter(self):
+        f = ResourceFilter.not_yellow()
+        self.assertTrue(f.is_allowed(Color.RED))
+        self.assertFalse(f.is_allowed(Color.YELLOW))
+        self.assertFalse(f.is_allowed(AnyResource.POINTS))
+        self.assertEqual(f & ResourceFilter.not_red(),
+                         ResourceFilter({Color.PURPLE, Color.GREEN, Color.BLUE}))
+        self.assertEqual(f.members(), (Color.PURPLE, Color.GREEN, Color.RED, Color.BLUE))
+        self.assertTrue(f.allows_all(AnyResource.mask_of([Color.RED, Color.BLUE])))
+        self.assertFalse(f.allows_all(AnyResource.mask_of([Color.RED, Color.YELLOW])))
+
+    def test_card_type_filter(self):
+        f = CardTypeFilter(Color.members())
+        self.assertTrue(f.is_allowed(Color.GREEN))
+        self.assertFalse(f.is_allowed(CardType.EVENT))
+        self.assertEqual((f & CardTypeFilter({CardType.EVENT, Color.RED})).allowed_types,
+                         {Color.RED})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+import unittest
+
+from websockets import ConnectionClosed
+from websockets.sync.client import connect
+
+from backend.api.game_server import GameServer, route, GAME_PATH_PREFIX
+
+
+class RouteTest(unittest.TestCase):
+    def test_route_is_stable(self):
+        # Must not depend on the hash seed (the workers are separate processes)
+        self.assertEqual(route('abc', 4), 2)
+        self.assertEqual({route(str(i), 3) for i in range(100)}, {0, 1, 2})
+
+
+class GameServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = GameServer(0, n_workers=2, drain_timeout=1.0)
+        self.server.start()
+        self.server_th = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.server_th.start()
+        self.addCleanup(self.stop_server)
+
+    def stop_server(self):
+        self.server.drain()
+        self.server_th.join(timeout=10)
+
+    def connect(self, game_id: str):
+        return connect(f'ws://localhost:{self.server.port}{GAME_PATH_PREFIX}{game_id}')
+
+    def test_reconnect_gets_pending_request(self):
+        ws = self.connect('game-a')
+        self.assertEqual(json.loads(ws.recv(timeout=5))['request'], 'init')
+        # The game may have already sent the first request when we connect,
+        #  in which case the (older) state message isn't replayed
+        while (first_request := json.loads(ws.recv(timeout=5)))['request'] == 'state':
+            pass
+        self.assertEqual(first_request['request'], 'action_type')
+        ws.close()
+        ws = self.connect('game-a')
+        replayed = [json.loads(ws.recv(timeout=5)) for _ in range(2)]
+        self.assertEqual(replayed[0]['request'], 'init')
+        self.assertEqual(replayed[1], first_request)
+        # The game carries on from where it was
+        ws.send(json.dumps({'thread': first_request['thread'], 'action_type': 'execute'}))
+        self.assertEqual(json.loads(ws.recv(timeout=5))['request'], 'discard_for_exec')
+        ws.close()
+
+    def test_no_new_games_while_draining(self):
+        ws = self.connect('game-b')
+        ws.recv(timeout=5)
+        self.server.drain()
+        deadline = time.monotonic() + 5
+        while True:  # Wait for the workers to get the drain message
+            ws2 = self.connect('game-c')
+            try:
+                ws2.recv(timeout=5)
+            except ConnectionClosed as e:
+                self.assertEqual(e.rcvd.code, 1013)
+                break
+            finally:
+                ws2.close()
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.05)
+        # Existing games can still be connected to
+        ws.close()
+        ws = self.connect('game-b')
+        self.assertEqual(json.loads(ws.recv(timeout=5))['request'], 'init')
+        ws.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from typing import Sequence, TypeVar
+
+from backend.api.json_serialise import JsonSerialiser
+from backend.bots import RandomFrontend
+from backend.core import Game, DefaultRuleset, Player
+from backend.core.journal import MoveJournal
+from backend.core.zobrist import ZobristHasher
+
+T = TypeVar('T')
+
+
+class _Stop(Exception):
+    pass
+
+
+class _MarkingFrontend(RandomFrontend):
+    """Marks the journal after ``mark_at`` decisions and stops the game
+    ``then_stop_after`` decisions later"""
+
+    def __init__(self, seed: int, mark_at: int, then_stop_after: int):
+        super().__init__(seed)
+        self.mark_at = mark_at
+        self.stop_at = mark_at + then_stop_after
+        self.n = 0
+        self.journal: MoveJournal | None = None
+        self.mark = self.state_at_mark = None
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        if self.n == self.mark_at:
+            self.mark = self.journal.mark()
+            self.state_at_mark = _state(self.game)
+        if self.n == self.stop_at:
+            raise _Stop()
+        self.n += 1
+        return super().choose(kind, player, options)
+
+
+def _state(game: Game):
+    return json.dumps(JsonSerialiser().ser(game), sort_keys=True)
+
+
+class MoveJournalTest(unittest.TestCase):
+    def test_undo_restores_state(self):
+        for seed, mark_at, then_stop_after in [(0, 0, 5), (1, 10, 40), (2, 57, 3),
+                                               (3, 90, 1000), (4, 150, 0)]:
+            with self.subTest(seed=seed, mark_at=mark_at):
+                frontend = _MarkingFrontend(seed, mark_at, then_stop_after)
+                game = Game(4, frontend, DefaultRuleset(), f'seed-{seed}')
+                frontend.journal = MoveJournal(game)
+                hasher = ZobristHasher(game)
+                try:
+                    game.run_game()
+                except _Stop:
+                    pass
+                hash_after = hasher.value
+                frontend.journal.undo(frontend.mark)
+                self.assertEqual(_state(game), frontend.state_at_mark)
+                self.assertEqual(hasher.value, hasher.recompute())
+                if then_stop_after != 0:
+                    self.assertNotEqual(hasher.value, hash_after)
+
+    def test_trial(self):
+        game = Game(4, RandomFrontend(0), DefaultRuleset(), 'seed-1')
+        journal = MoveJournal(game)
+        before = _state(game)
+        with journal.trial():
+            game.run_game()  # Whole game, including the final scoring
+            self.assertIsNotNone(game.winners)
+        self.assertEqual(_state(game), before)
+        self.assertEqual(len(journal), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import unittest
+from collections import OrderedDict
+
+from backend.api.json_deserialise import JsonDeserialiser
+from backend.api.json_serialise import JsonSerialiser
+from backend.bench.workloads import game_after
+from backend.bots import RandomFrontend
+from backend.core import (DefaultRuleset, CardEffect, ConstMeasure, GreaterEqCond,
+                          NumMarkers, MoveChosenAndExecNewColor, Color)
+
+
+class DeserialiseGameTest(unittest.TestCase):
+    def test_round_trip(self):
+        ser = JsonSerialiser()
+        for n in (0, 100, 1_000_000):  # Start, middle, finished
+            with self.subTest(n=n):
+                # Through a string to make sure it works on actual JSON
+                j = json.loads(json.dumps(ser.ser(game_after(n, seed='seed-1'))))
+                game = JsonDeserialiser().deser_game(j, RandomFrontend(0), DefaultRuleset())
+                self.assertEqual(json.loads(json.dumps(ser.ser(game))), j)
+
+    def test_references(self):
+        j = JsonSerialiser().ser(game_after(1_000_000, seed='seed-1'))
+        frontend = RandomFrontend(0)
+        game = JsonDeserialiser().deser_game(j, frontend, DefaultRuleset())
+        self.assertIs(game.frontend, frontend)
+        self.assertIs(frontend.game, game)
+        self.assertTrue(all(p.game is game for p in game.players))
+        self.assertTrue(all(w in game.players for w in game.winners))
+        for player in game.players:
+            for area, cards in player.areas.items():
+                self.assertIsInstance(cards, OrderedDict)
+                for card in cards.values():
+                    self.assertIs(card.location.get(game), card)
+                    self.assertIsInstance(card.effect, CardEffect)
+
+    def test_effects_are_shared(self):
+        j = JsonSerialiser().ser(game_after(0, seed='seed-1'))
+        game = JsonDeserialiser().deser_game(j, RandomFrontend(0), DefaultRuleset())
+        effects = [c.effect for p in game.players for c in p.areas[Color.RED].values()]
+        self.assertEqual(len(effects), 4)  # The same starting card for each player
+        self.assertTrue(all(e is effects[0] for e in effects))
+
+    def test_int_and_float_not_merged(self):
+        deser = JsonDeserialiser()
+        for value in (2, 2.0, 2):
+            cond = GreaterEqCond(NumMarkers(), ConstMeasure(value))
+            j = json.loads(json.dumps(JsonSerialiser().ser(cond)))
+            result = deser.deser(j, GreaterEqCond)
+            self.assertIs(type(result.right.value), type(value))
+        self.assertIs(deser.deser(j, GreaterEqCond), result)  # Still shared
+
+    def test_polymorphic_values(self):
+        deser = JsonDeserialiser()
+        effect = MoveChosenAndExecNewColor(DefaultRuleset().get_adjacencies())
+        for v in (effect, ConstMeasure(2), ConstMeasure(0.5)):
+            with self.subTest(v=v):
+                j = json.loads(json.dumps(JsonSerialiser().ser(v)))
+                self.assertEqual(deser.deser(j, type(v).__mro__[1]), v)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import copy
+import json
+import pickle
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from backend.api import json_ruleset
+from backend.api.json_ruleset import JsonRuleset, RulesetFileError, ruleset_to_json
+from backend.bots import RandomFrontend
+from backend.core import DefaultRuleset, Game, Color, AnyResource, Area, MoonPhase
+
+
+def _play(ruleset):
+    game = Game(4, RandomFrontend(3), ruleset, 'seed-1')
+    game.run_game()
+    return [p.final_score for p in game.players]
+
+
+class JsonRulesetTest(unittest.TestCase):
+    def setUp(self):
+        self.j = json.loads(json.dumps(ruleset_to_json(DefaultRuleset())))
+
+    def test_same_as_default(self):
+        ruleset, default = JsonRuleset.from_json(self.j), DefaultRuleset()
+        for r in range(3):
+            self.assertEqual(ruleset.get_deck(r), default.get_deck(r))
+        self.assertEqual(ruleset.get_starting_cards(), default.get_starting_cards())
+        self.assertEqual(ruleset.get_adjacencies(), default.get_adjacencies())
+        self.assertEqual(_play(ruleset), _play(default))
+
+    def test_counts(self):
+        card = self.j['decks'][0][0]
+        self.j['decks'][0][:1] = [{'count': 3, 'card': card}]
+        deck = JsonRuleset.from_json(self.j).get_deck(0)
+        self.assertEqual(len(deck), 38)
+        self.assertIs(deck[0], deck[2])
+
+    def test_cache(self):
+        json_ruleset._compiled_cache.clear()  # In case something else loaded it
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d, 'rules.json')
+            path.write_text(json.dumps(self.j))
+            first = JsonRuleset(path)
+            self.assertIs(JsonRuleset(path).get_deck(0), first.get_deck(0))  # Shared
+            (cache_file,) = Path(d, '__pycache__').iterdir()
+            json_ruleset._compiled_cache.clear()
+            second = JsonRuleset(path)  # From the pickle
+            self.assertEqual(second.get_deck(2), first.get_deck(2))
+            self.assertEqual(_play(second), _play(first))
+            cache_file.write_bytes(b'garbage')
+            json_ruleset._compiled_cache.clear()
+            self.assertEqual(JsonRuleset(path).get_deck(1), first.get_deck(1))
+
+    def test_cache_follows_classes(self):
+        json_ruleset._compiled_cache.clear()
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d, 'rules.json')
+            path.write_text(json.dumps(self.j))
+            JsonRuleset(path)
+            json_ruleset._compiled_cache.clear()
+            # As if a field of one of the effects had changed
+            with mock.patch.object(json_ruleset, '_schema_hash', lambda: b'changed'):
+                JsonRuleset(path)
+            self.assertEqual(len(list(Path(d, '__pycache__').iterdir())), 2)
+
+    def test_invalid(self):
+        cases = [('cards_per_player', 5), ('moon_pool', ['PURPLE'] * 9),
+                 ('moon_pool', ['HAND'] * 10), ('swap_dirns', [1, 1]),
+                 ('resources_per_point', {'RED': -1}), ('decks', [[]] * 3),
+                 ('format', 2), ('cards_per_player', 8), ('max_players', 0)]
+        for key, value in cases:
+            with self.subTest(key=key, value=value), self.assertRaises(RulesetFileError):
+                JsonRuleset.from_json({**self.j, key: value})
+        del self.j['max_players']  # Defaults to 4, so 32 cards are needed
+        with self.assertRaises(RulesetFileError):
+            JsonRuleset.from_json({**self.j, 'cards_per_player': 8})
+        self.assertEqual(JsonRuleset.from_json(self.j).max_players(), 4)
+        self.j['decks'][1][4]['effect']['__class__'] = 'NotAnEffect'
+        with self.assertRaisesRegex(RulesetFileError, r'decks\[1\]\[4\]'):
+            JsonRuleset.from_json(self.j)
+
+
+class EnumPickleTest(unittest.TestCase):
+    def test_same_member(self):
+        for m in (Color.RED, AnyResource.POINTS, Area.HAND, MoonPhase.LAST_TURN):
+            self.assertIs(pickle.loads(pickle.dumps(m)), m)
+            self.assertIs(copy.deepcopy(m), m)
+
+
+if __name__ == '__main__':
+    unittest.main()
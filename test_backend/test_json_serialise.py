@@ -0,0 +1,54 @@
+import json
+import random
+import unittest
+from functools import cmp_to_key
+
+from backend.api.json_serialise import JsonSerialiser, JsonTotalCmp
+from backend.bots import RandomFrontend
+from backend.core import Game, DefaultRuleset, CardCost, ResourceFilter, Color
+
+
+def _random_json(rng: random.Random, depth=0):
+    kind = rng.randrange(7 if depth == 0 else 5)
+    if kind == 0:
+        return None
+    if kind == 1:
+        return rng.random() < 0.5
+    # (No ints or floats equal to each other or to a bool: cmp() says
+    #  they are equal but that they aren't equal to other values of the
+    #  same type so there isn't a consistent order)
+    if kind == 2:
+        return rng.randrange(2, 6)
+    if kind == 3:
+        return rng.randrange(4) + 0.5
+    if kind == 4:
+        return rng.choice('abc') * rng.randrange(3)
+    # Only one level of nesting and the same type in each, as cmp() uses
+    #  the builtin comparisons for these
+    if kind == 5:
+        return [rng.randrange(3) for _ in range(rng.randrange(4))]
+    return {k: rng.randrange(3) for k in rng.sample('xyz', rng.randrange(4))}
+
+
+class CanonicalOrderTest(unittest.TestCase):
+    def test_key_matches_cmp(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            values = [_random_json(rng) for _ in range(rng.randrange(10))]
+            self.assertEqual(
+                json.dumps(sorted(values, key=JsonTotalCmp.key)),
+                json.dumps(sorted(values, key=cmp_to_key(JsonTotalCmp.cmp))))
+
+    def test_keys_already_sorted(self):
+        ser = JsonSerialiser()
+        game = Game(4, RandomFrontend(0), DefaultRuleset(), 'seed-1')
+        game.run_game()
+        for v in (game, CardCost({ResourceFilter.not_red(): 3,
+                                  ResourceFilter({Color.RED}): 2})):
+            with self.subTest(v=v):
+                j = ser.ser(v)
+                self.assertEqual(json.dumps(j), json.dumps(j, sort_keys=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import time
+import unittest
+from typing import Sequence, TypeVar
+
+from backend.api.json_serialise import JsonSerialiser
+from backend.bots import LastTurnSolver, LastTurnFrontend, RandomFrontend, PolicyFrontend
+from backend.core import Game, DefaultRuleset, Player
+
+T = TypeVar('T')
+
+
+class _Stop(Exception):
+    pass
+
+
+class _StopAtLastTurnFrontend(RandomFrontend):
+    """Stops at the start of the last player's final turn"""
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        game = self.game
+        if (kind == 'get_action_type' and game.round_num == 2 and game.turn_num == 5
+                and player.idx == game.n_players - 1):
+            raise _Stop()
+        return super().choose(kind, player, options)
+
+
+class _FollowFrontend(PolicyFrontend):
+    def __init__(self, line: Sequence[int]):
+        super().__init__()
+        self.line = list(line)
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        return options[self.line.pop(0)]
+
+
+def last_turn_start(seed: int):
+    game = Game(4, _StopAtLastTurnFrontend(seed), DefaultRuleset(), f'seed-{seed}')
+    try:
+        game.run_game()
+    except _Stop:
+        return game
+    raise AssertionError("Didn't reach the last turn")
+
+
+def play_rest(turn_start: Game, frontend: PolicyFrontend):
+    game = turn_start.clone(frontend)
+    player = game.players[game.curr_player_idx]
+    player.do_turn()
+    player.count_points()
+    return player.final_score
+
+
+class LastTurnSolverTest(unittest.TestCase):
+    def test_is_best_line(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                turn_start = last_turn_start(seed)
+                before = JsonSerialiser().ser(turn_start)
+                result = LastTurnSolver().solve(turn_start)
+                self.assertEqual(JsonSerialiser().ser(turn_start), before)
+                self.assertEqual(play_rest(turn_start, _FollowFrontend(result.line)),
+                                 result.score)
+                for bot_seed in range(20):
+                    self.assertLessEqual(
+                        play_rest(turn_start, RandomFrontend(bot_seed)), result.score)
+
+    def test_replay(self):
+        turn_start = last_turn_start(0)
+        solver = LastTurnSolver()
+        result = solver.solve(turn_start)
+        for n in range(len(result.line)):
+            rest = solver.solve(turn_start, result.line[:n])
+            self.assertEqual(rest.score, result.score)
+            self.assertEqual(rest.line, result.line[n:])
+
+    def test_budget(self):
+        turn_start = last_turn_start(0)
+        full = LastTurnSolver().solve(turn_start)
+        self.assertTrue(full.complete)
+        self.assertGreater(full.n_lines, 10)
+        result = LastTurnSolver(max_lines=10).solve(turn_start)
+        self.assertFalse(result.complete)
+        self.assertEqual(result.n_lines, 10)
+        self.assertLessEqual(result.score, full.score)
+        self.assertEqual(play_rest(turn_start, _FollowFrontend(result.line)), result.score)
+        result = LastTurnSolver().solve(turn_start, deadline=time.perf_counter())
+        self.assertFalse(result.complete)
+        self.assertEqual(result.n_lines, 1)
+        self.assertEqual(play_rest(turn_start, _FollowFrontend(result.line)), result.score)
+
+    def test_frontend_gets_predicted_score(self):
+        frontend = LastTurnFrontend(RandomFrontend(0))
+        scores = {}
+        solve = frontend.solver.solve
+
+        def recording_solve(game: Game, replay: Sequence[int]):
+            result = solve(game, replay)
+            scores.setdefault(game.curr_player_idx, result.score)
+            return result
+        frontend.solver.solve = recording_solve
+        game = Game(4, frontend, DefaultRuleset(), 'seed-0')
+        game.run_game()
+        self.assertIn(3, scores)
+        self.assertEqual(scores[3], game.players[3].final_score)
+
+    def test_frontend_is_reproducible(self):
+        def final_scores():
+            game = Game(4, LastTurnFrontend(seed=1), DefaultRuleset(), 'seed-1')
+            game.run_game()
+            return [p.final_score for p in game.players]
+        self.assertEqual(final_scores(), final_scores())
+
+
+if __name__ == '__main__':
+    unittest.main()
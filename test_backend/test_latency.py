@@ -0,0 +1,48 @@
+import random
+import unittest
+
+from backend.api.latency import LatencyHistogram, LatencyRecorder
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_small_values_exact(self):
+        h = LatencyHistogram()
+        for v in range(100):
+            h.record(v)
+        self.assertEqual(h.percentile(50), 49)
+        self.assertEqual(h.percentile(100), 99)
+        self.assertEqual(h.min, 0)
+
+    def test_relative_precision(self):
+        rng = random.Random(0)
+        values = sorted(rng.randrange(1, 10**10) for _ in range(5000))
+        h = LatencyHistogram()
+        for v in values:
+            h.record(v)
+        for p in (10, 50, 90, 99):
+            exact = values[-(-len(values) * p // 100) - 1]
+            self.assertAlmostEqual(h.percentile(p) / exact, 1, delta=2 ** -6)
+
+    def test_bucket_bounds_contain_value(self):
+        h = LatencyHistogram(sub_bucket_bits=4)
+        for v in [0, 7, 15, 16, 17, 31, 32, 1000, 123456789]:
+            lo, hi = h.bucket_bounds(h.bucket_index(v))
+            self.assertTrue(lo <= v <= hi, (v, lo, hi))
+
+    def test_merge(self):
+        a, b = LatencyHistogram(), LatencyHistogram()
+        for v in range(0, 1000, 2):
+            a.record(v)
+        for v in range(1, 1000, 2):
+            b.record(v)
+        merged = LatencyHistogram.from_json(a.to_json()).merge(b)
+        self.assertEqual(merged.count, 1000)
+        self.assertEqual((merged.min, merged.max), (0, 999))
+
+    def test_recorder_summary(self):
+        rec = LatencyRecorder()
+        rec.record('buy_card', 'serialise', 1000)
+        rec.record('buy_card', 'serialise', 3000)
+        summary = rec.summary()
+        self.assertEqual(summary['buy_card']['serialise']['count'], 2)
+        self.assertEqual(summary['buy_card']['serialise']['mean'], 2000)
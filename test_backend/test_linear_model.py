@@ -0,0 +1,68 @@
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from backend.bots import (LinearModel, ModelFrontend, RandomFrontend, FEATURE_NAMES,
+                          N_FEATURES, extract_features)
+from backend.bots.train_model import record_self_play, load_training_data, main
+from backend.core import Game, DefaultRuleset, Color, AnyResource
+
+
+class FeaturesTest(unittest.TestCase):
+    def test_features(self):
+        game = Game(4, RandomFrontend(0), DefaultRuleset(), 'seed-1')
+        player = game.players[0]
+        player.resources = Counter({Color.RED: 2, Color.YELLOW: 3, AnyResource.POINTS: 1})
+        f = dict(zip(FEATURE_NAMES, extract_features(player)))
+        self.assertEqual(f['bias'], 1)
+        self.assertEqual(f['resources.RED'], 2)
+        self.assertEqual(f['resources.PURPLE'], 0)
+        self.assertEqual(f['points'], 3 + 1 - 2)  # Red counts against
+        self.assertEqual(f['turns_left'], 17)
+        self.assertEqual(f['cards.HAND'], len(player.hand))
+
+
+class LinearModelTest(unittest.TestCase):
+    def test_fit_recovers_weights(self):
+        rng = np.random.default_rng(0)
+        weights = rng.normal(size=N_FEATURES)
+        features = rng.random((500, N_FEATURES))
+        features[:, 0] = 1.0
+        model = LinearModel.fit(features, features @ weights, l2=1e-9)
+        np.testing.assert_allclose(model.weights, weights, atol=1e-5)
+
+    def test_save_load(self):
+        model = LinearModel(np.arange(N_FEATURES, dtype=float))
+        with tempfile.TemporaryDirectory() as d:
+            model.save(Path(d, 'w.json'))
+            loaded = LinearModel.load(Path(d, 'w.json'))
+        np.testing.assert_array_equal(loaded.weights, model.weights)
+
+    def test_wrong_shape(self):
+        with self.assertRaises(ValueError):
+            LinearModel(np.zeros(N_FEATURES + 1))
+
+
+class TrainingTest(unittest.TestCase):
+    def test_train_and_play(self):
+        with tempfile.TemporaryDirectory() as d:
+            log, weights = Path(d, 'games.jsonl'), Path(d, 'w.json')
+            record_self_play(log, 3)
+            features, targets = load_training_data([log])
+            self.assertEqual(features.shape, (len(targets), N_FEATURES))
+            # 18 turns * 4 players, 4 examples each
+            self.assertEqual(len(targets), 3 * 18 * 4 * 4)
+            messages = []
+            self.assertEqual(main(['fit', str(log), '-o', str(weights)], messages.append), 0)
+            self.assertRegex(messages[0], r'^Fit 864 examples')
+            model = LinearModel.load(weights)
+        game = Game(4, ModelFrontend(model, seed=0), DefaultRuleset(), 'seed-1')
+        game.run_game()
+        self.assertIsNotNone(game.winners)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import time
+import unittest
+from unittest import mock
+
+from backend.api.json_serialise import JsonSerialiser
+from backend.bench.workloads import game_after
+from backend.bots import (MCTSFrontend, MCTSSearch, RandomFrontend, LegalMoves,
+                          ParallelMCTSSearch, SearchResult)
+from backend.bots import parallel_mcts
+from backend.core import Game, DefaultRuleset
+
+_real_worker_search = parallel_mcts._worker_search
+
+
+def _failing_first_worker(*args):
+    if args[-1]['seed'].endswith('.0'):
+        raise RuntimeError("Worker failed")
+    return _real_worker_search(*args)
+
+
+class MCTSTest(unittest.TestCase):
+    def test_plays_whole_game(self):
+        frontend = MCTSFrontend(MCTSSearch(iterations=20, seed=0), players=[0], seed=0)
+        game = Game(4, frontend, DefaultRuleset(), 'seed-1')
+        game.run_game()
+        self.assertIsNotNone(game.winners)
+        self.assertIsNotNone(frontend.last_result)
+
+    def test_deterministic(self):
+        def play():
+            frontend = MCTSFrontend(MCTSSearch(iterations=10, seed=3), seed=3)
+            game = Game(4, frontend, DefaultRuleset(), 'seed-2')
+            game.run_game()
+            return JsonSerialiser().ser(game)
+        self.assertEqual(play(), play())
+
+    def test_search_leaves_game_unchanged(self):
+        game = game_after(120, seed='seed-1', at_turn_start=True)
+        before = JsonSerialiser().ser(game)
+        player = game.players[game.curr_player_idx]
+        n_options = len(LegalMoves().get_action_type(player))
+        result = MCTSSearch(iterations=50, seed=0).search(game, [], player.idx, n_options)
+        self.assertEqual(JsonSerialiser().ser(game), before)
+        self.assertEqual(result.n_simulations, 50)
+        self.assertEqual(len(result.visits), n_options)
+        self.assertEqual(sum(result.visits), 50)
+        self.assertIn(result.best, range(n_options))
+
+    def test_time_limit(self):
+        game = game_after(120, seed='seed-1', at_turn_start=True)
+        search = MCTSSearch(iterations=None, time_limit=0.2, seed=0)
+        start = time.perf_counter()
+        result = search.search(game, [], game.curr_player_idx, 2)
+        # A simulation is much shorter than this
+        self.assertLess(time.perf_counter() - start, 0.2 + 0.1)
+        self.assertGreater(result.n_simulations, 0)
+
+    def test_needs_budget(self):
+        with self.assertRaises(ValueError):
+            MCTSSearch(iterations=None, time_limit=None)
+
+
+class ParallelMCTSTest(unittest.TestCase):
+    def test_returns_by_deadline(self):
+        game = game_after(120, seed='seed-1', at_turn_start=True)
+        with ParallelMCTSSearch(game.ruleset, n_workers=2, time_limit=0.3, seed=0) as search:
+            for _ in range(2):  # The second time, the workers are already started
+                start = time.perf_counter()
+                result = search.search(game, [], game.curr_player_idx, 2)
+                self.assertLess(time.perf_counter() - start, 0.3 + 0.05)
+                self.assertGreater(result.n_simulations, 0)
+
+    def test_iterations_are_split(self):
+        game = game_after(120, seed='seed-1', at_turn_start=True)
+        with ParallelMCTSSearch(game.ruleset, n_workers=2, iterations=30,
+                                time_limit=None, seed=0) as search:
+            result = search.search(game, [], game.curr_player_idx, 2)
+        self.assertEqual(result.n_simulations, 30)
+        self.assertEqual(sum(result.visits), 30)
+        with ParallelMCTSSearch(game.ruleset, n_workers=3, iterations=31,
+                                time_limit=None, seed=0) as search:
+            self.assertEqual(search._split_iterations(), [11, 10, 10])
+            result = search.search(game, [], game.curr_player_idx, 2)
+        self.assertEqual(result.n_simulations, 31)
+
+    def test_failed_worker_left_out(self):
+        game = game_after(120, seed='seed-1', at_turn_start=True)
+        with (mock.patch.object(parallel_mcts, '_worker_search', _failing_first_worker),
+              ParallelMCTSSearch(game.ruleset, n_workers=2, iterations=30,
+                                 time_limit=None, seed=0) as search):
+            result = search.search(game, [], game.curr_player_idx, 2)
+            self.assertEqual(result.n_simulations, 15)  # Only the second worker's
+            search.n_workers = 1  # Only the failing one
+            with self.assertRaisesRegex(RuntimeError, 'Worker failed'):
+                search.search(game, [], game.curr_player_idx, 2)
+
+    def test_merge(self):
+        merged = ParallelMCTSSearch.merge([
+            SearchResult([3, 1], 4, 0.1, [1.0, 0.0]),
+            SearchResult([1, 0], 2, 0.1, [0.0, 0.0]),  # One diverged
+        ], 2, 0.2)
+        self.assertEqual(merged, SearchResult([4, 1], 6, 0.2, [0.75, 0.0]))
+        self.assertEqual(merged.best, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import itertools
+import random
+import unittest
+from collections import Counter
+
+from backend.core import (Game, DefaultRuleset, CardCost, ResourceFilter,
+                          Color, AnyResource)
+from backend.bots import RandomFrontend
+from backend.core import payments
+
+
+def _brute_force_payments(cost: CardCost, resources: Counter):
+    colors = [r for r in AnyResource.members() if resources[r] > 0]
+    result = []
+    for amounts in itertools.product(*[range(resources[r] + 1) for r in colors]):
+        payment = +Counter(dict(zip(colors, amounts)))
+        if cost.matches_exact(payment):
+            result.append(payment)
+    return result
+
+
+class PaymentsTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        costs = [CardCost.free(),
+                 CardCost.color_or_any(Color.GREEN, 2, 4),
+                 CardCost.color_or_any(Color.RED, 3, 3),
+                 CardCost({ResourceFilter.not_yellow(): 3, ResourceFilter.not_red(): 3}),
+                 CardCost({ResourceFilter({Color.BLUE}): 2})]
+        for _ in range(100):
+            resources = Counter({c: rng.randrange(4) for c in Color.members()})
+            for cost in costs:
+                expected = _brute_force_payments(cost, resources)
+                actual = payments.payments(cost, resources)
+                self.assertCountEqual(actual, expected)
+                self.assertEqual(payments.count_payments(cost, resources), len(expected))
+                self.assertEqual(payments.can_afford(cost, resources), len(expected) != 0)
+                self.assertEqual([payments.payment_at(cost, resources, i)
+                                  for i in range(len(actual))], actual)
+
+    def test_spend_at(self):
+        resources = Counter({Color.RED: 2, Color.GREEN: 1, Color.BLUE: 3})
+        filters = ResourceFilter.not_yellow()
+        for amount in range(4):
+            expected = payments.spends(resources, filters, amount)
+            self.assertEqual(payments.count_spends(resources, filters, amount), len(expected))
+            self.assertEqual([payments.spend_at(resources, filters, amount, i)
+                              for i in range(len(expected))], expected)
+
+    def test_affordable_cards_follows_resources(self):
+        game = Game(2, RandomFrontend(0), DefaultRuleset(), 'seed')
+        player = game.players[0]
+        player.init_hand(game.ruleset.get_deck(0)[:7])
+        player.resources = Counter()
+        free = [c for c in player.hand.values() if payments.can_afford(c.cost, Counter())]
+        self.assertEqual(player.affordable_cards(), free)
+        player.resources[Color.RED] += 10
+        player.resources[Color.GREEN] += 10
+        self.assertEqual(player.affordable_cards(), [
+            c for c in player.hand.values() if payments.can_afford(c.cost, player.resources)])
+        player.resources = Counter()
+        self.assertEqual(player.affordable_cards(), free)
+
+
+if __name__ == '__main__':
+    unittest.main()
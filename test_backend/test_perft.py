@@ -0,0 +1,30 @@
+import unittest
+
+from backend.api.json_serialise import JsonSerialiser
+from backend.bench.perft import perft, perft_divide
+from backend.bench.workloads import new_game, game_after
+
+
+class PerftTest(unittest.TestCase):
+    def test_undo_matches_clone(self):
+        for name, game in [('start', new_game(seed=1)),
+                           ('mid', game_after(120, seed=1, at_turn_start=True))]:
+            for depth in range(5):
+                with self.subTest(name, depth=depth):
+                    self.assertEqual(perft(game, depth), perft(game, depth, undo=False))
+
+    def test_divide(self):
+        game = new_game()
+        self.assertEqual(perft(game, 0), 1)
+        self.assertEqual(perft_divide(game, 1), [1, 1])
+        self.assertEqual(sum(perft_divide(game, 4)), perft(game, 4))
+
+    def test_game_unchanged(self):
+        game = game_after(120, at_turn_start=True)
+        before = JsonSerialiser().ser(game)
+        perft(game, 4)
+        self.assertEqual(JsonSerialiser().ser(game), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from backend.bots import RandomFrontend
+from backend.core import Game, DefaultRuleset, Card, GainResource
+from backend.core.profiling import EffectProfiler
+
+
+class EffectProfilerTest(unittest.TestCase):
+    def _run_profiled(self, seed: int):
+        prof = EffectProfiler()
+        with prof:
+            Game(4, RandomFrontend(seed), DefaultRuleset(), seed).run_game()
+        return prof
+
+    def test_counts_and_frontend_time(self):
+        prof = self._run_profiled(1)
+        self.assertEqual(prof.games, 1)
+        self.assertGreater(prof.by_effect['GainResource'].calls, 0)
+        self.assertEqual(prof.by_effect['GainResource'].frontend_ns, 0)
+        spend = prof.by_effect['SpendResource']
+        self.assertGreater(spend.frontend_ns, 0)
+        self.assertLessEqual(spend.frontend_ns, spend.total_ns)
+        starting_purple = [k for k in prof.by_template
+                           if k.startswith('PURPLE GainResource(PURPLE, 1)')
+                           and k.endswith('[starting]')]
+        self.assertEqual(len(starting_purple), 1)
+
+    def test_disable_restores_methods(self):
+        orig_card, orig_gain = Card.execute, GainResource.execute
+        self._run_profiled(2)
+        self.assertIs(Card.execute, orig_card)
+        self.assertIs(GainResource.execute, orig_gain)
+
+    def test_disable_forgets_game_objects(self):
+        frontend = RandomFrontend(5)
+        with EffectProfiler() as prof:
+            game = Game(4, frontend, DefaultRuleset(), 5)
+            self.assertIsNot(game.players[0].frontend, frontend)  # A timing proxy
+            self.assertEqual(len(prof._proxies), 1)
+        self.assertEqual(prof._proxies, {})
+        self.assertEqual(prof._template_keys, {})
+
+    def test_merge_round_trip(self):
+        a = self._run_profiled(3)
+        b = self._run_profiled(4)
+        merged = EffectProfiler.from_json(a.to_json()).merge(
+            EffectProfiler.from_json(b.to_json()))
+        self.assertEqual(merged.games, 2)
+        self.assertEqual(merged.by_effect['GainResource'].calls,
+                         a.by_effect['GainResource'].calls
+                         + b.by_effect['GainResource'].calls)
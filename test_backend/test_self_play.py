@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from backend.bots.self_play import (SelfPlayConfig, generate_shards, list_shards,
+                                    read_shard, DECISION_KINDS)
+
+_CONFIG = SelfPlayConfig(shard_size=300)
+
+
+def shard_bytes(out_dir: str | Path):
+    return [p.read_bytes() for p in list_shards(out_dir)]
+
+
+class SelfPlayTest(unittest.TestCase):
+    def setUp(self):
+        self._dirs = [tempfile.TemporaryDirectory() for _ in range(2)]
+        self.a, self.b = [d.name for d in self._dirs]
+
+    def tearDown(self):
+        for d in self._dirs:
+            d.cleanup()
+
+    def test_shards(self):
+        generate_shards(self.a, range(0, 4), _CONFIG, n_workers=2)
+        shards = [read_shard(p) for p in list_shards(self.a)]
+        sizes = [len(s['actions']) for s in shards]
+        self.assertTrue(all(n == 300 for n in sizes[:-1]))
+        self.assertLessEqual(sizes[-1], 300)
+        for s in shards:
+            n = len(s['actions'])
+            self.assertEqual(s['states'].shape, (n, s['states'].shape[1]))
+            # The chosen action is always legal
+            self.assertTrue(s['masks'][np.arange(n), s['actions']].all())
+            self.assertTrue((s['kinds'] < len(DECISION_KINDS)).all())
+        self.assertEqual(shards[0]['position_start'].tolist(), [0, 0])
+        self.assertEqual(shards[-1]['position_end'].tolist(), [4, 0])
+        self.assertEqual(sorted(set(np.concatenate([s['games'] for s in shards]))),
+                         [0, 1, 2, 3])
+
+    def test_deterministic_when_resumed(self):
+        generate_shards(self.a, range(0, 5), _CONFIG, n_workers=2)
+        generate_shards(self.b, range(0, 2), _CONFIG, n_workers=1)
+        generate_shards(self.b, range(0, 5), _CONFIG, n_workers=3)
+        self.assertEqual(shard_bytes(self.b), shard_bytes(self.a))
+        # As if it was stopped after writing the first shards
+        for p in list_shards(self.b)[2:]:
+            p.unlink()
+        generate_shards(self.b, range(0, 5), _CONFIG, n_workers=2)
+        self.assertEqual(shard_bytes(self.b), shard_bytes(self.a))
+
+    def test_other_range_start(self):
+        generate_shards(self.a, range(0, 1), _CONFIG, n_workers=1)
+        with self.assertRaises(ValueError):
+            generate_shards(self.a, range(1, 2), _CONFIG, n_workers=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import socket
+import time
+import unittest
+
+from websockets import ConnectionClosed
+from websockets.sync.client import connect
+
+from backend.api.wesocket_conn import WebsocketConn
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        return s.getsockname()[1]
+
+
+class SpectatorTest(unittest.TestCase):
+    def connect(self, conn: WebsocketConn, path=''):
+        deadline = time.monotonic() + 2.0
+        while True:
+            try:
+                return connect(f'ws://localhost:{conn.port}{path}')
+            except ConnectionRefusedError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.005)
+
+    def wait_for_spectators(self, conn: WebsocketConn, n: int):
+        deadline = time.monotonic() + 2.0
+        while conn.n_spectators != n:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.005)
+
+    def test_spectator_stream(self):
+        conn = WebsocketConn(_free_port(), spectator_buffer=4)
+        conn.init()
+        player = self.connect(conn)
+        conn.send({'request': 'init'})
+        conn.send({'request': 'state', 'state': 1})
+        spec = self.connect(conn, WebsocketConn.SPECTATE_PATH)
+        self.wait_for_spectators(conn, 1)
+        # Gets the latest init and state when joining
+        self.assertEqual(json.loads(spec.recv(timeout=2)), {'request': 'init'})
+        self.assertEqual(json.loads(spec.recv(timeout=2)), {'request': 'state', 'state': 1})
+        for i in range(50):
+            conn.send({'request': 'state', 'state': i})
+        for i in range(52):
+            player.recv(timeout=2)  # The player gets everything
+        conn.send({'request': 'result'})
+        conn.close()
+        received = []
+        try:
+            while True:
+                received.append(json.loads(spec.recv(timeout=2)))
+        except ConnectionClosed:
+            pass
+        # Old messages may be dropped but the latest are always received
+        self.assertEqual(received[-1], {'request': 'result'})
+        self.assertEqual(received[-2], {'request': 'state', 'state': 49})
+        self.assertLessEqual(len(received), 51)
+        player.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import tempfile
+import unittest
+
+from backend.analytics import grid, random_search, config_hash, run_sweep, format_table
+from backend.bots import RandomFrontend
+from backend.core import (ConfigurableRuleset, DefaultRuleset, Game, AnyResource, Color,
+                          MoonPhase)
+
+
+class ConfigurableRulesetTest(unittest.TestCase):
+    def test_defaults(self):
+        r, default = ConfigurableRuleset(), DefaultRuleset()
+        self.assertEqual(r.cards_per_player, default.cards_per_player)
+        self.assertEqual(r.get_moon_pool(), default.get_moon_pool())
+        self.assertEqual(r.get_starting_resources(), default.get_starting_resources())
+        for res in AnyResource.members():
+            self.assertEqual(r.resources_per_point(res), default.resources_per_point(res))
+
+    def test_overrides(self):
+        r = ConfigurableRuleset(7, {'YELLOW': 2}, (1, 1, 1), ['RED'] * 10, {'POINTS': 3})
+        self.assertEqual(r.cards_per_player, 7)
+        self.assertEqual(r.resources_per_point(Color.YELLOW), 2)
+        self.assertEqual(r.resources_per_point(Color.RED), -1)
+        self.assertEqual(r.get_swap_dirn(1), 1)
+        self.assertEqual(r.get_moon_pool(), [MoonPhase.RED] * 10)
+        self.assertEqual(r.get_starting_resources(), {AnyResource.POINTS: 3})
+
+    def test_invalid(self):
+        for kwargs in [{'cards_per_player': 5}, {'moon_pool': ['RED'] * 9},
+                       {'swap_dirns': (1, -1)}, {'resources_per_point': {'RED': 0}}]:
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                ConfigurableRuleset(**kwargs)
+
+    def test_max_players(self):
+        self.assertEqual(ConfigurableRuleset(cards_per_player=7).max_players(), 4)
+        ruleset = ConfigurableRuleset(cards_per_player=8)  # Round 2 only has 31 cards
+        self.assertEqual(ruleset.max_players(), 3)
+        Game(3, RandomFrontend(0), ruleset, '0').run_game()
+        with self.assertRaises(ValueError):
+            Game(4, RandomFrontend(0), ruleset, '0')
+
+
+class SweepTest(unittest.TestCase):
+    def test_grid(self):
+        configs = grid(cards_per_player=[6, 7], swap_dirns=[(1, 1, 1)])
+        self.assertEqual(configs, [{'cards_per_player': 6, 'swap_dirns': (1, 1, 1)},
+                                   {'cards_per_player': 7, 'swap_dirns': (1, 1, 1)}])
+        self.assertEqual(len(random_search(3, 0, cards_per_player=[6, 7],
+                                           swap_dirns=[(1, 1, 1), (1, -1, 1)])), 3)
+
+    def test_config_hash(self):
+        self.assertEqual(
+            config_hash({'cards_per_player': 7, 'resources_per_point': {Color.YELLOW: 2}}),
+            config_hash({'resources_per_point': {'YELLOW': 2}, 'cards_per_player': 7}))
+        self.assertNotEqual(config_hash({}, seed='0'), config_hash({}, seed='1'))
+
+    def test_sweep_cache(self):
+        configs = [{}, {'starting_resources': {**{c.name: 1 for c in Color.members()}, 'POINTS': 2}}]
+        with tempfile.TemporaryDirectory() as d:
+            cells = run_sweep(configs, range(6), n_workers=2, cache_dir=d, batch_size=4)
+            again = run_sweep(configs, range(6), n_workers=1, cache_dir=d)
+        self.assertEqual([c.cached for c in cells], [False, False])
+        self.assertEqual([c.cached for c in again], [True, True])
+        self.assertEqual([c.stats for c in cells], [c.stats for c in again])
+        self.assertEqual(cells[0].stats.n_games, 6)
+        self.assertAlmostEqual(cells[1].stats.score.mean - cells[0].stats.score.mean, 2)
+        self.assertEqual(len(format_table(cells).splitlines()), 3)
+
+    def test_sweep_checks_players(self):
+        with self.assertRaises(ValueError):
+            run_sweep([{}, {'cards_per_player': 8}], range(2), n_workers=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
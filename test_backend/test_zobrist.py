@@ -0,0 +1,79 @@
+import json
+import unittest
+from typing import Sequence, TypeVar
+
+from backend.api.json_deserialise import JsonDeserialiser
+from backend.api.json_serialise import JsonSerialiser
+from backend.bots import RandomFrontend
+from backend.core import Game, DefaultRuleset, Player
+from backend.core.zobrist import ZobristHasher
+from backend.search import TranspositionTable
+
+T = TypeVar('T')
+
+
+class _CheckingFrontend(RandomFrontend):
+    """Checks the incremental hash before every decision"""
+
+    def __init__(self, test: unittest.TestCase, seed: int, record_states=False):
+        super().__init__(seed)
+        self.test = test
+        self.hasher: ZobristHasher | None = None
+        # Serialised state -> hash
+        self.states: dict[str, int] | None = {} if record_states else None
+
+    def choose(self, kind: str, player: Player, options: Sequence[T]) -> T:
+        self.test.assertEqual(self.hasher.value, self.hasher.recompute())
+        if self.states is not None:
+            state = json.dumps(JsonSerialiser().ser(self.game), sort_keys=True)
+            self.test.assertEqual(self.states.setdefault(state, self.hasher.value),
+                                  self.hasher.value)
+        return super().choose(kind, player, options)
+
+
+class ZobristTest(unittest.TestCase):
+    def run_checked_game(self, seed: int, record_states=False):
+        frontend = _CheckingFrontend(self, seed, record_states)
+        game = Game(4, frontend, DefaultRuleset(), f'seed-{seed}')
+        frontend.hasher = ZobristHasher(game)
+        game.run_game()
+        self.assertEqual(frontend.hasher.value, frontend.hasher.recompute())
+        return game, frontend
+
+    def test_incremental_matches_full(self):
+        for seed in range(3):
+            with self.subTest(seed=seed):
+                self.run_checked_game(seed)
+
+    def test_equal_states_have_equal_hashes(self):
+        game, frontend = self.run_checked_game(0, record_states=True)
+        # Rebuilt (different objects) but the same state
+        copy = JsonDeserialiser().deser_game(
+            JsonSerialiser().ser(game), RandomFrontend(0), DefaultRuleset())
+        self.assertEqual(ZobristHasher(copy).value, frontend.hasher.value)
+        # And different states have different ones
+        self.assertEqual(len(set(frontend.states.values())), len(frontend.states))
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_replacement(self):
+        tt = TranspositionTable[str](6)
+        self.assertEqual(tt.size, 8)
+        tt.put(3, 'a', depth=2)
+        self.assertEqual(tt.get(3), 'a')
+        self.assertIsNone(tt.get(3, min_depth=3))
+        # Collides (same slot) but is shallower so is not stored
+        self.assertFalse(tt.put(3 + 8, 'b', depth=1))
+        self.assertIsNone(tt.get(11))
+        self.assertTrue(tt.put(11, 'c', depth=2))
+        self.assertEqual(tt.get(11), 'c')
+        self.assertNotIn(3, tt)
+        # Old entries are always replaced
+        tt.new_generation()
+        self.assertTrue(tt.put(3, 'd', depth=0))
+        self.assertEqual(tt.get(3), 'd')
+        self.assertEqual(len(tt), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()